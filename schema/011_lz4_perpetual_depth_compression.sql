@@ -0,0 +1,26 @@
+-- ============================================================================
+-- LZ4 TOAST compression for perpetual orderbook depth JSONB
+-- Issue: bids/asks JSONB are by far the largest columns in perpetuals_orderbook_depth
+-- and are TOAST-compressed with the default pglz until TimescaleDB compresses the chunk
+-- Solution: switch bids/asks to LZ4 (PostgreSQL 14+), which compresses/decompresses
+-- several times faster than pglz at a similar ratio
+-- Note: applies to newly written values; existing rows keep pglz until rewritten
+-- ============================================================================
+
+DO $$
+BEGIN
+    IF current_setting('server_version_num')::int < 140000 THEN
+        RAISE NOTICE 'PostgreSQL < 14: LZ4 column compression not available, skipping';
+    ELSIF to_regclass('perpetuals_orderbook_depth') IS NULL THEN
+        RAISE NOTICE 'perpetuals_orderbook_depth does not exist, skipping';
+    ELSE
+        ALTER TABLE perpetuals_orderbook_depth
+            ALTER COLUMN bids SET COMPRESSION lz4,
+            ALTER COLUMN asks SET COMPRESSION lz4;
+        RAISE NOTICE 'perpetuals_orderbook_depth: bids/asks now use LZ4 compression';
+    END IF;
+END $$;
+
+-- Check (average stored bytes per value):
+--   SELECT avg(pg_column_size(bids)), avg(pg_column_size(asks))
+--   FROM perpetuals_orderbook_depth WHERE timestamp > NOW() - INTERVAL '1 hour';
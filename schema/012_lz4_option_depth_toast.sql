@@ -0,0 +1,47 @@
+-- ============================================================================
+-- LZ4 TOAST compression + low toast_tuple_target for option orderbook depth
+-- Issue: a depth row carries two 20-level bids/asks JSONB arrays; compressed
+-- with pglz they usually still fit inline (under the default ~2KB tuple
+-- target), so heap pages hold only a few rows and scans read mostly JSONB
+-- Solution: LZ4 for bids/asks (PostgreSQL 14+; faster than pglz at a similar
+-- ratio) and toast_tuple_target = 128 (the minimum), which moves the
+-- compressed arrays out of line and leaves narrow heap tuples
+-- Note: applies to newly written rows; existing rows keep their layout until
+-- rewritten (see VACUUM FULL below)
+-- ============================================================================
+
+DO $$
+DECLARE
+    depth_table TEXT;
+BEGIN
+    FOREACH depth_table IN ARRAY ARRAY['eth_option_orderbook_depth', 'btc_option_orderbook_depth']
+    LOOP
+        IF to_regclass(depth_table) IS NULL THEN
+            RAISE NOTICE '% does not exist, skipping', depth_table;
+            CONTINUE;
+        END IF;
+
+        IF current_setting('server_version_num')::int >= 140000 THEN
+            EXECUTE format(
+                'ALTER TABLE %I ALTER COLUMN bids SET COMPRESSION lz4, ALTER COLUMN asks SET COMPRESSION lz4',
+                depth_table
+            );
+        ELSE
+            RAISE NOTICE 'PostgreSQL < 14: LZ4 column compression not available for %', depth_table;
+        END IF;
+
+        EXECUTE format('ALTER TABLE %I SET (toast_tuple_target = 128)', depth_table);
+        RAISE NOTICE '%: bids/asks LZ4, toast_tuple_target = 128', depth_table;
+    END LOOP;
+END $$;
+
+-- Rewrite existing rows into the new layout (takes an ACCESS EXCLUSIVE lock;
+-- run in a maintenance window, outside a transaction):
+--   VACUUM FULL eth_option_orderbook_depth;
+--   VACUUM FULL btc_option_orderbook_depth;
+
+-- Check heap vs TOAST split (heap should shrink, TOAST grow):
+--   SELECT pg_size_pretty(pg_relation_size('eth_option_orderbook_depth')) AS heap,
+--          pg_size_pretty(pg_table_size('eth_option_orderbook_depth')
+--                         - pg_relation_size('eth_option_orderbook_depth')) AS toast,
+--          pg_size_pretty(pg_indexes_size('eth_option_orderbook_depth')) AS indexes;
@@ -0,0 +1,101 @@
+-- ============================================================================
+-- Option orderbook depth: JSONB bids/asks -> price/size arrays
+-- Issue: bids/asks JSONB repeat the "price"/"amount" keys for every level
+-- (x20 per side per row), which is pure storage overhead and hurts the
+-- compressor's back-references across rows
+-- Solution: four parallel numeric(20,8)[] columns (bid_prices, bid_sizes,
+-- ask_prices, ask_sizes), level i of a side at index i (best first); the
+-- writers build them straight from Deribit's [[price, amount], ...] pairs
+-- Note: existing rows are backfilled from the JSONB columns before those are
+-- dropped; the latest_orderbook view and the JSONB GIN indexes go with them.
+-- toast_tuple_target from 012 is a table setting and still applies; LZ4 is
+-- set on the new columns here.
+-- ============================================================================
+
+DROP MATERIALIZED VIEW IF EXISTS latest_orderbook;
+
+DO $$
+DECLARE
+    depth_table TEXT;
+BEGIN
+    FOREACH depth_table IN ARRAY ARRAY['eth_option_orderbook_depth', 'btc_option_orderbook_depth']
+    LOOP
+        IF to_regclass(depth_table) IS NULL THEN
+            RAISE NOTICE '% does not exist, skipping', depth_table;
+            CONTINUE;
+        END IF;
+
+        EXECUTE format(
+            'ALTER TABLE %I '
+            'ADD COLUMN IF NOT EXISTS bid_prices NUMERIC(20, 8)[], '
+            'ADD COLUMN IF NOT EXISTS bid_sizes NUMERIC(20, 8)[], '
+            'ADD COLUMN IF NOT EXISTS ask_prices NUMERIC(20, 8)[], '
+            'ADD COLUMN IF NOT EXISTS ask_sizes NUMERIC(20, 8)[]',
+            depth_table
+        );
+
+        -- Backfill from the JSONB levels (only while they still exist)
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = depth_table
+              AND column_name = 'bids'
+        ) THEN
+            EXECUTE format(
+                'UPDATE %I SET '
+                'bid_prices = ARRAY(SELECT (l->>''price'')::numeric FROM jsonb_array_elements(bids) l), '
+                'bid_sizes = ARRAY(SELECT (l->>''amount'')::numeric FROM jsonb_array_elements(bids) l), '
+                'ask_prices = ARRAY(SELECT (l->>''price'')::numeric FROM jsonb_array_elements(asks) l), '
+                'ask_sizes = ARRAY(SELECT (l->>''amount'')::numeric FROM jsonb_array_elements(asks) l) '
+                'WHERE bid_prices IS NULL AND (bids IS NOT NULL OR asks IS NOT NULL)',
+                depth_table
+            );
+            EXECUTE format('ALTER TABLE %I DROP COLUMN bids, DROP COLUMN asks', depth_table);
+        END IF;
+
+        IF current_setting('server_version_num')::int >= 140000 THEN
+            EXECUTE format(
+                'ALTER TABLE %I '
+                'ALTER COLUMN bid_prices SET COMPRESSION lz4, '
+                'ALTER COLUMN bid_sizes SET COMPRESSION lz4, '
+                'ALTER COLUMN ask_prices SET COMPRESSION lz4, '
+                'ALTER COLUMN ask_sizes SET COMPRESSION lz4',
+                depth_table
+            );
+        END IF;
+
+        RAISE NOTICE '%: depth levels now stored as price/size arrays', depth_table;
+    END LOOP;
+END $$;
+
+-- The GIN indexes on bids/asks (002) were dropped with the columns
+DROP INDEX IF EXISTS idx_orderbook_depth_bids;
+DROP INDEX IF EXISTS idx_orderbook_depth_asks;
+
+-- Latest orderbook per instrument (fast lookups), as in 002
+DO $$
+BEGIN
+    IF to_regclass('eth_option_orderbook_depth') IS NOT NULL THEN
+        CREATE MATERIALIZED VIEW IF NOT EXISTS latest_orderbook AS
+        SELECT DISTINCT ON (instrument)
+            instrument,
+            timestamp,
+            bid_prices,
+            bid_sizes,
+            ask_prices,
+            ask_sizes,
+            mark_price,
+            underlying_price,
+            open_interest,
+            volume_24h
+        FROM eth_option_orderbook_depth
+        ORDER BY instrument, timestamp DESC;
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_latest_orderbook_instrument
+            ON latest_orderbook (instrument);
+    END IF;
+END $$;
+
+-- Level count per side (replaces jsonb_array_length(bids)):
+--   SELECT instrument, array_length(bid_prices, 1), array_length(ask_prices, 1)
+--   FROM eth_option_orderbook_depth ORDER BY timestamp DESC LIMIT 5;
@@ -0,0 +1,79 @@
+-- ============================================================================
+-- Option orderbook depth: numeric(20,8)[] -> double precision[] level arrays
+-- Issue: NUMERIC array elements are variable-length base-10000 digit strings
+-- with a per-element header, so a 20-level side costs noticeably more than
+-- 20 x 8 bytes before compression, and COPY has to encode every element
+-- through the numeric text/binary path
+-- Solution: store the four level arrays as float8[] - a fixed 8-byte binary
+-- element, the same type the collectors already hold (Deribit sends prices
+-- and amounts as JSON floats, so no precision is lost relative to the source)
+-- Note: ALTER COLUMN TYPE rewrites the table (ACCESS EXCLUSIVE lock; run in a
+-- maintenance window). latest_orderbook depends on the columns and is
+-- recreated, and LZ4 is set again on the retyped columns.
+-- ============================================================================
+
+DROP MATERIALIZED VIEW IF EXISTS latest_orderbook;
+
+DO $$
+DECLARE
+    depth_table TEXT;
+BEGIN
+    FOREACH depth_table IN ARRAY ARRAY['eth_option_orderbook_depth', 'btc_option_orderbook_depth']
+    LOOP
+        IF to_regclass(depth_table) IS NULL THEN
+            RAISE NOTICE '% does not exist, skipping', depth_table;
+            CONTINUE;
+        END IF;
+
+        EXECUTE format(
+            'ALTER TABLE %I '
+            'ALTER COLUMN bid_prices TYPE DOUBLE PRECISION[] USING bid_prices::double precision[], '
+            'ALTER COLUMN bid_sizes TYPE DOUBLE PRECISION[] USING bid_sizes::double precision[], '
+            'ALTER COLUMN ask_prices TYPE DOUBLE PRECISION[] USING ask_prices::double precision[], '
+            'ALTER COLUMN ask_sizes TYPE DOUBLE PRECISION[] USING ask_sizes::double precision[]',
+            depth_table
+        );
+
+        IF current_setting('server_version_num')::int >= 140000 THEN
+            EXECUTE format(
+                'ALTER TABLE %I '
+                'ALTER COLUMN bid_prices SET COMPRESSION lz4, '
+                'ALTER COLUMN bid_sizes SET COMPRESSION lz4, '
+                'ALTER COLUMN ask_prices SET COMPRESSION lz4, '
+                'ALTER COLUMN ask_sizes SET COMPRESSION lz4',
+                depth_table
+            );
+        END IF;
+
+        RAISE NOTICE '%: depth level arrays now double precision[]', depth_table;
+    END LOOP;
+END $$;
+
+-- Latest orderbook per instrument (fast lookups), as in 013
+DO $$
+BEGIN
+    IF to_regclass('eth_option_orderbook_depth') IS NOT NULL THEN
+        CREATE MATERIALIZED VIEW IF NOT EXISTS latest_orderbook AS
+        SELECT DISTINCT ON (instrument)
+            instrument,
+            timestamp,
+            bid_prices,
+            bid_sizes,
+            ask_prices,
+            ask_sizes,
+            mark_price,
+            underlying_price,
+            open_interest,
+            volume_24h
+        FROM eth_option_orderbook_depth
+        ORDER BY instrument, timestamp DESC;
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_latest_orderbook_instrument
+            ON latest_orderbook (instrument);
+    END IF;
+END $$;
+
+-- Check (average stored bytes per side, after compression):
+--   SELECT avg(pg_column_size(bid_prices) + pg_column_size(bid_sizes)) AS bid_bytes,
+--          avg(pg_column_size(ask_prices) + pg_column_size(ask_sizes)) AS ask_bytes
+--   FROM eth_option_orderbook_depth WHERE timestamp > NOW() - INTERVAL '1 hour';
@@ -0,0 +1,40 @@
+-- ============================================================================
+-- BRIN timestamp indexes for append-only depth tables; drop redundant B-trees
+-- Issue: the option depth tables (plain tables, not hypertables) carry a full
+-- B-tree on timestamp alone, although rows arrive in timestamp order and
+-- are only ever read by recent time window; perpetuals_quotes has a
+-- timestamp B-tree that duplicates its PRIMARY KEY (timestamp, instrument)
+-- Solution: BRIN (timestamp) on the option depth tables - a few pages instead
+-- of one entry per row, and just as selective for "timestamp > NOW() - x"
+-- on insert-ordered data - and drop the timestamp-only B-trees they replace
+-- Note: hypertables (quotes/trades) already prune by chunk on timestamp, so
+-- they get no BRIN; perpetuals_trades keeps its timestamp B-tree because its
+-- primary key does not lead with timestamp. BRIN cannot serve
+-- ORDER BY timestamp DESC on its own, so recency queries on the depth tables
+-- should bound the window (WHERE timestamp > NOW() - INTERVAL ...).
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_eth_orderbook_depth_time_brin
+    ON eth_option_orderbook_depth USING BRIN (timestamp) WITH (pages_per_range = 32);
+
+CREATE INDEX IF NOT EXISTS idx_btc_orderbook_depth_time_brin
+    ON btc_option_orderbook_depth USING BRIN (timestamp) WITH (pages_per_range = 32);
+
+-- Timestamp-only B-tree on the ETH depth table (002), replaced by the BRIN above
+DROP INDEX IF EXISTS idx_orderbook_depth_time;
+
+-- Duplicates the leading column of PRIMARY KEY (timestamp, instrument), which
+-- already serves time-range scans and ORDER BY timestamp DESC
+DROP INDEX IF EXISTS idx_perpetuals_quotes_time;
+
+-- On a live database, build the BRIN indexes without blocking writers instead
+-- (outside a transaction):
+--   CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_eth_orderbook_depth_time_brin
+--       ON eth_option_orderbook_depth USING BRIN (timestamp) WITH (pages_per_range = 32);
+--   CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_btc_orderbook_depth_time_brin
+--       ON btc_option_orderbook_depth USING BRIN (timestamp) WITH (pages_per_range = 32);
+
+-- Check index sizes:
+--   SELECT indexrelname, pg_size_pretty(pg_relation_size(indexrelid))
+--   FROM pg_stat_user_indexes
+--   WHERE relname IN ('eth_option_orderbook_depth', 'btc_option_orderbook_depth');
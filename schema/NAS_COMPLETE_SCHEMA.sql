@@ -98,8 +98,10 @@ SELECT add_compression_policy(
 CREATE TABLE IF NOT EXISTS eth_option_orderbook_depth (
     timestamp TIMESTAMPTZ NOT NULL,
     instrument VARCHAR(50) NOT NULL,
-    bids JSONB,
-    asks JSONB,
+    bid_prices DOUBLE PRECISION[],  -- Depth levels as parallel arrays, best first (013/014)
+    bid_sizes DOUBLE PRECISION[],
+    ask_prices DOUBLE PRECISION[],
+    ask_sizes DOUBLE PRECISION[],
     mark_price DECIMAL(20, 10),
     underlying_price DECIMAL(20, 10),
     open_interest DECIMAL(20, 8),
@@ -109,6 +111,9 @@ CREATE TABLE IF NOT EXISTS eth_option_orderbook_depth (
 CREATE INDEX IF NOT EXISTS idx_eth_orderbook_depth_instrument_time
     ON eth_option_orderbook_depth (instrument, timestamp DESC);
 
+CREATE INDEX IF NOT EXISTS idx_eth_orderbook_depth_time_brin
+    ON eth_option_orderbook_depth USING BRIN (timestamp) WITH (pages_per_range = 32);  -- 015
+
 -- ============================================================================
 -- BTC OPTIONS TABLES (from 003_add_btc_tables.sql)
 -- ============================================================================
@@ -145,8 +150,10 @@ CREATE INDEX IF NOT EXISTS idx_btc_trades_instrument_time
 CREATE TABLE IF NOT EXISTS btc_option_orderbook_depth (
     timestamp TIMESTAMPTZ NOT NULL,
     instrument VARCHAR(50) NOT NULL,
-    bids JSONB,
-    asks JSONB,
+    bid_prices DOUBLE PRECISION[],  -- Depth levels as parallel arrays, best first (013/014)
+    bid_sizes DOUBLE PRECISION[],
+    ask_prices DOUBLE PRECISION[],
+    ask_sizes DOUBLE PRECISION[],
     mark_price DECIMAL(20, 10),
     underlying_price DECIMAL(20, 10),
     open_interest DECIMAL(20, 8),
@@ -156,6 +163,9 @@ CREATE TABLE IF NOT EXISTS btc_option_orderbook_depth (
 CREATE INDEX IF NOT EXISTS idx_btc_orderbook_depth_instrument_time
     ON btc_option_orderbook_depth (instrument, timestamp DESC);
 
+CREATE INDEX IF NOT EXISTS idx_btc_orderbook_depth_time_brin
+    ON btc_option_orderbook_depth USING BRIN (timestamp) WITH (pages_per_range = 32);  -- 015
+
 -- ============================================================================
 -- PERPETUALS TABLES (from 004_add_perpetual_tick_tables.sql)
 -- ============================================================================
@@ -174,7 +184,6 @@ CREATE TABLE IF NOT EXISTS perpetuals_quotes (
     PRIMARY KEY (timestamp, instrument)
 );
 
-CREATE INDEX IF NOT EXISTS idx_perpetuals_quotes_time ON perpetuals_quotes (timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_perpetuals_quotes_instrument ON perpetuals_quotes (instrument, timestamp DESC);
 
 SELECT create_hypertable('perpetuals_quotes', 'timestamp', if_not_exists => TRUE, migrate_data => TRUE);
@@ -15,13 +15,15 @@ Usage:
 """
 
 import asyncio
-import json
 import logging
+from dataclasses import asdict
 from datetime import datetime
 from typing import List, Dict, Set, Optional
 from aiohttp import web
 import aiohttp
 
+from scripts.json_codec import json_dumps, json_loads
+
 logger = logging.getLogger(__name__)
 
 
@@ -251,7 +253,7 @@ class CollectorControlAPI:
                 'instruments': sorted(self.collector.instruments),
                 'websocket_connected': self.collector.ws is not None,
                 'last_tick_time': last_tick_str,
-                'stats': self.collector.stats,
+                'stats': asdict(self.collector.stats),
                 'running': self.collector.running
             }
 
@@ -303,7 +305,7 @@ class CollectorControlAPI:
             "id": int(datetime.utcnow().timestamp() * 1000)  # Unique ID
         }
 
-        await self.collector.ws.send(json.dumps(subscription_msg))
+        await self.collector.ws.send(json_dumps(subscription_msg).decode())
 
         # Wait for confirmation (with timeout)
         try:
@@ -311,7 +313,7 @@ class CollectorControlAPI:
                 self.collector.ws.recv(),
                 timeout=5.0
             )
-            response_data = json.loads(response)
+            response_data = json_loads(response)
 
             if 'error' in response_data:
                 raise Exception(f"Subscription error: {response_data['error']}")
@@ -348,7 +350,7 @@ class CollectorControlAPI:
             "id": int(datetime.utcnow().timestamp() * 1000)  # Unique ID
         }
 
-        await self.collector.ws.send(json.dumps(unsubscription_msg))
+        await self.collector.ws.send(json_dumps(unsubscription_msg).decode())
 
         # Wait for confirmation (with timeout)
         try:
@@ -356,7 +358,7 @@ class CollectorControlAPI:
                 self.collector.ws.recv(),
                 timeout=5.0
             )
-            response_data = json.loads(response)
+            response_data = json_loads(response)
 
             if 'error' in response_data:
                 raise Exception(f"Unsubscription error: {response_data['error']}")
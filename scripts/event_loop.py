@@ -0,0 +1,47 @@
+"""
+Event Loop Setup - optional uvloop for the collectors
+
+uvloop (libuv-based) replaces the default asyncio selector loop and is
+markedly faster for asyncpg/websockets workloads. It is optional: when it
+is not installed (or on Windows) the stdlib loop is used unchanged.
+
+The policy must be set before the loop is created, i.e. once at the entry
+point, before asyncio.run():
+
+    from scripts.event_loop import install_uvloop
+
+    install_uvloop()
+    asyncio.run(main())
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def install_uvloop() -> bool:
+    """
+    Make asyncio.run() create uvloop event loops, if uvloop is available.
+
+    Returns:
+        True if uvloop was installed, False if the default loop stays in use
+    """
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed, using default asyncio event loop")
+        return False
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # Too late: the running loop would not be replaced
+        logger.warning("install_uvloop() called from a running event loop; keeping the current loop")
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
+    return True
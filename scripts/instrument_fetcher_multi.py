@@ -33,16 +33,24 @@ class MultiCurrencyInstrumentFetcher:
     - Error handling with retries
     """
 
-    def __init__(self, currency: str = "ETH", api_url: str = "https://www.deribit.com/api/v2"):
+    def __init__(
+        self,
+        currency: str = "ETH",
+        api_url: str = "https://www.deribit.com/api/v2",
+        http_connector: Optional[aiohttp.TCPConnector] = None
+    ):
         """
         Initialize multi-currency instrument fetcher.
 
         Args:
             currency: Currency code (BTC, ETH, SOL, etc.)
             api_url: Deribit REST API base URL
+            http_connector: Shared aiohttp connector (owned by the caller);
+                a private one is created per request if None
         """
         self.currency = currency.upper()
         self.api_url = api_url
+        self.http_connector = http_connector
         self.cache: Optional[List[str]] = None
         self.cache_timestamp: Optional[datetime] = None
         self.cache_duration = timedelta(hours=1)
@@ -119,7 +127,10 @@ class MultiCurrencyInstrumentFetcher:
 
         for attempt in range(max_retries):
             try:
-                async with aiohttp.ClientSession() as session:
+                async with aiohttp.ClientSession(
+                    connector=self.http_connector,
+                    connector_owner=self.http_connector is None
+                ) as session:
                     # Get all instruments for this currency
                     url = f"{self.api_url}/public/get_instruments"
                     params = {
@@ -41,6 +41,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Statement texts kept identical across calls (and shared with the tests):
+# asyncpg caches prepared statements per connection keyed by query text, so
+# repeat inserts on a pooled connection skip parse/plan
+INSTRUMENT_UPSERT_SQL = """
+    INSERT INTO instrument_metadata
+    (instrument_name, currency, instrument_type, strike_price, expiry_date, option_type, is_active, listed_at, last_seen_at)
+    VALUES ($1, $2, $3, $4, $5, $6, TRUE, NOW(), NOW())
+    ON CONFLICT (instrument_name) DO UPDATE SET
+        is_active = TRUE,
+        last_seen_at = NOW(),
+        updated_at = NOW()
+"""
+
+LIFECYCLE_EVENT_INSERT_SQL = """
+    INSERT INTO lifecycle_events
+    (event_type, instrument_name, currency, collector_id, details, success, error_message)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+"""
+
 
 class LifecycleManager:
     """
@@ -397,15 +416,7 @@ class LifecycleManager:
         """Add new instrument to database."""
         async with self.db_pool.acquire() as conn:
             await conn.execute(
-                """
-                INSERT INTO instrument_metadata
-                (instrument_name, currency, instrument_type, strike_price, expiry_date, option_type, is_active, listed_at, last_seen_at)
-                VALUES ($1, $2, $3, $4, $5, $6, TRUE, NOW(), NOW())
-                ON CONFLICT (instrument_name) DO UPDATE SET
-                    is_active = TRUE,
-                    last_seen_at = NOW(),
-                    updated_at = NOW()
-                """,
+                INSTRUMENT_UPSERT_SQL,
                 instrument_name,
                 self.currency,
                 metadata.get('instrument_type', 'option'),
@@ -560,11 +571,7 @@ class LifecycleManager:
         try:
             async with self.db_pool.acquire() as conn:
                 await conn.execute(
-                    """
-                    INSERT INTO lifecycle_events
-                    (event_type, instrument_name, currency, collector_id, details, success, error_message)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
-                    """,
+                    LIFECYCLE_EVENT_INSERT_SQL,
                     event_type,
                     instrument_name,
                     self.currency,
@@ -12,13 +12,54 @@ instead of full orderbook snapshots.
 import asyncio
 import logging
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 import aiohttp
 
 from scripts.tick_writer import TickWriter
 
 logger = logging.getLogger(__name__)
 
+# _fetch_orderbook result for a book not newer than the last snapshot written
+_UNCHANGED = object()
+
+
+def depth_ladder_hash(depth: Dict) -> int:
+    """
+    Hash a depth snapshot's price/size levels (process-local, for dedup).
+
+    Two snapshots with the same hash carry the same ladder, whatever their
+    timestamps or mark prices.
+    """
+    return hash((
+        tuple(depth['bid_prices']), tuple(depth['bid_sizes']),
+        tuple(depth['ask_prices']), tuple(depth['ask_sizes'])
+    ))
+
+
+def drop_unchanged_depth(depth_snapshots: List[Dict], last_hashes: Dict[str, int]):
+    """
+    Split out depth snapshots whose ladder matches the last one written.
+
+    Illiquid books often sit unchanged between periodic snapshots; writing
+    them again only adds rows. last_hashes is not modified, so callers can
+    apply the returned hashes only once the write succeeds.
+
+    Args:
+        depth_snapshots: Depth snapshot dicts (bid_prices/bid_sizes/ask_prices/ask_sizes)
+        last_hashes: Instrument -> depth_ladder_hash() of its last written snapshot
+
+    Returns:
+        Tuple of (changed snapshots, their instrument -> hash map, count dropped)
+    """
+    changed = []
+    new_hashes: Dict[str, int] = {}
+    for depth in depth_snapshots:
+        ladder_hash = depth_ladder_hash(depth)
+        if last_hashes.get(depth['instrument']) != ladder_hash:
+            changed.append(depth)
+            new_hashes[depth['instrument']] = ladder_hash
+    return changed, new_hashes, len(depth_snapshots) - len(changed)
+
 
 class OrderbookSnapshotFetcher:
     """
@@ -26,29 +67,71 @@ class OrderbookSnapshotFetcher:
 
     This is used to get initial orderbook data before starting WebSocket,
     since WebSocket may only send delta updates.
+
+    Meant to be created once and reused: the HTTP session (keep-alive pool)
+    and database pool live across fetch_and_populate() calls until close().
     """
 
-    def __init__(self, database_url: str, rest_api_url: str = "https://www.deribit.com/api/v2"):
+    def __init__(
+        self,
+        database_url: str,
+        rest_api_url: str = "https://www.deribit.com/api/v2",
+        writer: Optional[TickWriter] = None
+    ):
         """
         Initialize snapshot fetcher.
 
         Args:
             database_url: PostgreSQL connection URL
             rest_api_url: Deribit REST API URL (default: production)
+            writer: Connected TickWriter to share (e.g. the collector's); the
+                    fetcher creates and owns its own if None
         """
         self.database_url = database_url
         self.rest_api_url = rest_api_url
-        self.writer = TickWriter(database_url)
+        self.writer = writer or TickWriter(database_url)
+        self._owns_writer = writer is None
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Instrument -> depth_ladder_hash() of the last depth row written
+        self._ladder_hashes: Dict[str, int] = {}
 
         logger.info(f"OrderbookSnapshotFetcher initialized: rest_api={rest_api_url}")
 
-    async def fetch_and_populate(self, instruments: List[str], save_full_depth: bool = False) -> Dict[str, int]:
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the keep-alive HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50, keepalive_timeout=300)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session and, if owned, the database pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        if self._owns_writer and self.writer.pool is not None:
+            await self.writer.close()
+
+    async def fetch_and_populate(
+        self,
+        instruments: List[str],
+        save_full_depth: bool = False,
+        since_ts: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
         """
         Fetch orderbook snapshots for all instruments and populate database.
 
         Args:
             instruments: List of instrument names (e.g., ['ETH-10NOV25-3200-C', ...])
             save_full_depth: If True, save full orderbook depth to eth_option_orderbook_depth table
+                             (skipping books whose levels match the last depth row
+                             this fetcher wrote for the instrument)
+            since_ts: Optional per-instrument book timestamp (epoch ms) of the last
+                      snapshot written. Books not newer than their entry are skipped,
+                      and entries are advanced once a snapshot is written. Pass the
+                      same dict on every call to only write changed books.
 
         Returns:
             Dictionary with stats:
@@ -56,13 +139,16 @@ class OrderbookSnapshotFetcher:
                 'instruments_fetched': 50,
                 'quotes_populated': 50,
                 'depth_snapshots': 50,  # Only if save_full_depth=True
-                'errors': 0
+                'errors': 0,
+                'instruments_unchanged': 0,  # Only counted with since_ts
+                'depth_unchanged': 0  # Depth rows skipped, ladder unchanged
             }
         """
         logger.info(f"Fetching orderbook snapshots for {len(instruments)} instruments (full_depth={save_full_depth})...")
 
-        # Connect to database
-        await self.writer.connect()
+        # Connect to database (first call only; the pool is reused)
+        if self.writer.pool is None:
+            await self.writer.connect()
 
         stats = {
             'instruments_fetched': 0,
@@ -70,89 +156,115 @@ class OrderbookSnapshotFetcher:
             'depth_snapshots': 0,
             'errors': 0,
             'instruments_with_data': 0,
-            'instruments_without_data': 0
+            'instruments_without_data': 0,
+            'instruments_unchanged': 0,
+            'depth_unchanged': 0
         }
 
         self.save_full_depth = save_full_depth
 
-        # Fetch orderbooks (with rate limiting)
-        async with aiohttp.ClientSession() as session:
-            # Process in batches to avoid overwhelming API
-            batch_size = 10
-            for i in range(0, len(instruments), batch_size):
-                batch = instruments[i:i + batch_size]
-
-                # Fetch batch concurrently
-                tasks = [
-                    self._fetch_orderbook(session, instrument)
-                    for instrument in batch
-                ]
-
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Process results
-                quotes = []
-                depth_snapshots = []
-                for instrument, result in zip(batch, results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Error fetching {instrument}: {result}")
-                        stats['errors'] += 1
-                    elif result is not None:
-                        # Result is a tuple: (quote_dict, depth_dict)
-                        quote_dict, depth_dict = result
-                        if quote_dict:
-                            quotes.append(quote_dict)
-                        if depth_dict:
-                            depth_snapshots.append(depth_dict)
-                        stats['instruments_fetched'] += 1
-                        stats['instruments_with_data'] += 1
-                    else:
-                        stats['instruments_fetched'] += 1
-                        stats['instruments_without_data'] += 1
-
-                # Write batch to database
-                if quotes:
-                    await self.writer.write_quotes(quotes)
-                    stats['quotes_populated'] += len(quotes)
-
-                if depth_snapshots and self.save_full_depth:
-                    await self.writer.write_depth_snapshots(depth_snapshots)
-                    stats['depth_snapshots'] += len(depth_snapshots)
-
-                logger.info(
-                    f"Progress: {stats['instruments_fetched']}/{len(instruments)} instruments, "
-                    f"{stats['quotes_populated']} quotes, {stats['depth_snapshots']} depth snapshots"
+        # Fetch orderbooks (with rate limiting) over the reused session
+        session = self._get_session()
+
+        # Rows for all instruments are written together after the fetch:
+        # one quote batch and one depth COPY per snapshot, not one per batch
+        quotes = []
+        depth_snapshots = []
+        book_ts: Dict[str, int] = {}
+
+        # Process in batches to avoid overwhelming API
+        batch_size = 10
+        for i in range(0, len(instruments), batch_size):
+            batch = instruments[i:i + batch_size]
+
+            # Fetch batch concurrently
+            tasks = [
+                self._fetch_orderbook(
+                    session, instrument,
+                    since_ts.get(instrument) if since_ts is not None else None
                 )
-
-                # Rate limiting: wait between batches
-                if i + batch_size < len(instruments):
-                    await asyncio.sleep(0.5)
+                for instrument in batch
+            ]
+
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Process results
+            for instrument, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error fetching {instrument}: {result}")
+                    stats['errors'] += 1
+                elif result is _UNCHANGED:
+                    stats['instruments_fetched'] += 1
+                    stats['instruments_unchanged'] += 1
+                elif result is not None:
+                    # Result is a tuple: (quote_dict, depth_dict, book timestamp ms)
+                    quote_dict, depth_dict, book_ts[instrument] = result
+                    if quote_dict:
+                        quotes.append(quote_dict)
+                    if depth_dict:
+                        depth_snapshots.append(depth_dict)
+                    stats['instruments_fetched'] += 1
+                    stats['instruments_with_data'] += 1
+                else:
+                    stats['instruments_fetched'] += 1
+                    stats['instruments_without_data'] += 1
+
+            logger.info(f"Progress: {stats['instruments_fetched']}/{len(instruments)} instruments fetched")
+
+            # Rate limiting: wait between batches
+            if i + batch_size < len(instruments):
+                await asyncio.sleep(0.5)
+
+        # Write snapshot to database
+        if quotes:
+            await self.writer.write_quotes(quotes)
+            stats['quotes_populated'] = len(quotes)
+
+        if depth_snapshots and self.save_full_depth:
+            depth_snapshots, ladder_hashes, stats['depth_unchanged'] = drop_unchanged_depth(
+                depth_snapshots, self._ladder_hashes
+            )
+            if depth_snapshots:
+                await self.writer.write_depth_snapshots(depth_snapshots)
+                stats['depth_snapshots'] = len(depth_snapshots)
+            self._ladder_hashes.update(ladder_hashes)
+
+        # Only advance after the writes succeed, so a failed write is retried
+        if since_ts is not None:
+            since_ts.update(book_ts)
 
         logger.info(
             f"✅ Snapshot complete: {stats['instruments_fetched']} instruments fetched, "
             f"{stats['quotes_populated']} quotes populated, "
             f"{stats['instruments_with_data']} with data, "
             f"{stats['instruments_without_data']} without data, "
+            f"{stats['instruments_unchanged']} unchanged, "
+            f"{stats['depth_unchanged']} unchanged depth skipped, "
             f"{stats['errors']} errors"
         )
 
-        # Close database connection
-        await self.writer.close()
-
         return stats
 
-    async def _fetch_orderbook(self, session: aiohttp.ClientSession, instrument: str):
+    async def _fetch_orderbook(
+        self,
+        session: aiohttp.ClientSession,
+        instrument: str,
+        since_ts: Optional[int] = None
+    ):
         """
         Fetch orderbook for a single instrument via REST API.
 
         Args:
             session: aiohttp session
             instrument: Instrument name (e.g., 'ETH-10NOV25-3200-C')
+            since_ts: Book timestamp (epoch ms) of the last snapshot written, if any
 
         Returns:
-            Tuple of (quote_dict, depth_dict) ready for database insertion, or None if no data
+            Tuple of (quote_dict, depth_dict, timestamp_ms) ready for database insertion,
+            _UNCHANGED if the book is not newer than since_ts, or None if no data
             - quote_dict: Best bid/ask for eth_option_quotes table
             - depth_dict: Full orderbook depth for eth_option_orderbook_depth table
+            - timestamp_ms: Book timestamp reported by Deribit
         """
         try:
             url = f"{self.rest_api_url}/public/get_order_book"
@@ -174,6 +286,11 @@ class OrderbookSnapshotFetcher:
 
                 result = data['result']
 
+                # Same book as the last snapshot written: skip building rows
+                timestamp_ms = result['timestamp']
+                if since_ts is not None and timestamp_ms <= since_ts:
+                    return _UNCHANGED
+
                 # Check if we have bid/ask data
                 bids = result.get('bids', [])
                 asks = result.get('asks', [])
@@ -194,8 +311,9 @@ class OrderbookSnapshotFetcher:
                     return None
 
                 # Build quote dictionary (for eth_option_quotes table)
+                timestamp = datetime.fromtimestamp(timestamp_ms / 1000)
                 quote = {
-                    'timestamp': datetime.fromtimestamp(result['timestamp'] / 1000),
+                    'timestamp': timestamp,
                     'instrument_name': result['instrument_name'],
                     'best_bid_price': best_bid_price,
                     'best_bid_amount': best_bid_amount,
@@ -208,15 +326,15 @@ class OrderbookSnapshotFetcher:
                 # Build depth dictionary (for eth_option_orderbook_depth table)
                 depth = None
                 if self.save_full_depth:
-                    # Convert Deribit format [[price, amount], ...] to JSONB format
-                    bids_json = [{"price": float(bid[0]), "amount": float(bid[1])} for bid in bids] if bids else []
-                    asks_json = [{"price": float(ask[0]), "amount": float(ask[1])} for ask in asks] if asks else []
-
+                    # Split Deribit's [[price, amount], ...] levels into
+                    # parallel price/size arrays (best level first)
                     depth = {
-                        'timestamp': datetime.fromtimestamp(result['timestamp'] / 1000),
+                        'timestamp': timestamp,
                         'instrument': result['instrument_name'],
-                        'bids': bids_json,
-                        'asks': asks_json,
+                        'bid_prices': [float(bid[0]) for bid in bids],
+                        'bid_sizes': [float(bid[1]) for bid in bids],
+                        'ask_prices': [float(ask[0]) for ask in asks],
+                        'ask_sizes': [float(ask[1]) for ask in asks],
                         'mark_price': mark_price,
                         'underlying_price': underlying_price,
                         'open_interest': result.get('open_interest'),
@@ -228,7 +346,7 @@ class OrderbookSnapshotFetcher:
                     f"mark={mark_price}, depth_levels={len(bids)}/{len(asks)}"
                 )
 
-                return (quote, depth)
+                return (quote, depth, timestamp_ms)
 
         except Exception as e:
             logger.error(f"Exception fetching {instrument}: {e}", exc_info=True)
@@ -253,7 +371,10 @@ async def main():
 
     # Fetch and populate
     snapshot_fetcher = OrderbookSnapshotFetcher(DATABASE_URL)
-    stats = await snapshot_fetcher.fetch_and_populate(instruments)
+    try:
+        stats = await snapshot_fetcher.fetch_and_populate(instruments)
+    finally:
+        await snapshot_fetcher.close()
 
     print(f"\n✅ Complete!")
     print(f"   Instruments fetched: {stats['instruments_fetched']}")
@@ -15,24 +15,41 @@ Safety Requirements:
 Usage:
     buffer = TickBuffer(max_quotes=200000, max_trades=100000)
     buffer.add_quote(quote_data)
-    quotes, trades = buffer.get_and_clear()  # Atomic operation
+    quotes, trades, depth = buffer.get_and_clear()  # Atomic operation
+
+    # Struct-of-arrays variant for the hot WebSocket path (no dict per tick)
+    buffer = ColumnarTickBuffer(max_quotes=200000, max_trades=100000)
+    ids = buffer.register_instruments(instrument_names)
+    buffer.add_quote(ts_ms, ids[0], bid, bid_amt, ask, ask_amt, underlying, mark)
+    quote_cols, trade_cols, depth_cols = buffer.get_and_clear()
 """
 
+import asyncio
 import logging
+import math
+import sys
 import threading
+from array import array
 from collections import deque
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Sequence, Tuple, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+NAN = float('nan')  # Stands in for a missing value in float columns
+
+# Trade directions are stored as 1-byte codes (index into DIRECTIONS)
+DIRECTIONS = ('buy', 'sell')
+_DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
 
 @dataclass
 class BufferStats:
     """Statistics for buffer monitoring."""
     ticks_received: int = 0
     ticks_written: int = 0
+    ticks_dropped: int = 0
     flushes_triggered: int = 0
     last_flush_time: Optional[datetime] = None
     peak_utilization_pct: float = 0.0
@@ -63,7 +80,8 @@ class TickBuffer:
         max_quotes: int = 200000,
         max_trades: int = 100000,
         max_depth: int = 50000,
-        flush_threshold_pct: float = 80.0
+        flush_threshold_pct: float = 80.0,
+        flush_event: Optional[asyncio.Event] = None
     ):
         """
         Initialize tick buffers.
@@ -73,11 +91,15 @@ class TickBuffer:
             max_trades: Maximum number of trade ticks to buffer
             max_depth: Maximum number of depth snapshots to buffer
             flush_threshold_pct: Trigger flush warning at this % capacity (default: 80%)
+            flush_event: Optional event set whenever a buffer reaches the flush
+                         threshold, so the owner's flush loop can wake early
+                         (must belong to the loop that calls add_*)
         """
         self.max_quotes = max_quotes
         self.max_trades = max_trades
         self.max_depth = max_depth
         self.flush_threshold_pct = flush_threshold_pct
+        self.flush_event = flush_event
 
         # Thread-safe buffers (deque is NOT thread-safe for append/pop simultaneously)
         self._quotes: deque = deque(maxlen=max_quotes)
@@ -117,6 +139,7 @@ class TickBuffer:
             # Check if buffer is approaching capacity
             utilization = self.get_quote_utilization()
             if utilization >= self.flush_threshold_pct:
+                self._request_flush()
                 self._warn_buffer_full('quotes', utilization)
 
     def add_trade(self, trade: Dict):
@@ -135,6 +158,7 @@ class TickBuffer:
             # Check if buffer is approaching capacity
             utilization = self.get_trade_utilization()
             if utilization >= self.flush_threshold_pct:
+                self._request_flush()
                 self._warn_buffer_full('trades', utilization)
 
     def add_depth(self, depth: Dict):
@@ -142,7 +166,7 @@ class TickBuffer:
         Add a full orderbook depth snapshot to the buffer.
 
         Args:
-            depth: Depth snapshot data (timestamp, instrument, bids[], asks[], etc.)
+            depth: Depth snapshot data (timestamp, instrument, bid/ask price and size arrays, etc.)
 
         Thread-safe: Yes
         """
@@ -153,6 +177,7 @@ class TickBuffer:
             # Check if buffer is approaching capacity
             utilization = self.get_depth_utilization()
             if utilization >= self.flush_threshold_pct:
+                self._request_flush()
                 self._warn_buffer_full('depth', utilization)
 
     def get_and_clear(self) -> Tuple[List[Dict], List[Dict], List[Dict]]:
@@ -233,6 +258,7 @@ class TickBuffer:
                     'utilization_pct': self.get_quote_utilization(),
                     'total_received': self.quote_stats.ticks_received,
                     'total_written': self.quote_stats.ticks_written,
+                    'total_dropped': self.quote_stats.ticks_dropped,
                     'total_flushes': self.quote_stats.flushes_triggered,
                     'peak_utilization_pct': self.quote_stats.peak_utilization_pct,
                     'last_flush': self.quote_stats.last_flush_time.isoformat() if self.quote_stats.last_flush_time else None
@@ -243,6 +269,7 @@ class TickBuffer:
                     'utilization_pct': self.get_trade_utilization(),
                     'total_received': self.trade_stats.ticks_received,
                     'total_written': self.trade_stats.ticks_written,
+                    'total_dropped': self.trade_stats.ticks_dropped,
                     'total_flushes': self.trade_stats.flushes_triggered,
                     'peak_utilization_pct': self.trade_stats.peak_utilization_pct,
                     'last_flush': self.trade_stats.last_flush_time.isoformat() if self.trade_stats.last_flush_time else None
@@ -253,6 +280,7 @@ class TickBuffer:
                     'utilization_pct': self.get_depth_utilization(),
                     'total_received': self.depth_stats.ticks_received,
                     'total_written': self.depth_stats.ticks_written,
+                    'total_dropped': self.depth_stats.ticks_dropped,
                     'total_flushes': self.depth_stats.flushes_triggered,
                     'peak_utilization_pct': self.depth_stats.peak_utilization_pct,
                     'last_flush': self.depth_stats.last_flush_time.isoformat() if self.depth_stats.last_flush_time else None
@@ -272,6 +300,11 @@ class TickBuffer:
             self.get_depth_utilization() >= self.flush_threshold_pct
         )
 
+    def _request_flush(self):
+        """Wake the owner's flush loop (no-op without a flush_event)."""
+        if self.flush_event is not None:
+            self.flush_event.set()
+
     def _warn_buffer_full(self, buffer_type: str, utilization: float):
         """
         Log warning when buffer is approaching capacity.
@@ -320,6 +353,479 @@ class TickBuffer:
                 )
 
 
+class QuoteColumns:
+    """
+    Struct-of-arrays storage for quote ticks.
+
+    One preallocated, fixed-capacity array per field plus a count cursor:
+    appending is an indexed store and clear() just rewinds the cursor, so
+    the arrays are allocated once and reused. Timestamps are raw epoch
+    milliseconds, instruments are interned ids (see
+    ColumnarTickBuffer.register_instruments) and missing prices are NaN.
+    """
+
+    __slots__ = (
+        'count', 'timestamp_ms', 'instrument_id', 'best_bid_price', 'best_bid_amount',
+        'best_ask_price', 'best_ask_amount', 'underlying_price', 'mark_price'
+    )
+    COLUMNS = __slots__[1:]
+
+    def __init__(self, capacity: int):
+        self.count = 0
+        self.timestamp_ms = array('q', bytes(8 * capacity))
+        self.instrument_id = array('I', bytes(4 * capacity))
+        self.best_bid_price = array('d', bytes(8 * capacity))
+        self.best_bid_amount = array('d', bytes(8 * capacity))
+        self.best_ask_price = array('d', bytes(8 * capacity))
+        self.best_ask_amount = array('d', bytes(8 * capacity))
+        self.underlying_price = array('d', bytes(8 * capacity))
+        self.mark_price = array('d', bytes(8 * capacity))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+
+class TradeColumns:
+    """
+    Struct-of-arrays storage for trade ticks (same layout as QuoteColumns).
+
+    direction is a code into DIRECTIONS; trade_id is a string, so it lives
+    in a preallocated list.
+    """
+
+    __slots__ = (
+        'count', 'timestamp_ms', 'instrument_id', 'trade_id', 'price', 'amount',
+        'direction', 'iv', 'index_price'
+    )
+    COLUMNS = __slots__[1:]
+
+    def __init__(self, capacity: int):
+        self.count = 0
+        self.timestamp_ms = array('q', bytes(8 * capacity))
+        self.instrument_id = array('I', bytes(4 * capacity))
+        self.trade_id: List[Optional[str]] = [None] * capacity
+        self.price = array('d', bytes(8 * capacity))
+        self.amount = array('d', bytes(8 * capacity))
+        self.direction = array('b', bytes(capacity))
+        self.iv = array('d', bytes(8 * capacity))
+        self.index_price = array('d', bytes(8 * capacity))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+
+class GreeksQuoteColumns:
+    """
+    Struct-of-arrays storage for ticker-channel quotes (Level 1 + Greeks/IV).
+
+    Same layout as QuoteColumns with the extra ticker fields; every column
+    after instrument_id is a float in VALUE_COLUMNS order, also reachable as
+    the value_arrays tuple for positional stores.
+    """
+
+    VALUE_COLUMNS = (
+        'best_bid_price', 'best_bid_amount', 'best_ask_price', 'best_ask_amount',
+        'underlying_price', 'mark_price', 'delta', 'gamma', 'theta', 'vega', 'rho',
+        'bid_iv', 'ask_iv', 'mark_iv', 'open_interest', 'last_price'
+    )
+    __slots__ = ('count', 'value_arrays', 'timestamp_ms', 'instrument_id') + VALUE_COLUMNS
+    COLUMNS = ('timestamp_ms', 'instrument_id') + VALUE_COLUMNS
+
+    def __init__(self, capacity: int):
+        self.count = 0
+        self.timestamp_ms = array('q', bytes(8 * capacity))
+        self.instrument_id = array('I', bytes(4 * capacity))
+        for name in self.VALUE_COLUMNS:
+            setattr(self, name, array('d', bytes(8 * capacity)))
+        self.value_arrays = tuple(getattr(self, name) for name in self.VALUE_COLUMNS)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+
+class DepthColumns:
+    """
+    Struct-of-arrays storage for orderbook depth snapshots.
+
+    Scalar fields use the QuoteColumns layout; each level column holds one
+    price or size sequence per snapshot (variable length, best level
+    first) in a preallocated list, ready to bind as a float8[] value.
+    """
+
+    __slots__ = (
+        'count', 'timestamp_ms', 'instrument_id', 'bid_prices', 'bid_sizes', 'ask_prices',
+        'ask_sizes', 'mark_price', 'underlying_price', 'open_interest', 'volume_24h'
+    )
+    COLUMNS = __slots__[1:]
+
+    def __init__(self, capacity: int):
+        self.count = 0
+        self.timestamp_ms = array('q', bytes(8 * capacity))
+        self.instrument_id = array('I', bytes(4 * capacity))
+        self.bid_prices: List[Optional[Sequence[float]]] = [None] * capacity
+        self.bid_sizes: List[Optional[Sequence[float]]] = [None] * capacity
+        self.ask_prices: List[Optional[Sequence[float]]] = [None] * capacity
+        self.ask_sizes: List[Optional[Sequence[float]]] = [None] * capacity
+        self.mark_price = array('d', bytes(8 * capacity))
+        self.underlying_price = array('d', bytes(8 * capacity))
+        self.open_interest = array('d', bytes(8 * capacity))
+        self.volume_24h = array('d', bytes(8 * capacity))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+
+def _column_views(columns, names: List[str]) -> Dict:
+    """
+    Expose the filled part of a QuoteColumns/TradeColumns/DepthColumns as a column dict.
+
+    Arrays are returned as zero-copy memoryview slices; instrument ids are
+    resolved to names under the 'instrument_name' key and direction codes
+    back to 'buy'/'sell' (via map(), so each lookup runs in C and every row
+    references the one interned name string).
+    """
+    n = columns.count
+    views = {}
+    for name in columns.COLUMNS:
+        col = getattr(columns, name)
+        if name == 'instrument_id':
+            views['instrument_name'] = list(map(names.__getitem__, memoryview(col)[:n]))
+        elif name == 'direction':
+            views[name] = list(map(DIRECTIONS.__getitem__, memoryview(col)[:n]))
+        elif isinstance(col, array):
+            views[name] = memoryview(col)[:n]
+        else:
+            views[name] = col[:n]
+    return views
+
+
+class ColumnarTickBuffer(TickBuffer):
+    """
+    TickBuffer variant that stores quotes, trades and depth column-wise.
+
+    add_quote()/add_trade()/add_depth() take positional values straight
+    from the WebSocket payload, so the hot path does a handful of indexed
+    array stores instead of building a dict and a datetime per tick.
+
+    All three are double-buffered (ping-pong): get_and_clear()
+    swaps the active and standby column sets and hands out views of the
+    filled one, so a flush neither copies nor allocates. The views stay
+    valid until the next get_and_clear() call, which reuses that set.
+
+    Unlike the deque-backed TickBuffer, a full buffer drops the *new* tick
+    (counted in ticks_dropped) rather than silently evicting the oldest.
+
+    n_quotes/n_trades/n_depth hold the current fill counts for cheap polling.
+
+    Not thread-safe: the columnar methods skip the lock, since producers
+    and the flusher all run on one asyncio event loop (the collectors'
+    case). Use TickBuffer when ticks arrive from other threads.
+    """
+
+    quote_columns_class = QuoteColumns
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._quotes = self.quote_columns_class(self.max_quotes)
+        self._trades = TradeColumns(self.max_trades)
+        self._quotes_standby = self.quote_columns_class(self.max_quotes)
+        self._trades_standby = TradeColumns(self.max_trades)
+        self._depth = DepthColumns(self.max_depth)
+        self._depth_standby = DepthColumns(self.max_depth)
+
+        # Fill counts and flush high-water marks as plain ints, so the
+        # per-tick check and the owner's flush loop skip method calls
+        self.n_quotes = 0
+        self.n_trades = 0
+        self.n_depth = 0
+        self.hi_quotes = math.ceil(self.max_quotes * self.flush_threshold_pct / 100)
+        self.hi_trades = math.ceil(self.max_trades * self.flush_threshold_pct / 100)
+        self.hi_depth = math.ceil(self.max_depth * self.flush_threshold_pct / 100)
+
+        # Interned instrument names: id -> name and name -> id
+        self._instrument_names: List[str] = []
+        self._instrument_ids: Dict[str, int] = {}
+
+    def register_instruments(self, instrument_names: Iterable[str]) -> List[int]:
+        """
+        Assign ids to instrument names (call at subscribe time).
+
+        Ids are append-only, so ticks already buffered under an earlier
+        subscription keep resolving to the right name.
+
+        Args:
+            instrument_names: Instruments about to be subscribed
+
+        Returns:
+            The id of each instrument, in input order (pass to add_quote/add_trade/add_depth)
+        """
+        return [self._intern(name) for name in instrument_names]
+
+    def _intern(self, name: str) -> int:
+        """Return the id for an instrument name, assigning one if new."""
+        instrument_id = self._instrument_ids.get(name)
+        if instrument_id is None:
+            # Interned: the buffer, the writer's records and the collectors'
+            # instrument lists all share one string per instrument
+            name = sys.intern(name)
+            instrument_id = len(self._instrument_names)
+            self._instrument_names.append(name)
+            self._instrument_ids[name] = instrument_id
+        return instrument_id
+
+    def add_quote(
+        self,
+        timestamp_ms: int,
+        instrument_id: int,
+        best_bid_price: Optional[float],
+        best_bid_amount: Optional[float],
+        best_ask_price: Optional[float],
+        best_ask_amount: Optional[float],
+        underlying_price: Optional[float],
+        mark_price: Optional[float]
+    ):
+        """
+        Add a quote tick to the buffer (None prices are stored as NaN).
+
+        instrument_id must come from register_instruments().
+
+        Thread-safe: No (see class docstring)
+        """
+        q = self._quotes
+        n = q.count
+        if n >= self.max_quotes:
+            self.quote_stats.ticks_dropped += 1
+            self._request_flush()
+            self._warn_buffer_full('quotes', 100.0)
+            return
+
+        q.timestamp_ms[n] = timestamp_ms
+        q.instrument_id[n] = instrument_id
+        q.best_bid_price[n] = NAN if best_bid_price is None else best_bid_price
+        q.best_bid_amount[n] = NAN if best_bid_amount is None else best_bid_amount
+        q.best_ask_price[n] = NAN if best_ask_price is None else best_ask_price
+        q.best_ask_amount[n] = NAN if best_ask_amount is None else best_ask_amount
+        q.underlying_price[n] = NAN if underlying_price is None else underlying_price
+        q.mark_price[n] = NAN if mark_price is None else mark_price
+        q.count = self.n_quotes = n + 1
+        self.quote_stats.ticks_received += 1
+
+        if n + 1 >= self.hi_quotes:
+            self._request_flush()
+            self._warn_buffer_full('quotes', self.get_quote_utilization())
+
+    def add_trade(
+        self,
+        timestamp_ms: int,
+        instrument_id: int,
+        trade_id: str,
+        price: float,
+        amount: float,
+        direction: str,
+        iv: Optional[float],
+        index_price: Optional[float]
+    ):
+        """
+        Add a trade tick to the buffer (None iv/index_price stored as NaN).
+
+        instrument_id must come from register_instruments(); direction must
+        be one of DIRECTIONS (KeyError otherwise, and nothing is buffered).
+
+        Thread-safe: No (see class docstring)
+        """
+        t = self._trades
+        n = t.count
+        if n >= self.max_trades:
+            self.trade_stats.ticks_dropped += 1
+            self._request_flush()
+            self._warn_buffer_full('trades', 100.0)
+            return
+
+        t.timestamp_ms[n] = timestamp_ms
+        t.instrument_id[n] = instrument_id
+        t.trade_id[n] = trade_id
+        t.price[n] = price
+        t.amount[n] = amount
+        t.direction[n] = _DIRECTION_CODES[direction]
+        t.iv[n] = NAN if iv is None else iv
+        t.index_price[n] = NAN if index_price is None else index_price
+        t.count = self.n_trades = n + 1
+        self.trade_stats.ticks_received += 1
+
+        if n + 1 >= self.hi_trades:
+            self._request_flush()
+            self._warn_buffer_full('trades', self.get_trade_utilization())
+
+    def add_depth(
+        self,
+        timestamp_ms: int,
+        instrument_id: int,
+        bid_prices: Sequence[float],
+        bid_sizes: Sequence[float],
+        ask_prices: Sequence[float],
+        ask_sizes: Sequence[float],
+        mark_price: Optional[float],
+        underlying_price: Optional[float],
+        open_interest: Optional[float],
+        volume_24h: Optional[float]
+    ):
+        """
+        Add a depth snapshot to the buffer (None scalars are stored as NaN).
+
+        instrument_id must come from register_instruments(). The level
+        sequences are stored by reference, not copied.
+
+        Thread-safe: No (see class docstring)
+        """
+        d = self._depth
+        n = d.count
+        if n >= self.max_depth:
+            self.depth_stats.ticks_dropped += 1
+            self._request_flush()
+            self._warn_buffer_full('depth', 100.0)
+            return
+
+        d.timestamp_ms[n] = timestamp_ms
+        d.instrument_id[n] = instrument_id
+        d.bid_prices[n] = bid_prices
+        d.bid_sizes[n] = bid_sizes
+        d.ask_prices[n] = ask_prices
+        d.ask_sizes[n] = ask_sizes
+        d.mark_price[n] = NAN if mark_price is None else mark_price
+        d.underlying_price[n] = NAN if underlying_price is None else underlying_price
+        d.open_interest[n] = NAN if open_interest is None else open_interest
+        d.volume_24h[n] = NAN if volume_24h is None else volume_24h
+        d.count = self.n_depth = n + 1
+        self.depth_stats.ticks_received += 1
+
+        if n + 1 >= self.hi_depth:
+            self._request_flush()
+            self._warn_buffer_full('depth', self.get_depth_utilization())
+
+    def get_and_clear(self) -> Tuple[Dict, Dict, Dict]:
+        """
+        Get all buffered ticks and clear buffers (atomic operation).
+
+        Swaps the active and standby column sets (O(1), no copy) and returns
+        views of the filled set. Instrument ids are resolved back to names;
+        timestamps stay epoch milliseconds and missing floats stay NaN (the
+        writer converts both).
+
+        Returns:
+            Tuple of (quote_columns, trade_columns, depth_columns), where the
+            column dicts map field name -> sequence ('instrument_name'
+            replaces 'instrument_id'). Consume them before calling
+            get_and_clear() again.
+
+        Thread-safe: No (see class docstring)
+        """
+        quotes = self._quotes
+        self._quotes_standby.clear()
+        self._quotes, self._quotes_standby = self._quotes_standby, quotes
+
+        trades = self._trades
+        self._trades_standby.clear()
+        self._trades, self._trades_standby = self._trades_standby, trades
+
+        depth = self._depth
+        self._depth_standby.clear()
+        self._depth, self._depth_standby = self._depth_standby, depth
+        self.n_quotes = self.n_trades = self.n_depth = 0
+
+        names = self._instrument_names
+
+        quote_utilization = len(quotes) / self.max_quotes * 100 if self.max_quotes > 0 else 0
+        trade_utilization = len(trades) / self.max_trades * 100 if self.max_trades > 0 else 0
+        depth_utilization = len(depth) / self.max_depth * 100 if self.max_depth > 0 else 0
+
+        self.quote_stats.record_flush(len(quotes), quote_utilization)
+        self.trade_stats.record_flush(len(trades), trade_utilization)
+        self.depth_stats.record_flush(len(depth), depth_utilization)
+
+        quote_cols = _column_views(quotes, names)
+        trade_cols = _column_views(trades, names)
+        depth_cols = _column_views(depth, names)
+
+        logger.debug(
+            f"Buffer flushed: {len(quotes)} quotes ({quote_utilization:.1f}% full), "
+            f"{len(trades)} trades ({trade_utilization:.1f}% full), "
+            f"{len(depth)} depth ({depth_utilization:.1f}% full)"
+        )
+
+        return quote_cols, trade_cols, depth_cols
+
+    def clear_all(self):
+        """Clear both column sets and the fill counts without recording stats (for emergency shutdown)."""
+        quotes_lost = self.n_quotes
+        trades_lost = self.n_trades
+        depth_lost = self.n_depth
+
+        for columns in (self._quotes, self._quotes_standby, self._trades,
+                        self._trades_standby, self._depth, self._depth_standby):
+            columns.clear()
+        self.n_quotes = self.n_trades = self.n_depth = 0
+
+        if quotes_lost > 0 or trades_lost > 0 or depth_lost > 0:
+            logger.warning(
+                f"Emergency buffer clear: {quotes_lost} quotes, {trades_lost} trades, "
+                f"{depth_lost} depth snapshots discarded"
+            )
+
+
+class GreeksColumnarTickBuffer(ColumnarTickBuffer):
+    """
+    ColumnarTickBuffer for ticker-channel quotes (Level 1 plus Greeks/IV).
+
+    Quotes are stored in GreeksQuoteColumns; add_quote() takes the value
+    fields as one sequence in GreeksQuoteColumns.VALUE_COLUMNS order.
+    Trades and depth behave as in ColumnarTickBuffer.
+    """
+
+    quote_columns_class = GreeksQuoteColumns
+
+    def add_quote(self, timestamp_ms: int, instrument_id: int, values: Sequence[Optional[float]]):
+        """
+        Add a ticker quote to the buffer (None values are stored as NaN).
+
+        Args:
+            timestamp_ms: Exchange timestamp (epoch ms)
+            instrument_id: Id from register_instruments()
+            values: One value per GreeksQuoteColumns.VALUE_COLUMNS entry
+
+        Thread-safe: No (see class docstring)
+        """
+        q = self._quotes
+        n = q.count
+        if n >= self.max_quotes:
+            self.quote_stats.ticks_dropped += 1
+            self._request_flush()
+            self._warn_buffer_full('quotes', 100.0)
+            return
+
+        q.timestamp_ms[n] = timestamp_ms
+        q.instrument_id[n] = instrument_id
+        for column, value in zip(q.value_arrays, values):
+            column[n] = NAN if value is None else value
+        q.count = self.n_quotes = n + 1
+        self.quote_stats.ticks_received += 1
+
+        if n + 1 >= self.hi_quotes:
+            self._request_flush()
+            self._warn_buffer_full('quotes', self.get_quote_utilization())
+
+
 # Example usage and testing
 def test_buffer():
     """Test tick buffer functionality."""
@@ -0,0 +1,176 @@
+"""
+Tick Records - Record builders shared by the option tick writers
+
+TickWriter (ETH) and MultiCurrencyTickWriter (per currency) write the same
+quote/trade/depth table layouts, so the column orders and the conversions
+from tick dicts and ColumnarTickBuffer columns to INSERT/COPY records live
+here once. dedupe_quote_records is also used by PerpetualTickWriter.
+
+Usage:
+    from scripts.tick_records import TRADE_COLUMNS, trade_records_from_columns
+
+    records = trade_records_from_columns(trade_cols)
+    await conn.copy_records_to_table(table, records=records, columns=TRADE_COLUMNS)
+"""
+
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Sequence
+
+# Column order of the records built below (and of the COPY streams)
+QUOTE_COLUMNS = (
+    'timestamp', 'instrument', 'best_bid_price', 'best_bid_amount', 'best_ask_price', 'best_ask_amount',
+    'underlying_price', 'mark_price', 'delta', 'gamma', 'theta', 'vega', 'rho',
+    'implied_volatility', 'bid_iv', 'ask_iv', 'mark_iv', 'open_interest', 'last_price'
+)
+TRADE_COLUMNS = ('timestamp', 'instrument', 'trade_id', 'price', 'amount', 'direction', 'iv', 'index_price')
+DEPTH_COLUMNS = (
+    'timestamp', 'instrument', 'bid_prices', 'bid_sizes', 'ask_prices', 'ask_sizes',
+    'mark_price', 'underlying_price', 'open_interest', 'volume_24h'
+)
+
+
+def quote_record(quote: Dict) -> tuple:
+    """Convert a quote dict into a quotes-table record (QUOTE_COLUMNS order)."""
+    return (
+        quote['timestamp'],
+        quote['instrument_name'],
+        quote.get('best_bid_price'),
+        quote.get('best_bid_amount'),
+        quote.get('best_ask_price'),
+        quote.get('best_ask_amount'),
+        quote.get('underlying_price'),
+        quote.get('mark_price'),
+        quote.get('delta'),
+        quote.get('gamma'),
+        quote.get('theta'),
+        quote.get('vega'),
+        quote.get('rho'),
+        quote.get('implied_volatility'),
+        quote.get('bid_iv'),
+        quote.get('ask_iv'),
+        quote.get('mark_iv'),
+        quote.get('open_interest'),
+        quote.get('last_price')
+    )
+
+
+def trade_record(trade: Dict) -> tuple:
+    """Convert a trade dict into a trades-table record (TRADE_COLUMNS order)."""
+    return (
+        trade['timestamp'],
+        trade['instrument_name'],
+        trade['trade_id'],
+        trade['price'],
+        trade['amount'],
+        trade['direction'],
+        trade.get('iv'),
+        trade.get('index_price')
+    )
+
+
+def depth_record(depth: Dict) -> tuple:
+    """Convert a depth snapshot dict into a depth-table record (DEPTH_COLUMNS order)."""
+    return (
+        depth['timestamp'],
+        depth['instrument'],
+        depth.get('bid_prices', []),
+        depth.get('bid_sizes', []),
+        depth.get('ask_prices', []),
+        depth.get('ask_sizes', []),
+        depth.get('mark_price'),
+        depth.get('underlying_price'),
+        depth.get('open_interest'),
+        depth.get('volume_24h')
+    )
+
+
+def dedupe_quote_records(records: List[tuple]) -> List[tuple]:
+    """
+    Collapse quotes sharing (timestamp, instrument) into one record.
+
+    Records must lead with (timestamp, instrument). Later values win, but a
+    NULL never overwrites an earlier value - the same result the COALESCE
+    upserts produce when duplicates hit the server.
+    """
+    merged: Dict[tuple, tuple] = {}
+    for record in records:
+        key = (record[0], record[1])
+        previous = merged.get(key)
+        if previous is None:
+            merged[key] = record
+        else:
+            merged[key] = tuple(
+                new if new is not None else old
+                for old, new in zip(previous, record)
+            )
+    return list(merged.values())
+
+
+def ms_to_datetimes(timestamps_ms: Sequence[int]) -> List[datetime]:
+    """Convert an epoch-millisecond column to datetimes (once, at flush)."""
+    # Ticks from one notification share a timestamp, so memoise the
+    # conversion per distinct millisecond rather than per row.
+    cache: Dict[int, datetime] = {}
+    out = []
+    append = out.append
+    for ts in timestamps_ms:
+        dt = cache.get(ts)
+        if dt is None:
+            dt = cache[ts] = datetime.fromtimestamp(ts / 1000)
+        append(dt)
+    return out
+
+
+def nan_to_none(values: Sequence[float]) -> List[Optional[float]]:
+    """Map NaN placeholders in a float column back to NULL."""
+    return [None if v != v else v for v in values]
+
+
+def trade_records_from_columns(cols: Mapping[str, Sequence]) -> List[tuple]:
+    """
+    Build trade INSERT records from ColumnarTickBuffer trade columns.
+
+    Args:
+        cols: 'timestamp_ms' (epoch ms), 'instrument_name', 'trade_id',
+              'price', 'amount', 'direction', 'iv', 'index_price'
+              (NaN for missing iv/index_price)
+
+    Returns:
+        Records in TRADE_COLUMNS order
+    """
+    return list(zip(
+        ms_to_datetimes(cols['timestamp_ms']),
+        cols['instrument_name'],
+        cols['trade_id'],
+        cols['price'],
+        cols['amount'],
+        cols['direction'],
+        nan_to_none(cols['iv']),
+        nan_to_none(cols['index_price'])
+    ))
+
+
+def depth_records_from_columns(cols: Mapping[str, Sequence]) -> List[tuple]:
+    """
+    Build depth records from ColumnarTickBuffer depth columns.
+
+    Args:
+        cols: 'timestamp_ms' (epoch ms), 'instrument_name', the four level
+              columns (one sequence per snapshot) and 'mark_price',
+              'underlying_price', 'open_interest', 'volume_24h' (NaN for missing)
+
+    Returns:
+        Records in DEPTH_COLUMNS order
+    """
+    return list(zip(
+        ms_to_datetimes(cols['timestamp_ms']),
+        cols['instrument_name'],
+        cols['bid_prices'],
+        cols['bid_sizes'],
+        cols['ask_prices'],
+        cols['ask_sizes'],
+        nan_to_none(cols['mark_price']),
+        nan_to_none(cols['underlying_price']),
+        nan_to_none(cols['open_interest']),
+        nan_to_none(cols['volume_24h'])
+    ))
@@ -1,14 +1,17 @@
 """
-Tick Writer - Async Database Writer with Batch INSERT
+Tick Writer - Async Database Writer with Batch COPY
 Task: T-001
 Acceptance Criteria: AC-001 (Data completeness)
 
 This module handles batch database writes for quote and trade ticks.
 Uses asyncpg for async PostgreSQL operations and implements retry logic.
+Rows are streamed with binary COPY; quotes and trades go through a
+per-connection temp staging table so ON CONFLICT DO NOTHING still applies.
+Small quote/trade batches use multi-row INSERT ... VALUES statements instead.
 
 Safety Requirements:
 - Connection pooling (max 5 connections)
-- Batch INSERT (10k rows per transaction)
+- Batch COPY (10k rows per transaction)
 - Retry logic (3 attempts with exponential backoff)
 - Connection cleanup on shutdown
 - Performance logging (rows/second)
@@ -18,18 +21,110 @@ Usage:
     await writer.connect()
     await writer.write_quotes(quote_ticks)
     await writer.write_trades(trade_ticks)
+
+    # Or straight from ColumnarTickBuffer.get_and_clear()
+    await writer.write_quotes_columnar(quote_cols)
+    await writer.write_trades_columnar(trade_cols)
+    await writer.write_depth_columnar(depth_cols)
     await writer.close()
 """
 
 import asyncpg
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Mapping, Optional, Sequence, Tuple
 from datetime import datetime
 import asyncio
-import json
+
+from scripts.tick_records import (
+    DEPTH_COLUMNS,
+    QUOTE_COLUMNS,
+    TRADE_COLUMNS,
+    depth_record,
+    depth_records_from_columns,
+    ms_to_datetimes,
+    nan_to_none,
+    quote_record,
+    trade_record,
+    trade_records_from_columns,
+)
 
 logger = logging.getLogger(__name__)
 
+# Greeks/IV/OI columns the WebSocket book channel doesn't carry
+QUOTE_EXTRA_NULLS = (None,) * 11
+
+
+def _staged_insert_sql(table: str, stage: str, columns, conflict_columns) -> str:
+    """INSERT ... SELECT from a COPY staging table, skipping existing keys."""
+    cols = ', '.join(columns)
+    return (
+        f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} "
+        f"ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+    )
+
+
+# COPY can't express ON CONFLICT, so quotes/trades are COPYed into a temp
+# table (kept per pooled connection, emptied on commit) and merged from there
+QUOTES_STAGE_DDL = (
+    "CREATE TEMP TABLE IF NOT EXISTS eth_option_quotes_stage "
+    "(LIKE eth_option_quotes) ON COMMIT DELETE ROWS"
+)
+QUOTES_MERGE_SQL = _staged_insert_sql(
+    'eth_option_quotes', 'eth_option_quotes_stage', QUOTE_COLUMNS, ('timestamp', 'instrument')
+)
+TRADES_STAGE_DDL = (
+    "CREATE TEMP TABLE IF NOT EXISTS eth_option_trades_stage "
+    "(LIKE eth_option_trades) ON COMMIT DELETE ROWS"
+)
+TRADES_MERGE_SQL = _staged_insert_sql(
+    'eth_option_trades', 'eth_option_trades_stage', TRADE_COLUMNS, ('timestamp', 'instrument', 'trade_id')
+)
+
+# Below this many rows the staging path (DDL + COPY + merge = 3 round trips)
+# costs more than multi-row INSERT ... VALUES (...), (...) statements
+COPY_MIN_ROWS = 1000
+
+# Rows per multi-row INSERT. Chunks are power-of-two sized so only a handful
+# of distinct statements exist per table (asyncpg caches each one prepared
+# per connection); 256 x 19 quote params stays far below PG's 65535 limit
+MULTIROW_MAX_ROWS = 256
+
+
+def _multirow_chunks(records: List[tuple]):
+    """Split records into power-of-two sized chunks of at most MULTIROW_MAX_ROWS."""
+    i = 0
+    while i < len(records):
+        remaining = len(records) - i
+        size = min(MULTIROW_MAX_ROWS, 1 << (remaining.bit_length() - 1))
+        yield records[i:i + size]
+        i += size
+
+
+def quote_records_from_columns(cols: Mapping[str, Sequence]) -> List[tuple]:
+    """
+    Build quote INSERT records from ColumnarTickBuffer quote columns.
+
+    Args:
+        cols: 'timestamp_ms' (epoch ms), 'instrument_name', and the six
+              price/amount columns with NaN for missing values
+
+    Returns:
+        Records in QUOTE_COLUMNS order
+    """
+    return [
+        row + QUOTE_EXTRA_NULLS
+        for row in zip(
+            ms_to_datetimes(cols['timestamp_ms']),
+            cols['instrument_name'],
+            nan_to_none(cols['best_bid_price']),
+            nan_to_none(cols['best_bid_amount']),
+            nan_to_none(cols['best_ask_price']),
+            nan_to_none(cols['best_ask_amount']),
+            nan_to_none(cols['underlying_price']),
+            nan_to_none(cols['mark_price'])
+        )
+    ]
+
 
 class TickWriter:
     """
@@ -37,7 +132,7 @@ class TickWriter:
 
     Features:
     - Connection pooling (asyncpg)
-    - Batch INSERT statements (10k rows per transaction)
+    - Binary COPY batches (10k rows per transaction)
     - Retry logic with exponential backoff
     - Performance monitoring (rows/second)
     - Graceful connection cleanup
@@ -46,7 +141,7 @@ class TickWriter:
     def __init__(
         self,
         database_url: str,
-        pool_min_size: int = 2,
+        pool_min_size: int = 3,
         pool_max_size: int = 5,
         batch_size: int = 10000
     ):
@@ -55,7 +150,7 @@ class TickWriter:
 
         Args:
             database_url: PostgreSQL connection URL
-            pool_min_size: Minimum number of connections in pool
+            pool_min_size: Minimum number of connections in pool (one per table a flush writes concurrently)
             pool_max_size: Maximum number of connections in pool
             batch_size: Maximum rows per INSERT transaction
         """
@@ -65,6 +160,10 @@ class TickWriter:
         self.batch_size = batch_size
 
         self.pool: Optional[asyncpg.Pool] = None
+
+        # (table, rows) -> multi-row INSERT text
+        self._multirow_sql: Dict[Tuple[str, int], str] = {}
+
         self._write_stats = {
             'quotes_written': 0,
             'trades_written': 0,
@@ -105,6 +204,7 @@ class TickWriter:
         if self.pool:
             logger.info("Closing database connection pool...")
             await self.pool.close()
+            self.pool = None
             logger.info("Database connection pool closed")
 
     async def write_quotes(self, quotes: List[Dict]) -> int:
@@ -123,12 +223,35 @@ class TickWriter:
         if not quotes:
             return 0
 
+        return await self._write_quote_records([quote_record(quote) for quote in quotes])
+
+    async def write_quotes_columnar(self, cols: Mapping[str, Sequence]) -> int:
+        """
+        Write quote ticks given as column arrays (ColumnarTickBuffer output).
+
+        Args:
+            cols: 'timestamp_ms' (epoch ms), 'instrument_name', and the six
+                  price/amount columns with NaN for missing values
+
+        Returns:
+            Number of quotes successfully written
+
+        Raises:
+            Exception: If write fails after max retries
+        """
+        if not cols['timestamp_ms']:
+            return 0
+
+        return await self._write_quote_records(quote_records_from_columns(cols))
+
+    async def _write_quote_records(self, records: List[tuple]) -> int:
+        """Write quote INSERT records in batches and record stats."""
         start_time = datetime.now()
         total_written = 0
 
         # Process in batches
-        for i in range(0, len(quotes), self.batch_size):
-            batch = quotes[i:i + self.batch_size]
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
             written = await self._write_quote_batch(batch)
             total_written += written
 
@@ -163,12 +286,36 @@ class TickWriter:
         if not trades:
             return 0
 
+        return await self._write_trade_records([trade_record(trade) for trade in trades])
+
+    async def write_trades_columnar(self, cols: Mapping[str, Sequence]) -> int:
+        """
+        Write trade ticks given as column arrays (ColumnarTickBuffer output).
+
+        Args:
+            cols: 'timestamp_ms' (epoch ms), 'instrument_name', 'trade_id',
+                  'price', 'amount', 'direction', 'iv', 'index_price'
+                  (NaN for missing iv/index_price)
+
+        Returns:
+            Number of trades successfully written
+
+        Raises:
+            Exception: If write fails after max retries
+        """
+        if not cols['timestamp_ms']:
+            return 0
+
+        return await self._write_trade_records(trade_records_from_columns(cols))
+
+    async def _write_trade_records(self, records: List[tuple]) -> int:
+        """Write trade INSERT records in batches and record stats."""
         start_time = datetime.now()
         total_written = 0
 
         # Process in batches
-        for i in range(0, len(trades), self.batch_size):
-            batch = trades[i:i + self.batch_size]
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
             written = await self._write_trade_batch(batch)
             total_written += written
 
@@ -192,7 +339,10 @@ class TickWriter:
         Write full orderbook depth snapshots to database in batches.
 
         Args:
-            depth_snapshots: List of depth snapshot dictionaries with JSONB bid/ask levels
+            depth_snapshots: List of depth snapshot dictionaries ('timestamp', 'instrument',
+                             float arrays 'bid_prices', 'bid_sizes', 'ask_prices',
+                             'ask_sizes', plus optional 'mark_price', 'underlying_price',
+                             'open_interest', 'volume_24h')
 
         Returns:
             Number of depth snapshots successfully written
@@ -203,12 +353,34 @@ class TickWriter:
         if not depth_snapshots:
             return 0
 
+        return await self._write_depth_records([depth_record(depth) for depth in depth_snapshots])
+
+    async def write_depth_columnar(self, cols: Mapping[str, Sequence]) -> int:
+        """
+        Write depth snapshots given as column arrays (ColumnarTickBuffer output).
+
+        Args:
+            cols: Depth columns as returned by ColumnarTickBuffer.get_and_clear()
+
+        Returns:
+            Number of depth snapshots successfully written
+
+        Raises:
+            Exception: If write fails after max retries
+        """
+        if not cols['timestamp_ms']:
+            return 0
+
+        return await self._write_depth_records(depth_records_from_columns(cols))
+
+    async def _write_depth_records(self, records: List[tuple]) -> int:
+        """Write depth records (DEPTH_COLUMNS order) in batches and update stats."""
         start_time = datetime.now()
         total_written = 0
 
         # Process in batches
-        for i in range(0, len(depth_snapshots), self.batch_size):
-            batch = depth_snapshots[i:i + self.batch_size]
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
             written = await self._write_depth_batch(batch)
             total_written += written
 
@@ -227,12 +399,71 @@ class TickWriter:
 
         return total_written
 
-    async def _write_quote_batch(self, quotes: List[Dict], max_retries: int = 3) -> int:
+    async def write_all(
+        self,
+        quote_records: List[tuple],
+        trade_records: List[tuple],
+        depth_records: List[tuple]
+    ):
+        """
+        Write one flushed batch of quote, trade and depth records.
+
+        Args:
+            quote_records: Records in QUOTE_COLUMNS order (see quote_records_from_columns)
+            trade_records: Records in TRADE_COLUMNS order (see trade_records_from_columns)
+            depth_records: Records in DEPTH_COLUMNS order (see depth_records_from_columns)
+
+        Each table goes out on its own pooled connection concurrently, so
+        the batch costs one round of commit latency instead of three.
+
+        Raises:
+            Exception: The first failure, once every write has finished
+        """
+        writes = []
+        if quote_records:
+            writes.append(self._write_quote_records(quote_records))
+        if trade_records:
+            writes.append(self._write_trade_records(trade_records))
+        if depth_records:
+            writes.append(self._write_depth_records(depth_records))
+
+        # Let the other tables land even if one write fails
+        results = await asyncio.gather(*writes, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    def _get_multirow_sql(self, table: str, columns, conflict_columns, num_rows: int) -> str:
+        """Build (once per table and chunk size) a multi-row INSERT ... ON CONFLICT DO NOTHING."""
+        key = (table, num_rows)
+        sql = self._multirow_sql.get(key)
+
+        if sql is None:
+            width = len(columns)
+            values = ', '.join(
+                '(' + ', '.join(f'${row * width + col + 1}' for col in range(width)) + ')'
+                for row in range(num_rows)
+            )
+            sql = (
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+                f"ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+            )
+            self._multirow_sql[key] = sql
+
+        return sql
+
+    async def _insert_multirow(self, conn, table: str, columns, conflict_columns, records: List[tuple]):
+        """Insert records with one multi-row INSERT per chunk (small batches)."""
+        for chunk in _multirow_chunks(records):
+            sql = self._get_multirow_sql(table, columns, conflict_columns, len(chunk))
+            await conn.execute(sql, *[value for record in chunk for value in record])
+
+    async def _write_quote_batch(self, quotes: List[tuple], max_retries: int = 3) -> int:
         """
         Write a batch of quotes with retry logic.
 
         Args:
-            quotes: Batch of quote dictionaries
+            quotes: Batch of quote INSERT records (see quote_record)
             max_retries: Maximum number of retry attempts
 
         Returns:
@@ -241,42 +472,19 @@ class TickWriter:
         for attempt in range(max_retries):
             try:
                 async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT with Greeks and IV columns
-                    # Schema: timestamp, instrument, bid/ask, underlying, mark, Greeks (delta/gamma/theta/vega/rho), IVs, OI, last_price
-                    await conn.executemany(
-                        """
-                        INSERT INTO eth_option_quotes
-                        (timestamp, instrument, best_bid_price, best_bid_amount, best_ask_price, best_ask_amount,
-                         underlying_price, mark_price, delta, gamma, theta, vega, rho,
-                         implied_volatility, bid_iv, ask_iv, mark_iv, open_interest, last_price)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19)
-                        ON CONFLICT (timestamp, instrument) DO NOTHING
-                        """,
-                        [
-                            (
-                                quote['timestamp'],
-                                quote['instrument_name'],
-                                quote.get('best_bid_price'),
-                                quote.get('best_bid_amount'),
-                                quote.get('best_ask_price'),
-                                quote.get('best_ask_amount'),
-                                quote.get('underlying_price'),
-                                quote.get('mark_price'),
-                                quote.get('delta'),
-                                quote.get('gamma'),
-                                quote.get('theta'),
-                                quote.get('vega'),
-                                quote.get('rho'),
-                                quote.get('implied_volatility'),
-                                quote.get('bid_iv'),
-                                quote.get('ask_iv'),
-                                quote.get('mark_iv'),
-                                quote.get('open_interest'),
-                                quote.get('last_price')
+                    async with conn.transaction():
+                        if len(quotes) < COPY_MIN_ROWS:
+                            await self._insert_multirow(
+                                conn, 'eth_option_quotes', QUOTE_COLUMNS, ('timestamp', 'instrument'), quotes
                             )
-                            for quote in quotes
-                        ]
-                    )
+                        else:
+                            await conn.execute(QUOTES_STAGE_DDL)
+                            await conn.copy_records_to_table(
+                                'eth_option_quotes_stage',
+                                records=quotes,
+                                columns=QUOTE_COLUMNS
+                            )
+                            await conn.execute(QUOTES_MERGE_SQL)
 
                     return len(quotes)
 
@@ -296,12 +504,12 @@ class TickWriter:
 
         return 0
 
-    async def _write_trade_batch(self, trades: List[Dict], max_retries: int = 3) -> int:
+    async def _write_trade_batch(self, trades: List[tuple], max_retries: int = 3) -> int:
         """
         Write a batch of trades with retry logic.
 
         Args:
-            trades: Batch of trade dictionaries
+            trades: Batch of trade INSERT records (see trade_record)
             max_retries: Maximum number of retry attempts
 
         Returns:
@@ -310,29 +518,19 @@ class TickWriter:
         for attempt in range(max_retries):
             try:
                 async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT
-                    # Schema: timestamp, instrument, trade_id, price, amount, direction, iv, index_price
-                    await conn.executemany(
-                        """
-                        INSERT INTO eth_option_trades
-                        (timestamp, instrument, trade_id, price, amount, direction, iv, index_price)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                        ON CONFLICT (timestamp, instrument, trade_id) DO NOTHING
-                        """,
-                        [
-                            (
-                                trade['timestamp'],
-                                trade['instrument_name'],
-                                trade['trade_id'],
-                                trade['price'],
-                                trade['amount'],
-                                trade['direction'],
-                                trade.get('iv'),
-                                trade.get('index_price')
+                    async with conn.transaction():
+                        if len(trades) < COPY_MIN_ROWS:
+                            await self._insert_multirow(
+                                conn, 'eth_option_trades', TRADE_COLUMNS, ('timestamp', 'instrument', 'trade_id'), trades
                             )
-                            for trade in trades
-                        ]
-                    )
+                        else:
+                            await conn.execute(TRADES_STAGE_DDL)
+                            await conn.copy_records_to_table(
+                                'eth_option_trades_stage',
+                                records=trades,
+                                columns=TRADE_COLUMNS
+                            )
+                            await conn.execute(TRADES_MERGE_SQL)
 
                     return len(trades)
 
@@ -352,12 +550,12 @@ class TickWriter:
 
         return 0
 
-    async def _write_depth_batch(self, depth_snapshots: List[Dict], max_retries: int = 3) -> int:
+    async def _write_depth_batch(self, records: List[tuple], max_retries: int = 3) -> int:
         """
         Write a batch of depth snapshots with retry logic.
 
         Args:
-            depth_snapshots: Batch of depth snapshot dictionaries
+            records: Batch of depth records (DEPTH_COLUMNS order)
             max_retries: Maximum number of retry attempts
 
         Returns:
@@ -366,30 +564,14 @@ class TickWriter:
         for attempt in range(max_retries):
             try:
                 async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT
-                    # Schema: timestamp, instrument, bids (JSONB), asks (JSONB), mark_price, underlying_price, open_interest, volume_24h
-                    await conn.executemany(
-                        """
-                        INSERT INTO eth_option_orderbook_depth
-                        (timestamp, instrument, bids, asks, mark_price, underlying_price, open_interest, volume_24h)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                        """,
-                        [
-                            (
-                                depth['timestamp'],
-                                depth['instrument'],
-                                json.dumps(depth.get('bids', [])),  # Convert list to JSONB
-                                json.dumps(depth.get('asks', [])),  # Convert list to JSONB
-                                depth.get('mark_price'),
-                                depth.get('underlying_price'),
-                                depth.get('open_interest'),
-                                depth.get('volume_24h')
-                            )
-                            for depth in depth_snapshots
-                        ]
+                    # No conflict handling on depth: COPY straight into the table
+                    await conn.copy_records_to_table(
+                        'eth_option_orderbook_depth',
+                        records=records,
+                        columns=DEPTH_COLUMNS
                     )
 
-                    return len(depth_snapshots)
+                    return len(records)
 
             except Exception as e:
                 logger.error(f"Depth batch write failed (attempt {attempt + 1}/{max_retries}): {e}")
@@ -402,7 +584,7 @@ class TickWriter:
                 else:
                     # Final attempt failed
                     self._write_stats['failed_writes'] += 1
-                    logger.error(f"Failed to write {len(depth_snapshots)} depth snapshots after {max_retries} attempts")
+                    logger.error(f"Failed to write {len(records)} depth snapshots after {max_retries} attempts")
                     raise
 
         return 0
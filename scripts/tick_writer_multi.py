@@ -7,7 +7,7 @@ multiple currencies. Uses asyncpg for async PostgreSQL operations.
 
 Safety Requirements:
 - Connection pooling (max 5 connections)
-- Batch INSERT (10k rows per transaction)
+- Batch INSERT (10k rows per transaction; binary COPY via a staging table for 1k+ rows)
 - Retry logic (3 attempts with exponential backoff)
 - Connection cleanup on shutdown
 - Performance logging (rows/second)
@@ -25,13 +25,68 @@ Usage:
 
 import asyncpg
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Mapping, Optional, Sequence
 from datetime import datetime
 import asyncio
-import json
+
+from scripts.tick_records import (
+    DEPTH_COLUMNS,
+    QUOTE_COLUMNS,
+    TRADE_COLUMNS,
+    dedupe_quote_records,
+    depth_record,
+    depth_records_from_columns,
+    ms_to_datetimes,
+    nan_to_none,
+    quote_record,
+    trade_record,
+    trade_records_from_columns,
+)
 
 logger = logging.getLogger(__name__)
 
+# Below this many rows the COPY staging path (DDL + COPY + merge = 3 round
+# trips) costs more than a prepared executemany
+COPY_MIN_ROWS = 1000
+
+
+def quote_records_from_columns(cols: Mapping[str, Sequence]) -> List[tuple]:
+    """
+    Build quote INSERT records from GreeksColumnarTickBuffer quote columns.
+
+    implied_volatility is not buffered separately: like the dict path, it
+    takes the mark_iv value.
+
+    Args:
+        cols: 'timestamp_ms' (epoch ms), 'instrument_name', and the
+              GreeksQuoteColumns value columns with NaN for missing values
+
+    Returns:
+        Records in QUOTE_COLUMNS order
+    """
+    mark_iv = nan_to_none(cols['mark_iv'])
+    return list(zip(
+        ms_to_datetimes(cols['timestamp_ms']),
+        cols['instrument_name'],
+        nan_to_none(cols['best_bid_price']),
+        nan_to_none(cols['best_bid_amount']),
+        nan_to_none(cols['best_ask_price']),
+        nan_to_none(cols['best_ask_amount']),
+        nan_to_none(cols['underlying_price']),
+        nan_to_none(cols['mark_price']),
+        nan_to_none(cols['delta']),
+        nan_to_none(cols['gamma']),
+        nan_to_none(cols['theta']),
+        nan_to_none(cols['vega']),
+        nan_to_none(cols['rho']),
+        mark_iv,
+        nan_to_none(cols['bid_iv']),
+        nan_to_none(cols['ask_iv']),
+        mark_iv,
+        nan_to_none(cols['open_interest']),
+        nan_to_none(cols['last_price'])
+    ))
+
 
 class MultiCurrencyTickWriter:
     """
@@ -50,7 +105,7 @@ class MultiCurrencyTickWriter:
         self,
         database_url: str,
         currency: str = "ETH",
-        pool_min_size: int = 2,
+        pool_min_size: int = 3,
         pool_max_size: int = 5,
         batch_size: int = 10000
     ):
@@ -60,7 +115,7 @@ class MultiCurrencyTickWriter:
         Args:
             database_url: PostgreSQL connection URL
             currency: Currency code (BTC, ETH, etc.) for table routing
-            pool_min_size: Minimum number of connections in pool
+            pool_min_size: Minimum number of connections in pool (one per table a flush writes concurrently)
             pool_max_size: Maximum number of connections in pool
             batch_size: Maximum rows per INSERT transaction
         """
@@ -76,6 +131,46 @@ class MultiCurrencyTickWriter:
         self.trades_table = f"{currency_lower}_option_trades"
         self.depth_table = f"{currency_lower}_option_orderbook_depth"
 
+        # Quotes upsert: a NULL field never overwrites a stored value
+        quote_cols = ', '.join(QUOTE_COLUMNS)
+        quote_conflict = "ON CONFLICT (timestamp, instrument) DO UPDATE SET " + ', '.join(
+            f"{col} = COALESCE(EXCLUDED.{col}, {self.quotes_table}.{col})"
+            for col in QUOTE_COLUMNS[2:]
+        )
+        quote_params = ', '.join(f'${i}' for i in range(1, len(QUOTE_COLUMNS) + 1))
+        self._quotes_upsert_sql = (
+            f"INSERT INTO {self.quotes_table} ({quote_cols}) VALUES ({quote_params}) {quote_conflict}"
+        )
+
+        trade_cols = ', '.join(TRADE_COLUMNS)
+        trade_conflict = "ON CONFLICT (timestamp, trade_id, instrument) DO NOTHING"
+        trade_params = ', '.join(f'${i}' for i in range(1, len(TRADE_COLUMNS) + 1))
+        self._trades_insert_sql = (
+            f"INSERT INTO {self.trades_table} ({trade_cols}) VALUES ({trade_params}) {trade_conflict}"
+        )
+
+        # Large batches are COPYed into a temp table (kept per pooled
+        # connection, emptied on commit) and merged with the same conflict
+        # handling, since COPY itself can't express ON CONFLICT
+        self._quotes_stage = f"{self.quotes_table}_stage"
+        self._quotes_stage_ddl = (
+            f"CREATE TEMP TABLE IF NOT EXISTS {self._quotes_stage} "
+            f"(LIKE {self.quotes_table}) ON COMMIT DELETE ROWS"
+        )
+        self._quotes_merge_sql = (
+            f"INSERT INTO {self.quotes_table} ({quote_cols}) "
+            f"SELECT {quote_cols} FROM {self._quotes_stage} {quote_conflict}"
+        )
+        self._trades_stage = f"{self.trades_table}_stage"
+        self._trades_stage_ddl = (
+            f"CREATE TEMP TABLE IF NOT EXISTS {self._trades_stage} "
+            f"(LIKE {self.trades_table}) ON COMMIT DELETE ROWS"
+        )
+        self._trades_merge_sql = (
+            f"INSERT INTO {self.trades_table} ({trade_cols}) "
+            f"SELECT {trade_cols} FROM {self._trades_stage} {trade_conflict}"
+        )
+
         self.pool: Optional[asyncpg.Pool] = None
         self._write_stats = {
             'quotes_written': 0,
@@ -118,6 +213,7 @@ class MultiCurrencyTickWriter:
         if self.pool:
             logger.info("Closing database connection pool...")
             await self.pool.close()
+            self.pool = None
             logger.info("Database connection pool closed")
 
     async def write_quotes(self, quotes: List[Dict]) -> int:
@@ -136,12 +232,35 @@ class MultiCurrencyTickWriter:
         if not quotes:
             return 0
 
+        return await self._write_quote_records([quote_record(quote) for quote in quotes])
+
+    async def write_quotes_columnar(self, cols: Mapping[str, Sequence]) -> int:
+        """
+        Write quote ticks given as column arrays (GreeksColumnarTickBuffer output).
+
+        Args:
+            cols: 'timestamp_ms' (epoch ms), 'instrument_name', and the
+                  GreeksQuoteColumns value columns with NaN for missing values
+
+        Returns:
+            Number of quotes successfully written
+
+        Raises:
+            Exception: If write fails after max retries
+        """
+        if not cols['timestamp_ms']:
+            return 0
+
+        return await self._write_quote_records(quote_records_from_columns(cols))
+
+    async def _write_quote_records(self, records: List[tuple]) -> int:
+        """Write quote records (QUOTE_COLUMNS order) in batches and update stats."""
         start_time = datetime.now()
         total_written = 0
 
         # Process in batches
-        for i in range(0, len(quotes), self.batch_size):
-            batch = quotes[i:i + self.batch_size]
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
             written = await self._write_quote_batch(batch)
             total_written += written
 
@@ -176,12 +295,35 @@ class MultiCurrencyTickWriter:
         if not trades:
             return 0
 
+        return await self._write_trade_records([trade_record(trade) for trade in trades])
+
+    async def write_trades_columnar(self, cols: Mapping[str, Sequence]) -> int:
+        """
+        Write trade ticks given as column arrays (ColumnarTickBuffer output).
+
+        Args:
+            cols: 'timestamp_ms' (epoch ms), 'instrument_name', 'trade_id',
+                  'price', 'amount', 'direction', 'iv', 'index_price'
+
+        Returns:
+            Number of trades successfully written
+
+        Raises:
+            Exception: If write fails after max retries
+        """
+        if not cols['timestamp_ms']:
+            return 0
+
+        return await self._write_trade_records(trade_records_from_columns(cols))
+
+    async def _write_trade_records(self, records: List[tuple]) -> int:
+        """Write trade records (TRADE_COLUMNS order) in batches and update stats."""
         start_time = datetime.now()
         total_written = 0
 
         # Process in batches
-        for i in range(0, len(trades), self.batch_size):
-            batch = trades[i:i + self.batch_size]
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
             written = await self._write_trade_batch(batch)
             total_written += written
 
@@ -205,7 +347,10 @@ class MultiCurrencyTickWriter:
         Write full orderbook depth snapshots to database in batches.
 
         Args:
-            depth_snapshots: List of depth snapshot dictionaries with JSONB bid/ask levels
+            depth_snapshots: List of depth snapshot dictionaries ('timestamp', 'instrument',
+                             float arrays 'bid_prices', 'bid_sizes', 'ask_prices',
+                             'ask_sizes', plus optional 'mark_price', 'underlying_price',
+                             'open_interest', 'volume_24h')
 
         Returns:
             Number of depth snapshots successfully written
@@ -216,12 +361,34 @@ class MultiCurrencyTickWriter:
         if not depth_snapshots:
             return 0
 
+        return await self._write_depth_records([depth_record(depth) for depth in depth_snapshots])
+
+    async def write_depth_columnar(self, cols: Mapping[str, Sequence]) -> int:
+        """
+        Write depth snapshots given as column arrays (ColumnarTickBuffer output).
+
+        Args:
+            cols: Depth columns as returned by ColumnarTickBuffer.get_and_clear()
+
+        Returns:
+            Number of depth snapshots successfully written
+
+        Raises:
+            Exception: If write fails after max retries
+        """
+        if not cols['timestamp_ms']:
+            return 0
+
+        return await self._write_depth_records(depth_records_from_columns(cols))
+
+    async def _write_depth_records(self, records: List[tuple]) -> int:
+        """Write depth records (DEPTH_COLUMNS order) in batches and update stats."""
         start_time = datetime.now()
         total_written = 0
 
         # Process in batches
-        for i in range(0, len(depth_snapshots), self.batch_size):
-            batch = depth_snapshots[i:i + self.batch_size]
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
             written = await self._write_depth_batch(batch)
             total_written += written
 
@@ -240,12 +407,45 @@ class MultiCurrencyTickWriter:
 
         return total_written
 
-    async def _write_quote_batch(self, quotes: List[Dict], max_retries: int = 3) -> int:
+    async def write_all(
+        self,
+        quote_records: List[tuple],
+        trade_records: List[tuple],
+        depth_records: List[tuple]
+    ):
+        """
+        Write one flushed batch of quote, trade and depth records.
+
+        Args:
+            quote_records: Records in QUOTE_COLUMNS order (see quote_records_from_columns)
+            trade_records: Records in TRADE_COLUMNS order (see trade_records_from_columns)
+            depth_records: Records in DEPTH_COLUMNS order (see depth_records_from_columns)
+
+        Each table goes out on its own pooled connection concurrently.
+
+        Raises:
+            Exception: The first failure, once every write has finished
+        """
+        writes = []
+        if quote_records:
+            writes.append(self._write_quote_records(quote_records))
+        if trade_records:
+            writes.append(self._write_trade_records(trade_records))
+        if depth_records:
+            writes.append(self._write_depth_records(depth_records))
+
+        # Let the other tables land even if one write fails
+        results = await asyncio.gather(*writes, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    async def _write_quote_batch(self, quotes: List[tuple], max_retries: int = 3) -> int:
         """
         Write a batch of quotes with retry logic.
 
         Args:
-            quotes: Batch of quote dictionaries
+            quotes: Batch of quote records (QUOTE_COLUMNS order)
             max_retries: Maximum number of retry attempts
 
         Returns:
@@ -254,61 +454,19 @@ class MultiCurrencyTickWriter:
         for attempt in range(max_retries):
             try:
                 async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT with Greeks and IV columns
-                    # Schema: timestamp, instrument, bid/ask, underlying, mark, Greeks (delta/gamma/theta/vega/rho), IVs, OI, last_price
-                    query = f"""
-                        INSERT INTO {self.quotes_table}
-                        (timestamp, instrument, best_bid_price, best_bid_amount, best_ask_price, best_ask_amount,
-                         underlying_price, mark_price, delta, gamma, theta, vega, rho,
-                         implied_volatility, bid_iv, ask_iv, mark_iv, open_interest, last_price)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19)
-                        ON CONFLICT (timestamp, instrument) DO UPDATE SET
-                            best_bid_price = COALESCE(EXCLUDED.best_bid_price, {self.quotes_table}.best_bid_price),
-                            best_bid_amount = COALESCE(EXCLUDED.best_bid_amount, {self.quotes_table}.best_bid_amount),
-                            best_ask_price = COALESCE(EXCLUDED.best_ask_price, {self.quotes_table}.best_ask_price),
-                            best_ask_amount = COALESCE(EXCLUDED.best_ask_amount, {self.quotes_table}.best_ask_amount),
-                            underlying_price = COALESCE(EXCLUDED.underlying_price, {self.quotes_table}.underlying_price),
-                            mark_price = COALESCE(EXCLUDED.mark_price, {self.quotes_table}.mark_price),
-                            delta = COALESCE(EXCLUDED.delta, {self.quotes_table}.delta),
-                            gamma = COALESCE(EXCLUDED.gamma, {self.quotes_table}.gamma),
-                            theta = COALESCE(EXCLUDED.theta, {self.quotes_table}.theta),
-                            vega = COALESCE(EXCLUDED.vega, {self.quotes_table}.vega),
-                            rho = COALESCE(EXCLUDED.rho, {self.quotes_table}.rho),
-                            implied_volatility = COALESCE(EXCLUDED.implied_volatility, {self.quotes_table}.implied_volatility),
-                            bid_iv = COALESCE(EXCLUDED.bid_iv, {self.quotes_table}.bid_iv),
-                            ask_iv = COALESCE(EXCLUDED.ask_iv, {self.quotes_table}.ask_iv),
-                            mark_iv = COALESCE(EXCLUDED.mark_iv, {self.quotes_table}.mark_iv),
-                            open_interest = COALESCE(EXCLUDED.open_interest, {self.quotes_table}.open_interest),
-                            last_price = COALESCE(EXCLUDED.last_price, {self.quotes_table}.last_price)
-                    """
-
-                    await conn.executemany(
-                        query,
-                        [
-                            (
-                                quote['timestamp'],
-                                quote['instrument_name'],
-                                quote.get('best_bid_price'),
-                                quote.get('best_bid_amount'),
-                                quote.get('best_ask_price'),
-                                quote.get('best_ask_amount'),
-                                quote.get('underlying_price'),
-                                quote.get('mark_price'),
-                                quote.get('delta'),
-                                quote.get('gamma'),
-                                quote.get('theta'),
-                                quote.get('vega'),
-                                quote.get('rho'),
-                                quote.get('implied_volatility'),
-                                quote.get('bid_iv'),
-                                quote.get('ask_iv'),
-                                quote.get('mark_iv'),
-                                quote.get('open_interest'),
-                                quote.get('last_price')
+                    async with conn.transaction():
+                        if len(quotes) < COPY_MIN_ROWS:
+                            await conn.executemany(self._quotes_upsert_sql, quotes)
+                        else:
+                            # A merge can't update the same key twice in one statement
+                            quotes = dedupe_quote_records(quotes)
+                            await conn.execute(self._quotes_stage_ddl)
+                            await conn.copy_records_to_table(
+                                self._quotes_stage,
+                                records=quotes,
+                                columns=QUOTE_COLUMNS
                             )
-                            for quote in quotes
-                        ]
-                    )
+                            await conn.execute(self._quotes_merge_sql)
 
                     return len(quotes)
 
@@ -328,12 +486,12 @@ class MultiCurrencyTickWriter:
 
         return 0
 
-    async def _write_trade_batch(self, trades: List[Dict], max_retries: int = 3) -> int:
+    async def _write_trade_batch(self, trades: List[tuple], max_retries: int = 3) -> int:
         """
         Write a batch of trades with retry logic.
 
         Args:
-            trades: Batch of trade dictionaries
+            trades: Batch of trade records (TRADE_COLUMNS order)
             max_retries: Maximum number of retry attempts
 
         Returns:
@@ -342,31 +500,17 @@ class MultiCurrencyTickWriter:
         for attempt in range(max_retries):
             try:
                 async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT
-                    # Schema: timestamp, instrument, trade_id, price, amount, direction, iv, index_price
-                    query = f"""
-                        INSERT INTO {self.trades_table}
-                        (timestamp, trade_id, instrument, price, amount, direction, iv, index_price)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                        ON CONFLICT (timestamp, trade_id, instrument) DO NOTHING
-                    """
-
-                    await conn.executemany(
-                        query,
-                        [
-                            (
-                                trade['timestamp'],
-                                trade['trade_id'],
-                                trade['instrument_name'],
-                                trade['price'],
-                                trade['amount'],
-                                trade['direction'],
-                                trade.get('iv'),
-                                trade.get('index_price')
+                    async with conn.transaction():
+                        if len(trades) < COPY_MIN_ROWS:
+                            await conn.executemany(self._trades_insert_sql, trades)
+                        else:
+                            await conn.execute(self._trades_stage_ddl)
+                            await conn.copy_records_to_table(
+                                self._trades_stage,
+                                records=trades,
+                                columns=TRADE_COLUMNS
                             )
-                            for trade in trades
-                        ]
-                    )
+                            await conn.execute(self._trades_merge_sql)
 
                     return len(trades)
 
@@ -386,12 +530,12 @@ class MultiCurrencyTickWriter:
 
         return 0
 
-    async def _write_depth_batch(self, depth_snapshots: List[Dict], max_retries: int = 3) -> int:
+    async def _write_depth_batch(self, records: List[tuple], max_retries: int = 3) -> int:
         """
         Write a batch of depth snapshots with retry logic.
 
         Args:
-            depth_snapshots: Batch of depth snapshot dictionaries
+            records: Batch of depth records (DEPTH_COLUMNS order)
             max_retries: Maximum number of retry attempts
 
         Returns:
@@ -400,32 +544,14 @@ class MultiCurrencyTickWriter:
         for attempt in range(max_retries):
             try:
                 async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT
-                    # Schema: timestamp, instrument, bids (JSONB), asks (JSONB), mark_price, underlying_price, open_interest, volume_24h
-                    query = f"""
-                        INSERT INTO {self.depth_table}
-                        (timestamp, instrument, bids, asks, mark_price, underlying_price, open_interest, volume_24h)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                    """
-
-                    await conn.executemany(
-                        query,
-                        [
-                            (
-                                depth['timestamp'],
-                                depth['instrument'],
-                                json.dumps(depth.get('bids', [])),  # Convert list to JSONB
-                                json.dumps(depth.get('asks', [])),  # Convert list to JSONB
-                                depth.get('mark_price'),
-                                depth.get('underlying_price'),
-                                depth.get('open_interest'),
-                                depth.get('volume_24h')
-                            )
-                            for depth in depth_snapshots
-                        ]
+                    # No conflict handling on depth: COPY straight into the table
+                    await conn.copy_records_to_table(
+                        self.depth_table,
+                        records=records,
+                        columns=DEPTH_COLUMNS
                     )
 
-                    return len(depth_snapshots)
+                    return len(records)
 
             except Exception as e:
                 logger.error(f"Depth batch write failed for {self.currency} (attempt {attempt + 1}/{max_retries}): {e}")
@@ -438,7 +564,7 @@ class MultiCurrencyTickWriter:
                 else:
                     # Final attempt failed
                     self._write_stats['failed_writes'] += 1
-                    logger.error(f"Failed to write {len(depth_snapshots)} {self.currency} depth snapshots after {max_retries} attempts")
+                    logger.error(f"Failed to write {len(records)} {self.currency} depth snapshots after {max_retries} attempts")
                     raise
 
         return 0
@@ -7,8 +7,9 @@ to the perpetuals_* tables (not currency-specific).
 
 Safety Requirements:
 - Connection pooling (max 5 connections)
-- Batch INSERT (10k rows per transaction)
-- Retry logic (3 attempts with exponential backoff)
+- Batch INSERT (10k rows per statement, one transaction per write call),
+  binary COPY for depth snapshots and for large quote/trade batches
+- Retry logic (3 attempts with jittered exponential backoff, connection errors only)
 - Connection cleanup on shutdown
 - Performance logging (rows/second)
 
@@ -20,17 +21,226 @@ Usage:
     await writer.write_quotes(quote_ticks)
     await writer.write_trades(trade_ticks)
     await writer.close()
+
+Background writes (producer returns as soon as the ticks are queued):
+    await writer.enqueue_quotes(quote_ticks)
+    await writer.enqueue_trades(trade_ticks)
+    await writer.flush()  # wait until everything queued so far is written
+
+Co-located database: pass local_socket_dir (e.g. '/var/run/postgresql') to
+connect over the server's UNIX-domain socket instead of TCP loopback when
+database_url points at localhost. A DSN can also name the socket directly:
+    postgresql:///crypto_data?host=/var/run/postgresql&user=postgres
+
+Event loop: the writer is event-loop bound; entry points should call
+scripts.event_loop.install_uvloop() once, before asyncio.run(), to run it
+on uvloop when installed.
+
+Column-oriented input (one sequence per column, no per-row dicts):
+    await writer.write_quotes_columnar({
+        'timestamp': timestamps,
+        'instrument': instruments,
+        'best_bid_price': bid_prices,
+        ...
+    })
 """
 
 import asyncpg
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import List, Dict, Optional, Sequence, Mapping, Tuple, Callable, Awaitable
+from datetime import datetime, timezone
+from urllib.parse import urlparse
 import asyncio
-import json
+import random
+import time
+
+from scripts.json_codec import json_dumps
+from scripts.tick_records import dedupe_quote_records
 
 logger = logging.getLogger(__name__)
 
+LOOPBACK_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+# Errors worth retrying: the connection or server hiccuped, the batch itself is fine.
+# Anything else (constraint violations, bad data, schema errors) fails fast.
+RETRYABLE_ERRORS = (
+    asyncpg.PostgresConnectionError,
+    asyncpg.InterfaceError,
+    asyncpg.TransactionRollbackError,
+    asyncio.TimeoutError,
+    OSError
+)
+
+# Column order of the INSERT statements (and of the record tuples fed to them)
+QUOTE_COLUMNS = (
+    'timestamp', 'instrument', 'best_bid_price', 'best_bid_amount', 'best_ask_price',
+    'best_ask_amount', 'mark_price', 'index_price', 'funding_rate', 'open_interest'
+)
+TRADE_COLUMNS = (
+    'timestamp', 'trade_id', 'instrument', 'price', 'amount', 'direction',
+    'tick_direction', 'liquidation'
+)
+DEPTH_COLUMNS = (
+    'timestamp', 'instrument', 'bids', 'asks', 'mark_price', 'index_price',
+    'funding_rate', 'open_interest', 'volume_24h'
+)
+
+# Quote/trade batches at least this large go through binary COPY into a temp
+# staging table plus one merge; smaller ones are cheaper as executemany
+COPY_MIN_ROWS = 1000
+
+# Depth batches at least this large are JSON-encoded off the event loop
+DEPTH_ENCODE_OFFLOAD_MIN_ROWS = 50
+
+# Columns that must be present in columnar input; the rest default as below
+QUOTE_REQUIRED_COLUMNS = ('timestamp', 'instrument')
+TRADE_REQUIRED_COLUMNS = ('timestamp', 'trade_id', 'instrument', 'price', 'amount', 'direction')
+TRADE_COLUMN_DEFAULTS = {'liquidation': False}
+
+
+def _is_loopback_url(database_url: str) -> bool:
+    """True if the connection URL points at this machine over TCP."""
+    return urlparse(database_url).hostname in LOOPBACK_HOSTS
+
+
+def _to_datetime(ts) -> datetime:
+    """
+    Normalize a tick timestamp to datetime.
+
+    asyncpg sends datetime values with its binary timestamptz codec (an
+    8-byte integer on the wire); strings or raw epoch numbers would either
+    be rejected or need text parsing. Epoch numbers may be in seconds,
+    milliseconds (Deribit's unit) or microseconds.
+    """
+    if isinstance(ts, datetime):
+        return ts
+    if isinstance(ts, str):
+        return datetime.fromisoformat(ts)
+    if isinstance(ts, (int, float)):
+        return _epoch_to_datetime(ts)
+    raise TypeError(f"Unsupported timestamp type: {type(ts).__name__}")
+
+
+@lru_cache(maxsize=8192)
+def _epoch_to_datetime(ts) -> datetime:
+    """
+    Epoch number to UTC datetime, memoised.
+
+    Collectors buffer Deribit's raw epoch-ms ints and conversion happens
+    here at write time; ticks of one flush share few distinct timestamps
+    (quotes for both perpetuals, trades in bursts), so most lookups hit.
+    """
+    if ts > 1e14:
+        ts = ts / 1_000_000
+    elif ts > 1e11:
+        ts = ts / 1000
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def _quote_record(quote: Dict) -> tuple:
+    """Convert a quote tick dict into a record tuple (QUOTE_COLUMNS order)."""
+    return (
+        _to_datetime(quote['timestamp']),
+        quote['instrument'],
+        quote.get('best_bid_price'),
+        quote.get('best_bid_amount'),
+        quote.get('best_ask_price'),
+        quote.get('best_ask_amount'),
+        quote.get('mark_price'),
+        quote.get('index_price'),
+        quote.get('funding_rate'),
+        quote.get('open_interest')
+    )
+
+
+def _trade_record(trade: Dict) -> tuple:
+    """Convert a trade tick dict into a record tuple (TRADE_COLUMNS order)."""
+    return (
+        _to_datetime(trade['timestamp']),
+        trade['trade_id'],
+        trade['instrument'],
+        trade['price'],
+        trade['amount'],
+        trade['direction'],
+        trade.get('tick_direction'),
+        trade.get('liquidation', False)
+    )
+
+
+def _dedupe_trade_records(records: List[tuple]) -> List[tuple]:
+    """Drop trades repeating (timestamp, trade_id, instrument); first wins, as with DO NOTHING."""
+    unique: Dict[tuple, tuple] = {}
+    for record in records:
+        unique.setdefault((record[0], record[1], record[2]), record)
+    return list(unique.values())
+
+
+def _jsonb(levels) -> str:
+    """JSONB text for a bids/asks value; already-serialised str/bytes pass through."""
+    if isinstance(levels, str):
+        return levels
+    if isinstance(levels, bytes):
+        return levels.decode()
+    return json_dumps(levels).decode()  # asyncpg's jsonb codec takes str
+
+
+def _depth_records(depth_snapshots: List[Dict]) -> List[tuple]:
+    """Convert depth snapshot dicts into COPY records (DEPTH_COLUMNS order), JSON-encoding bids/asks."""
+    return [
+        (
+            _to_datetime(depth['timestamp']),
+            depth['instrument'],
+            _jsonb(depth.get('bids', [])),  # JSONB
+            _jsonb(depth.get('asks', [])),  # JSONB
+            depth.get('mark_price'),
+            depth.get('index_price'),
+            depth.get('funding_rate'),
+            depth.get('open_interest'),
+            depth.get('volume_24h')
+        )
+        for depth in depth_snapshots
+    ]
+
+
+def _columns_to_records(
+    cols: Mapping[str, Sequence],
+    columns: Tuple[str, ...],
+    required: Tuple[str, ...],
+    defaults: Optional[Dict] = None
+) -> List[tuple]:
+    """
+    Transpose column arrays (SoA) into INSERT record tuples.
+
+    Args:
+        cols: Mapping of column name to a sequence of values (list, tuple, array)
+        columns: Column order expected by the INSERT statement
+        required: Columns that must be present in cols
+        defaults: Fill values for optional columns missing from cols (None otherwise)
+
+    Returns:
+        List of record tuples in column order
+
+    Raises:
+        KeyError: If a required column is missing
+        ValueError: If the column sequences have different lengths
+    """
+    missing = [name for name in required if name not in cols]
+    if missing:
+        raise KeyError(f"Missing required columns: {missing}")
+
+    defaults = defaults or {}
+    n = len(cols[required[0]])
+    arrays = [
+        cols[name] if name in cols else repeat(defaults.get(name), n)
+        for name in columns
+    ]
+    arrays[columns.index('timestamp')] = map(_to_datetime, cols['timestamp'])
+    return list(zip(*arrays, strict=True))
+
 
 class PerpetualTickWriter:
     """
@@ -40,7 +250,8 @@ class PerpetualTickWriter:
     - Connection pooling (asyncpg)
     - Writes to perpetuals_quotes, perpetuals_trades, perpetuals_orderbook_depth
     - Batch INSERT statements (10k rows per transaction)
-    - Retry logic with exponential backoff
+    - Retry logic with jittered exponential backoff (transient errors only)
+    - Optional background writer tasks fed by bounded queues
     - Performance monitoring (rows/second)
     - Graceful connection cleanup
     """
@@ -48,38 +259,109 @@ class PerpetualTickWriter:
     def __init__(
         self,
         database_url: str,
-        pool_min_size: int = 2,
+        pool_min_size: int = 3,
         pool_max_size: int = 5,
-        batch_size: int = 10000
+        batch_size: int = 10000,
+        queue_maxsize: int = 100,
+        local_socket_dir: Optional[str] = None
     ):
         """
         Initialize database writer for perpetuals.
 
         Args:
             database_url: PostgreSQL connection URL
-            pool_min_size: Minimum number of connections in pool
+            pool_min_size: Minimum number of connections in pool (one per table a flush writes concurrently)
             pool_max_size: Maximum number of connections in pool
             batch_size: Maximum rows per INSERT transaction
+            queue_maxsize: Maximum pending enqueue_*() calls per queue before
+                           producers block (bounds background-write memory)
+            local_socket_dir: PostgreSQL UNIX socket directory; used instead of
+                              TCP when database_url points at localhost
         """
         self.database_url = database_url
         self.pool_min_size = pool_min_size
         self.pool_max_size = pool_max_size
         self.batch_size = batch_size
+        self.queue_maxsize = queue_maxsize
+        self.local_socket_dir = local_socket_dir
 
         # Table names (shared for all perpetuals)
         self.quotes_table = "perpetuals_quotes"
         self.trades_table = "perpetuals_trades"
         self.depth_table = "perpetuals_orderbook_depth"
 
+        # INSERT statements are built once here rather than per batch
+        # Schema: timestamp, instrument, best_bid_price, best_bid_amount, best_ask_price, best_ask_amount,
+        #         mark_price, index_price, funding_rate, open_interest
+        quotes_conflict_sql = f"""
+            ON CONFLICT (timestamp, instrument) DO UPDATE SET
+                best_bid_price = COALESCE(EXCLUDED.best_bid_price, {self.quotes_table}.best_bid_price),
+                best_bid_amount = COALESCE(EXCLUDED.best_bid_amount, {self.quotes_table}.best_bid_amount),
+                best_ask_price = COALESCE(EXCLUDED.best_ask_price, {self.quotes_table}.best_ask_price),
+                best_ask_amount = COALESCE(EXCLUDED.best_ask_amount, {self.quotes_table}.best_ask_amount),
+                mark_price = COALESCE(EXCLUDED.mark_price, {self.quotes_table}.mark_price),
+                index_price = COALESCE(EXCLUDED.index_price, {self.quotes_table}.index_price),
+                funding_rate = COALESCE(EXCLUDED.funding_rate, {self.quotes_table}.funding_rate),
+                open_interest = COALESCE(EXCLUDED.open_interest, {self.quotes_table}.open_interest)
+        """
+        self.quotes_upsert_sql = f"""
+            INSERT INTO {self.quotes_table}
+            (timestamp, instrument, best_bid_price, best_bid_amount, best_ask_price, best_ask_amount,
+             mark_price, index_price, funding_rate, open_interest)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+        """ + quotes_conflict_sql
+
+        # Schema: timestamp, trade_id, instrument, price, amount, direction, tick_direction, liquidation
+        self.trades_insert_sql = f"""
+            INSERT INTO {self.trades_table}
+            (timestamp, trade_id, instrument, price, amount, direction, tick_direction, liquidation)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+            ON CONFLICT (timestamp, trade_id, instrument) DO NOTHING
+        """
+
+        # COPY can't express ON CONFLICT: large batches are COPYed into a temp
+        # table (one per pooled connection) and merged from there
+        quote_cols = ', '.join(QUOTE_COLUMNS)
+        trade_cols = ', '.join(TRADE_COLUMNS)
+        self.quotes_stage = f"{self.quotes_table}_stage"
+        self.quotes_stage_ddl = (
+            f"CREATE TEMP TABLE IF NOT EXISTS {self.quotes_stage} "
+            f"(LIKE {self.quotes_table}) ON COMMIT DELETE ROWS"
+        )
+        self.quotes_merge_sql = (
+            f"INSERT INTO {self.quotes_table} ({quote_cols}) "
+            f"SELECT {quote_cols} FROM {self.quotes_stage} {quotes_conflict_sql}"
+        )
+        self.trades_stage = f"{self.trades_table}_stage"
+        self.trades_stage_ddl = (
+            f"CREATE TEMP TABLE IF NOT EXISTS {self.trades_stage} "
+            f"(LIKE {self.trades_table}) ON COMMIT DELETE ROWS"
+        )
+        self.trades_merge_sql = (
+            f"INSERT INTO {self.trades_table} ({trade_cols}) "
+            f"SELECT {trade_cols} FROM {self.trades_stage} "
+            f"ON CONFLICT (timestamp, trade_id, instrument) DO NOTHING"
+        )
+
         self.pool: Optional[asyncpg.Pool] = None
-        self._write_stats = {
-            'quotes_written': 0,
-            'trades_written': 0,
-            'depth_written': 0,
-            'total_batches': 0,
-            'failed_writes': 0,
-            'last_write_time': None
-        }
+
+        # Background writers (started by the first enqueue_*() call, so
+        # writers that only write directly don't hold idle tasks)
+        self._quote_queue: Optional[asyncio.Queue] = None
+        self._trade_queue: Optional[asyncio.Queue] = None
+        self._writer_tasks: List[asyncio.Task] = []
+
+        # Bounded pool for depth JSON encoding (caps CPU taken from collectors)
+        self._encode_executor: Optional[ThreadPoolExecutor] = None
+
+        # Write counters (missing keys read as 0); the last write time is kept
+        # as an epoch float and only formatted when get_stats() asks for it
+        self._write_stats: Counter = Counter()
+        self._last_write_ts: Optional[float] = None
+        self._last_write_iso: Optional[str] = None
+
+        # Latest sample_depth_sizes() result, reported by get_stats()
+        self._depth_size_sample: Optional[Dict] = None
 
         logger.info(
             f"PerpetualTickWriter initialized: "
@@ -95,21 +377,118 @@ class PerpetualTickWriter:
         """
         try:
             logger.info(f"Connecting to database (pool size: {self.pool_min_size}-{self.pool_max_size})...")
+
+            # A local server is cheaper to reach over its UNIX socket than
+            # through the TCP/IP stack; the host kwarg overrides the URL's host
+            connect_kwargs = {}
+            if self.local_socket_dir and _is_loopback_url(self.database_url):
+                connect_kwargs['host'] = self.local_socket_dir
+                logger.info(f"Using UNIX socket directory {self.local_socket_dir} for local database")
+
             self.pool = await asyncpg.create_pool(
                 self.database_url,
                 min_size=self.pool_min_size,
                 max_size=self.pool_max_size,
                 command_timeout=60,
-                timeout=30
+                timeout=30,
+                **connect_kwargs
             )
             logger.info("Database connection pool established for perpetuals")
 
+            self._encode_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='depth-encode')
+
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             raise
 
+    def _start_writer_tasks(self):
+        """Start background tasks draining the quote and trade queues."""
+        self._quote_queue = asyncio.Queue(maxsize=self.queue_maxsize)
+        self._trade_queue = asyncio.Queue(maxsize=self.queue_maxsize)
+
+        # Leave part of the pool free for direct write_*() callers
+        workers_per_queue = max(1, self.pool_max_size // 2)
+        self._writer_tasks = [
+            asyncio.create_task(self._drain_queue(self._quote_queue, self._write_quote_records, 'quotes'))
+            for _ in range(workers_per_queue)
+        ] + [
+            asyncio.create_task(self._drain_queue(self._trade_queue, self._write_trade_records, 'trades'))
+            for _ in range(workers_per_queue)
+        ]
+
+    async def _drain_queue(self, queue: asyncio.Queue, write_records, kind: str):
+        """
+        Background writer loop: take queued record lists and write them.
+
+        Lists already waiting in the queue are coalesced (up to batch_size
+        rows) so a burst of small enqueues becomes one batch write.
+        """
+        while True:
+            records = list(await queue.get())
+            taken = 1
+
+            try:
+                while len(records) < self.batch_size and not queue.empty():
+                    records.extend(queue.get_nowait())
+                    taken += 1
+
+                await write_records(records)
+
+            except Exception as e:
+                # Retries are exhausted by now; keep the worker alive
+                logger.error(f"Background write of {len(records)} perpetual {kind} failed: {e}")
+
+            finally:
+                for _ in range(taken):
+                    queue.task_done()
+
+    async def enqueue_quotes(self, quotes: List[Dict]):
+        """
+        Queue quote ticks for a background writer task.
+
+        Returns once the quotes are queued, not written; blocks only while
+        the queue is full. Use flush() to wait for the writes.
+
+        Args:
+            quotes: List of quote tick dictionaries
+        """
+        if quotes:
+            if not self._writer_tasks:
+                self._start_writer_tasks()
+            await self._quote_queue.put([_quote_record(quote) for quote in quotes])
+
+    async def enqueue_trades(self, trades: List[Dict]):
+        """
+        Queue trade ticks for a background writer task.
+
+        Args:
+            trades: List of trade tick dictionaries
+        """
+        if trades:
+            if not self._writer_tasks:
+                self._start_writer_tasks()
+            await self._trade_queue.put([_trade_record(trade) for trade in trades])
+
+    async def flush(self):
+        """Wait until all queued quotes and trades have been written (or failed)."""
+        if self._quote_queue:
+            await self._quote_queue.join()
+        if self._trade_queue:
+            await self._trade_queue.join()
+
     async def close(self):
-        """Close database connection pool gracefully."""
+        """Drain queued writes, stop background writers and close the pool."""
+        if self._writer_tasks:
+            await self.flush()
+            for task in self._writer_tasks:
+                task.cancel()
+            await asyncio.gather(*self._writer_tasks, return_exceptions=True)
+            self._writer_tasks = []
+
+        if self._encode_executor:
+            self._encode_executor.shutdown(wait=False)
+            self._encode_executor = None
+
         if self.pool:
             logger.info("Closing database connection pool...")
             await self.pool.close()
@@ -131,27 +510,38 @@ class PerpetualTickWriter:
         if not quotes:
             return 0
 
-        start_time = datetime.now()
-        total_written = 0
+        return await self._write_quote_records([_quote_record(quote) for quote in quotes])
 
-        # Process in batches
-        for i in range(0, len(quotes), self.batch_size):
-            batch = quotes[i:i + self.batch_size]
-            written = await self._write_quote_batch(batch)
-            total_written += written
+    async def write_quotes_columnar(self, cols: Mapping[str, Sequence]) -> int:
+        """
+        Write quote ticks given as column arrays (one sequence per column).
 
-        # Update stats and log performance
-        duration = (datetime.now() - start_time).total_seconds()
-        rows_per_sec = total_written / duration if duration > 0 else 0
+        Avoids building a dict per tick upstream; the columns are zipped
+        straight into INSERT records. Optional columns may be omitted and
+        are written as NULL.
 
-        self._write_stats['quotes_written'] += total_written
-        self._write_stats['total_batches'] += 1
-        self._write_stats['last_write_time'] = datetime.now()
+        Args:
+            cols: Mapping of QUOTE_COLUMNS names to equal-length sequences
 
-        logger.info(
-            f"Wrote {total_written} perpetual quotes in {duration:.2f}s "
-            f"({rows_per_sec:.0f} rows/sec)"
-        )
+        Returns:
+            Number of quotes successfully written
+
+        Raises:
+            KeyError: If 'timestamp' or 'instrument' is missing
+            ValueError: If the columns have different lengths
+        """
+        records = _columns_to_records(cols, QUOTE_COLUMNS, QUOTE_REQUIRED_COLUMNS)
+        if not records:
+            return 0
+
+        return await self._write_quote_records(records)
+
+    async def _write_quote_records(self, records: List[tuple]) -> int:
+        """Write quote record tuples (QUOTE_COLUMNS order) in batches."""
+        start_time = time.perf_counter()
+        total_written = await self._write_batches(records, self._write_quote_batch, 'perpetual quotes')
+
+        self._record_write('quotes_written', 'perpetual quotes', total_written, time.perf_counter() - start_time)
 
         return total_written
 
@@ -171,27 +561,37 @@ class PerpetualTickWriter:
         if not trades:
             return 0
 
-        start_time = datetime.now()
-        total_written = 0
+        return await self._write_trade_records([_trade_record(trade) for trade in trades])
 
-        # Process in batches
-        for i in range(0, len(trades), self.batch_size):
-            batch = trades[i:i + self.batch_size]
-            written = await self._write_trade_batch(batch)
-            total_written += written
+    async def write_trades_columnar(self, cols: Mapping[str, Sequence]) -> int:
+        """
+        Write trade ticks given as column arrays (one sequence per column).
 
-        # Update stats and log performance
-        duration = (datetime.now() - start_time).total_seconds()
-        rows_per_sec = total_written / duration if duration > 0 else 0
+        Args:
+            cols: Mapping of TRADE_COLUMNS names to equal-length sequences
+                  ('tick_direction' and 'liquidation' are optional)
 
-        self._write_stats['trades_written'] += total_written
-        self._write_stats['total_batches'] += 1
-        self._write_stats['last_write_time'] = datetime.now()
+        Returns:
+            Number of trades successfully written
 
-        logger.info(
-            f"Wrote {total_written} perpetual trades in {duration:.2f}s "
-            f"({rows_per_sec:.0f} rows/sec)"
+        Raises:
+            KeyError: If a required column is missing
+            ValueError: If the columns have different lengths
+        """
+        records = _columns_to_records(
+            cols, TRADE_COLUMNS, TRADE_REQUIRED_COLUMNS, TRADE_COLUMN_DEFAULTS
         )
+        if not records:
+            return 0
+
+        return await self._write_trade_records(records)
+
+    async def _write_trade_records(self, records: List[tuple]) -> int:
+        """Write trade record tuples (TRADE_COLUMNS order) in batches."""
+        start_time = time.perf_counter()
+        total_written = await self._write_batches(records, self._write_trade_batch, 'perpetual trades')
+
+        self._record_write('trades_written', 'perpetual trades', total_written, time.perf_counter() - start_time)
 
         return total_written
 
@@ -200,7 +600,8 @@ class PerpetualTickWriter:
         Write full orderbook depth snapshots to database in batches.
 
         Args:
-            depth_snapshots: List of depth snapshot dictionaries with JSONB bid/ask levels
+            depth_snapshots: List of depth snapshot dictionaries; bids/asks are level
+                lists or already-serialised JSON text
 
         Returns:
             Number of depth snapshots successfully written
@@ -211,216 +612,244 @@ class PerpetualTickWriter:
         if not depth_snapshots:
             return 0
 
-        start_time = datetime.now()
-        total_written = 0
+        start_time = time.perf_counter()
 
-        # Process in batches
-        for i in range(0, len(depth_snapshots), self.batch_size):
-            batch = depth_snapshots[i:i + self.batch_size]
-            written = await self._write_depth_batch(batch)
-            total_written += written
-
-        # Update stats and log performance
-        duration = (datetime.now() - start_time).total_seconds()
-        rows_per_sec = total_written / duration if duration > 0 else 0
-
-        self._write_stats['depth_written'] += total_written
-        self._write_stats['total_batches'] += 1
-        self._write_stats['last_write_time'] = datetime.now()
+        # JSON-encoding full books is CPU-heavy; do it on the encoder thread
+        # pool so the event loop keeps serving other writers meanwhile. Small
+        # batches aren't worth the thread hop. Encoding happens before a
+        # connection is acquired, and retries reuse the encoded records.
+        if self._encode_executor and len(depth_snapshots) >= DEPTH_ENCODE_OFFLOAD_MIN_ROWS:
+            records = await asyncio.get_running_loop().run_in_executor(
+                self._encode_executor, _depth_records, depth_snapshots
+            )
+        else:
+            records = _depth_records(depth_snapshots)
 
-        logger.info(
-            f"Wrote {total_written} perpetual depth snapshots in {duration:.2f}s "
-            f"({rows_per_sec:.0f} rows/sec)"
+        total_written = await self._write_batches(
+            records, self._write_depth_batch, 'perpetual depth snapshots'
         )
 
+        self._record_write('depth_written', 'perpetual depth snapshots', total_written, time.perf_counter() - start_time)
+
         return total_written
 
-    async def _write_quote_batch(self, quotes: List[Dict], max_retries: int = 3) -> int:
+    async def _write_batches(
+        self,
+        rows: List,
+        write_batch: Callable[[asyncpg.Connection, List], Awaitable[int]],
+        what: str,
+        max_retries: int = 3
+    ) -> int:
         """
-        Write a batch of quotes with retry logic.
+        Write rows in batch_size chunks on one connection, in one transaction.
+
+        Acquiring a single connection and committing once amortizes the pool
+        acquire and BEGIN/COMMIT round-trips over all batches of the call.
+        Retries re-run the whole transaction, so a failed call never leaves
+        some of its batches committed.
 
         Args:
-            quotes: Batch of quote dictionaries
-            max_retries: Maximum number of retry attempts
+            rows: Rows to write
+            write_batch: Coroutine writing one batch on the given connection
+            what: Description for log messages (e.g. 'perpetual quotes')
+            max_retries: Maximum number of attempts
 
         Returns:
-            Number of quotes written
+            Number of rows written
         """
         for attempt in range(max_retries):
             try:
                 async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT
-                    # Schema: timestamp, instrument, best_bid_price, best_bid_amount, best_ask_price, best_ask_amount,
-                    #         mark_price, index_price, funding_rate, open_interest
-                    query = f"""
-                        INSERT INTO {self.quotes_table}
-                        (timestamp, instrument, best_bid_price, best_bid_amount, best_ask_price, best_ask_amount,
-                         mark_price, index_price, funding_rate, open_interest)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                        ON CONFLICT (timestamp, instrument) DO UPDATE SET
-                            best_bid_price = COALESCE(EXCLUDED.best_bid_price, {self.quotes_table}.best_bid_price),
-                            best_bid_amount = COALESCE(EXCLUDED.best_bid_amount, {self.quotes_table}.best_bid_amount),
-                            best_ask_price = COALESCE(EXCLUDED.best_ask_price, {self.quotes_table}.best_ask_price),
-                            best_ask_amount = COALESCE(EXCLUDED.best_ask_amount, {self.quotes_table}.best_ask_amount),
-                            mark_price = COALESCE(EXCLUDED.mark_price, {self.quotes_table}.mark_price),
-                            index_price = COALESCE(EXCLUDED.index_price, {self.quotes_table}.index_price),
-                            funding_rate = COALESCE(EXCLUDED.funding_rate, {self.quotes_table}.funding_rate),
-                            open_interest = COALESCE(EXCLUDED.open_interest, {self.quotes_table}.open_interest)
-                    """
-
-                    await conn.executemany(
-                        query,
-                        [
-                            (
-                                quote['timestamp'],
-                                quote['instrument'],
-                                quote.get('best_bid_price'),
-                                quote.get('best_bid_amount'),
-                                quote.get('best_ask_price'),
-                                quote.get('best_ask_amount'),
-                                quote.get('mark_price'),
-                                quote.get('index_price'),
-                                quote.get('funding_rate'),
-                                quote.get('open_interest')
-                            )
-                            for quote in quotes
-                        ]
-                    )
-
-                    return len(quotes)
+                    # Batches run back to back: a connection executes one
+                    # statement at a time, so they cannot be gathered
+                    async with conn.transaction():
+                        return sum([
+                            await write_batch(conn, rows[i:i + self.batch_size])
+                            for i in range(0, len(rows), self.batch_size)
+                        ])
 
-            except Exception as e:
-                logger.error(f"Batch write failed (attempt {attempt + 1}/{max_retries}): {e}")
+            except RETRYABLE_ERRORS as e:
+                logger.error(f"Batch write of {what} failed (attempt {attempt + 1}/{max_retries}): {e}")
 
                 if attempt < max_retries - 1:
-                    # Exponential backoff
-                    delay = 2 ** attempt
-                    logger.info(f"Retrying in {delay}s...")
+                    # Exponential backoff with jitter so concurrent failing batches
+                    # don't all retry at the same instant
+                    delay = random.uniform(0.5 * 2 ** attempt, 2 ** attempt)
+                    self._write_stats['retried_writes'] += 1
+                    logger.info(f"Retrying in {delay:.2f}s...")
                     await asyncio.sleep(delay)
                 else:
                     # Final attempt failed
                     self._write_stats['failed_writes'] += 1
-                    logger.error(f"Failed to write {len(quotes)} perpetual quotes after {max_retries} attempts")
+                    logger.error(f"Failed to write {len(rows)} {what} after {max_retries} attempts")
                     raise
 
+            except Exception as e:
+                # Constraint/data/schema errors would fail identically on retry
+                self._write_stats['failed_writes'] += 1
+                self._write_stats['rejected_writes'] += 1
+                logger.error(f"Failed to write {len(rows)} {what} (not retryable): {e}")
+                raise
+
         return 0
 
-    async def _write_trade_batch(self, trades: List[Dict], max_retries: int = 3) -> int:
+    async def _write_quote_batch(self, conn: asyncpg.Connection, quotes: List[tuple]) -> int:
         """
-        Write a batch of trades with retry logic.
+        Write a batch of quotes on an acquired connection.
 
         Args:
-            trades: Batch of trade dictionaries
-            max_retries: Maximum number of retry attempts
+            conn: Connection (inside the caller's transaction)
+            quotes: Batch of quote record tuples (QUOTE_COLUMNS order)
 
         Returns:
-            Number of trades written
+            Number of quotes written (after collapsing duplicates)
         """
-        for attempt in range(max_retries):
-            try:
-                async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT
-                    # Schema: timestamp, trade_id, instrument, price, amount, direction, tick_direction, liquidation
-                    query = f"""
-                        INSERT INTO {self.trades_table}
-                        (timestamp, trade_id, instrument, price, amount, direction, tick_direction, liquidation)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                        ON CONFLICT (timestamp, trade_id, instrument) DO NOTHING
-                    """
-
-                    await conn.executemany(
-                        query,
-                        [
-                            (
-                                trade['timestamp'],
-                                trade['trade_id'],
-                                trade['instrument'],
-                                trade['price'],
-                                trade['amount'],
-                                trade['direction'],
-                                trade.get('tick_direction'),
-                                trade.get('liquidation', False)
-                            )
-                            for trade in trades
-                        ]
-                    )
-
-                    return len(trades)
+        # Duplicates would each cost an index probe + upsert server-side
+        received = len(quotes)
+        quotes = dedupe_quote_records(quotes)
+        if len(quotes) < received:
+            logger.debug(f"Collapsed {received - len(quotes)}/{received} duplicate perpetual quotes")
+
+        if len(quotes) < COPY_MIN_ROWS:
+            await conn.executemany(self.quotes_upsert_sql, quotes)
+        else:
+            await self._copy_and_merge(
+                conn, quotes, QUOTE_COLUMNS,
+                self.quotes_stage, self.quotes_stage_ddl, self.quotes_merge_sql
+            )
+        return len(quotes)
 
-            except Exception as e:
-                logger.error(f"Batch write failed (attempt {attempt + 1}/{max_retries}): {e}")
+    async def _write_trade_batch(self, conn: asyncpg.Connection, trades: List[tuple]) -> int:
+        """
+        Write a batch of trades on an acquired connection.
 
-                if attempt < max_retries - 1:
-                    # Exponential backoff
-                    delay = 2 ** attempt
-                    logger.info(f"Retrying in {delay}s...")
-                    await asyncio.sleep(delay)
-                else:
-                    # Final attempt failed
-                    self._write_stats['failed_writes'] += 1
-                    logger.error(f"Failed to write {len(trades)} perpetual trades after {max_retries} attempts")
-                    raise
+        Args:
+            conn: Connection (inside the caller's transaction)
+            trades: Batch of trade record tuples (TRADE_COLUMNS order)
 
-        return 0
+        Returns:
+            Number of trades written (after dropping duplicates)
+        """
+        # Duplicates (e.g. replayed after a reconnect) would be discarded by
+        # ON CONFLICT DO NOTHING anyway; drop them before they hit the wire
+        received = len(trades)
+        trades = _dedupe_trade_records(trades)
+        if len(trades) < received:
+            logger.debug(f"Dropped {received - len(trades)}/{received} duplicate perpetual trades")
+
+        if len(trades) < COPY_MIN_ROWS:
+            await conn.executemany(self.trades_insert_sql, trades)
+        else:
+            await self._copy_and_merge(
+                conn, trades, TRADE_COLUMNS,
+                self.trades_stage, self.trades_stage_ddl, self.trades_merge_sql
+            )
+        return len(trades)
 
-    async def _write_depth_batch(self, depth_snapshots: List[Dict], max_retries: int = 3) -> int:
+    async def _copy_and_merge(
+        self,
+        conn: asyncpg.Connection,
+        records: List[tuple],
+        columns: Tuple[str, ...],
+        stage: str,
+        stage_ddl: str,
+        merge_sql: str
+    ):
         """
-        Write a batch of depth snapshots with retry logic.
+        Binary-COPY records into a temp staging table and merge them into the target.
 
         Args:
-            depth_snapshots: Batch of depth snapshot dictionaries
-            max_retries: Maximum number of retry attempts
+            conn: Connection (inside the caller's transaction)
+            records: Deduplicated record tuples in column order
+            columns: Column names of the records
+            stage: Staging table name
+            stage_ddl: CREATE TEMP TABLE IF NOT EXISTS statement for the stage
+            merge_sql: INSERT ... SELECT ... ON CONFLICT from the stage
+        """
+        await conn.execute(stage_ddl)
+        await conn.copy_records_to_table(stage, records=records, columns=columns)
+        await conn.execute(merge_sql)
+        # Several batches can share one transaction: empty the stage now
+        # rather than at commit, so the next batch merges only its own rows
+        await conn.execute(f"TRUNCATE {stage}")
+
+    async def _write_depth_batch(self, conn: asyncpg.Connection, depth_records: List[tuple]) -> int:
+        """
+        Write a batch of depth snapshots on an acquired connection.
+
+        Args:
+            conn: Connection (inside the caller's transaction)
+            depth_records: Batch of encoded depth records (DEPTH_COLUMNS order)
 
         Returns:
             Number of depth snapshots written
         """
-        for attempt in range(max_retries):
-            try:
-                async with self.pool.acquire() as conn:
-                    # Prepare batch INSERT
-                    # Schema: timestamp, instrument, bids (JSONB), asks (JSONB), mark_price, index_price,
-                    #         funding_rate, open_interest, volume_24h
-                    query = f"""
-                        INSERT INTO {self.depth_table}
-                        (timestamp, instrument, bids, asks, mark_price, index_price, funding_rate, open_interest, volume_24h)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    """
-
-                    await conn.executemany(
-                        query,
-                        [
-                            (
-                                depth['timestamp'],
-                                depth['instrument'],
-                                json.dumps(depth.get('bids', [])),  # Convert list to JSONB
-                                json.dumps(depth.get('asks', [])),  # Convert list to JSONB
-                                depth.get('mark_price'),
-                                depth.get('index_price'),
-                                depth.get('funding_rate'),
-                                depth.get('open_interest'),
-                                depth.get('volume_24h')
-                            )
-                            for depth in depth_snapshots
-                        ]
-                    )
-
-                    return len(depth_snapshots)
+        # Binary COPY: asyncpg encodes every column (timestamptz, numeric,
+        # jsonb) in PostgreSQL's binary wire format, so the large bids/asks
+        # payloads skip COPY-text escaping and server-side re-parsing.
+        # The table has no ON CONFLICT clause, so COPY is equivalent to INSERT.
+        await conn.copy_records_to_table(
+            self.depth_table,
+            records=depth_records,
+            columns=DEPTH_COLUMNS
+        )
 
-            except Exception as e:
-                logger.error(f"Depth batch write failed (attempt {attempt + 1}/{max_retries}): {e}")
+        return len(depth_records)
 
-                if attempt < max_retries - 1:
-                    # Exponential backoff
-                    delay = 2 ** attempt
-                    logger.info(f"Retrying in {delay}s...")
-                    await asyncio.sleep(delay)
-                else:
-                    # Final attempt failed
-                    self._write_stats['failed_writes'] += 1
-                    logger.error(f"Failed to write {len(depth_snapshots)} perpetual depth snapshots after {max_retries} attempts")
-                    raise
+    async def sample_depth_sizes(self, sample_rows: int = 1000) -> Dict:
+        """
+        Sample stored (post-compression) sizes of recent depth snapshots.
 
-        return 0
+        Uses pg_column_size() over the newest rows; useful to check the
+        effect of LZ4 compression on bids/asks (schema/011).
+
+        Args:
+            sample_rows: Number of most recent rows to sample
+
+        Returns:
+            Dictionary with average bytes per row and per bids/asks value
+        """
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                f"""
+                SELECT count(*) AS rows,
+                       avg(pg_column_size(d.*)) AS avg_row_bytes,
+                       avg(pg_column_size(d.bids)) AS avg_bids_bytes,
+                       avg(pg_column_size(d.asks)) AS avg_asks_bytes
+                FROM (
+                    SELECT * FROM {self.depth_table}
+                    ORDER BY timestamp DESC
+                    LIMIT $1
+                ) d
+                """,
+                sample_rows
+            )
+
+        stats = {key: float(row[key]) if row[key] is not None else None for key in
+                 ('avg_row_bytes', 'avg_bids_bytes', 'avg_asks_bytes')}
+        stats['rows_sampled'] = row['rows']
+        self._depth_size_sample = stats
+
+        logger.info(
+            f"Depth storage sample ({row['rows']} rows): "
+            f"row={stats['avg_row_bytes'] or 0:.0f}B bids={stats['avg_bids_bytes'] or 0:.0f}B "
+            f"asks={stats['avg_asks_bytes'] or 0:.0f}B"
+        )
+        return stats
+
+    def _record_write(self, stat_key: str, what: str, total_written: int, duration: float):
+        """Update write stats for one write_*() call and log its throughput."""
+        self._write_stats[stat_key] += total_written
+        self._write_stats['total_batches'] += 1
+        self._last_write_ts = time.time()
+        self._last_write_iso = None
+
+        if logger.isEnabledFor(logging.INFO):
+            rows_per_sec = total_written / duration if duration > 0 else 0
+            logger.info(
+                f"Wrote {total_written} {what} in {duration:.2f}s "
+                f"({rows_per_sec:.0f} rows/sec)"
+            )
 
     def get_stats(self) -> Dict:
         """
@@ -429,11 +858,18 @@ class PerpetualTickWriter:
         Returns:
             Dictionary with write stats
         """
+        if self._last_write_iso is None and self._last_write_ts is not None:
+            self._last_write_iso = datetime.fromtimestamp(self._last_write_ts).isoformat()
+
+        stats = self._write_stats
         return {
-            'quotes_written': self._write_stats['quotes_written'],
-            'trades_written': self._write_stats['trades_written'],
-            'depth_written': self._write_stats['depth_written'],
-            'total_batches': self._write_stats['total_batches'],
-            'failed_writes': self._write_stats['failed_writes'],
-            'last_write_time': self._write_stats['last_write_time'].isoformat() if self._write_stats['last_write_time'] else None
+            'quotes_written': stats['quotes_written'],
+            'trades_written': stats['trades_written'],
+            'depth_written': stats['depth_written'],
+            'total_batches': stats['total_batches'],
+            'failed_writes': stats['failed_writes'],
+            'retried_writes': stats['retried_writes'],
+            'rejected_writes': stats['rejected_writes'],
+            'last_write_time': self._last_write_iso,
+            'depth_size_sample': self._depth_size_sample
         }
@@ -4,12 +4,24 @@ Verify Deribit Historical Options Data Availability
 Tests what historical data is actually available from Deribit API
 """
 
+import asyncio
+import io
 import os
-import requests
+import sys
+import time
+from array import array
+from contextvars import ContextVar
+from typing import Optional
+import aiohttp
 import json
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.json_codec import json_loads
+
 # Load environment variables
 load_dotenv()
 
@@ -17,60 +29,138 @@ load_dotenv()
 CLIENT_ID = os.getenv('MAINNET_DERIBIT_CLIENT_ID')
 CLIENT_SECRET = os.getenv('MAINNET_DERIBIT_CLIENT_SECRET')
 BASE_URL = "https://www.deribit.com/api/v2"
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=30)
+INSTRUMENT_CACHE_TTL_SEC = 300  # Instrument lists only change when new series are listed
+MAX_CONCURRENT_REQUESTS = 5  # Stay well inside Deribit's public rate limit
+MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_BOOL_STR = {True: 'true', False: 'false'}  # Deribit expects lowercase query booleans
+
+# Tests run concurrently; each one prints into its own buffer (see
+# _run_buffered) so main() can emit the reports in test order
+_output: ContextVar[Optional[io.StringIO]] = ContextVar('_output', default=None)
+
+
+def _print(*args, **kwargs):
+    """print() into the current test's buffer, or to stdout outside one"""
+    print(*args, file=_output.get(), **kwargs)
+
+
+async def _run_buffered(coro):
+    """Await coro with its output captured; returns (result, output)"""
+    buffer = io.StringIO()
+    _output.set(buffer)  # Task-local: gather() runs each coro in a copied context
+    result = await coro
+    return result, buffer.getvalue()
+
 
 class DeribitHistoricalChecker:
+    _URL_INSTRUMENTS = f"{BASE_URL}/public/get_instruments"
+    _URL_CHART = f"{BASE_URL}/public/get_tradingview_chart_data"
+    _URL_TICKER = f"{BASE_URL}/public/ticker"
+
     def __init__(self):
         self.base_url = BASE_URL
         self.client_id = CLIENT_ID
         self.client_secret = CLIENT_SECRET
 
-    def get_instruments(self, currency="BTC", kind="option", expired=False):
+        # One keep-alive session for all calls (created on first request);
+        # the semaphore caps in-flight requests across concurrent tests
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        # (currency, kind, expired) -> (fetched_at monotonic, instruments)
+        self._instrument_cache = {}
+
+    async def close(self):
+        """Close the HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, url, params):
+        """
+        GET a Deribit endpoint and decode the JSON body.
+
+        Connection errors and 429/5xx responses are retried with exponential
+        backoff (slept outside the semaphore so other requests can proceed).
+
+        Returns:
+            (status, data) tuple
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=REQUEST_TIMEOUT,
+                connector=aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS * 2)
+            )
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    async with self._session.get(url, params=params) as response:
+                        status = response.status
+                        body = await response.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == MAX_RETRIES:
+                    raise
+            else:
+                if status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    return status, json_loads(body)
+
+            await asyncio.sleep(0.3 * 2 ** attempt)
+
+    async def get_instruments(self, currency="BTC", kind="option", expired=False):
         """Get list of option instruments"""
-        print("=" * 80)
-        print(f"FETCHING {currency} {kind.upper()} INSTRUMENTS (expired={expired})")
-        print("=" * 80)
+        _print("=" * 80)
+        _print(f"FETCHING {currency} {kind.upper()} INSTRUMENTS (expired={expired})")
+        _print("=" * 80)
+
+        # main() and the test_* methods ask for the same lists within seconds
+        cache_key = (currency, kind, expired)
+        cached = self._instrument_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < INSTRUMENT_CACHE_TTL_SEC:
+            _print(f"✅ Found {len(cached[1])} {currency} {kind}s (expired={expired}, cached)")
+            return cached[1]
 
-        url = f"{self.base_url}/public/get_instruments"
         params = {
             "currency": currency,
             "kind": kind,
-            "expired": str(expired).lower()
+            "expired": _BOOL_STR[expired]
         }
 
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            status, data = await self._get(self._URL_INSTRUMENTS, params)
+            if status != 200:
+                raise Exception(f"HTTP {status}")
 
             if data.get('result'):
                 instruments = data['result']
-                print(f"✅ Found {len(instruments)} {currency} {kind}s (expired={expired})")
+                _print(f"✅ Found {len(instruments)} {currency} {kind}s (expired={expired})")
 
                 if instruments:
-                    print(f"\nSample instruments:")
+                    _print(f"\nSample instruments:")
                     for inst in instruments[:5]:
-                        print(f"  - {inst['instrument_name']}: Strike ${inst.get('strike')}, Expiry: {inst.get('expiration_timestamp')}")
+                        _print(f"  - {inst['instrument_name']}: Strike ${inst.get('strike')}, Expiry: {inst.get('expiration_timestamp')}")
 
+                self._instrument_cache[cache_key] = (time.monotonic(), instruments)
                 return instruments
             else:
-                print(f"❌ No instruments found")
+                _print(f"❌ No instruments found")
                 return []
 
         except Exception as e:
-            print(f"❌ Error: {e}")
+            _print(f"❌ Error: {e}")
             return []
 
-    def check_tradingview_chart_data(self, instrument_name, resolution=60):
+    async def check_tradingview_chart_data(self, instrument_name, resolution=60):
         """
         Check if /get_tradingview_chart_data endpoint works for options
         This is what you use for futures - let's see if it works for options
         """
-        print("\n" + "=" * 80)
-        print(f"TESTING TRADINGVIEW CHART DATA FOR: {instrument_name}")
-        print(f"Resolution: {resolution} minutes")
-        print("=" * 80)
-
-        url = f"{self.base_url}/public/get_tradingview_chart_data"
+        _print("\n" + "=" * 80)
+        _print(f"TESTING TRADINGVIEW CHART DATA FOR: {instrument_name}")
+        _print(f"Resolution: {resolution} minutes")
+        _print("=" * 80)
 
         # Try to get last 30 days
         end_timestamp = int(datetime.now().timestamp() * 1000)
@@ -84,136 +174,143 @@ class DeribitHistoricalChecker:
         }
 
         try:
-            response = requests.get(url, params=params)
-            data = response.json()
+            status, data = await self._get(self._URL_CHART, params)
 
-            if response.status_code == 200 and data.get('result'):
+            if status == 200 and data.get('result'):
                 result = data['result']
 
-                ticks = result.get('ticks', [])
-                open_prices = result.get('open', [])
-                close_prices = result.get('close', [])
-                high_prices = result.get('high', [])
-                low_prices = result.get('low', [])
-                volumes = result.get('volume', [])
-
-                print(f"✅ SUCCESS! TradingView chart data available")
-                print(f"   Candles received: {len(ticks)}")
-                print(f"   Date range: {datetime.fromtimestamp(ticks[0]/1000)} to {datetime.fromtimestamp(ticks[-1]/1000)}")
-                print(f"   Status: {result.get('status')}")
-
+                # Columnar (SoA) candles: one contiguous int64/float64 array per
+                # field instead of six lists of boxed Python numbers
+                candles = {
+                    'ts': array('q', result.get('ticks', [])),
+                    'open': array('d', result.get('open', [])),
+                    'high': array('d', result.get('high', [])),
+                    'low': array('d', result.get('low', [])),
+                    'close': array('d', result.get('close', [])),
+                    'volume': array('d', result.get('volume', []))
+                }
+                ticks = candles['ts']
+
+                _print(f"✅ SUCCESS! TradingView chart data available")
+                _print(f"   Candles received: {len(ticks)}")
                 if len(ticks) > 0:
-                    print(f"\n   Last 5 candles:")
-                    print(f"   {'Timestamp':<20} {'Open':>10} {'High':>10} {'Low':>10} {'Close':>10} {'Volume':>10}")
-                    print(f"   {'-' * 75}")
+                    _print(f"   Date range: {datetime.fromtimestamp(ticks[0]/1000)} to {datetime.fromtimestamp(ticks[-1]/1000)}")
+                _print(f"   Status: {result.get('status')}")
 
-                    for i in range(max(0, len(ticks)-5), len(ticks)):
-                        timestamp = datetime.fromtimestamp(ticks[i]/1000).strftime('%Y-%m-%d %H:%M')
-                        print(f"   {timestamp:<20} {open_prices[i]:>10.4f} {high_prices[i]:>10.4f} {low_prices[i]:>10.4f} {close_prices[i]:>10.4f} {volumes[i]:>10.2f}")
+                if len(ticks) > 0:
+                    _print(f"\n   Last 5 candles:")
+                    _print(f"   {'Timestamp':<20} {'Open':>10} {'High':>10} {'Low':>10} {'Close':>10} {'Volume':>10}")
+                    _print(f"   {'-' * 75}")
+
+                    last = slice(max(0, len(ticks) - 5), len(ticks))
+                    for ts, o, h, l, c, v in zip(
+                        ticks[last], candles['open'][last], candles['high'][last],
+                        candles['low'][last], candles['close'][last], candles['volume'][last]
+                    ):
+                        timestamp = datetime.fromtimestamp(ts/1000).strftime('%Y-%m-%d %H:%M')
+                        _print(f"   {timestamp:<20} {o:>10.4f} {h:>10.4f} {l:>10.4f} {c:>10.4f} {v:>10.2f}")
 
                 return True, len(ticks)
             else:
                 error = data.get('error', {})
-                print(f"❌ FAILED: {error.get('message', 'Unknown error')}")
-                print(f"   Full response: {json.dumps(data, indent=2)}")
+                _print(f"❌ FAILED: {error.get('message', 'Unknown error')}")
+                _print(f"   Full response: {json.dumps(data, indent=2)}")
                 return False, 0
 
         except Exception as e:
-            print(f"❌ Error: {e}")
+            _print(f"❌ Error: {e}")
             return False, 0
 
-    def check_ticker_data(self, instrument_name):
+    async def check_ticker_data(self, instrument_name):
         """
         Check /ticker endpoint - this gives current bid/ask/IV/Greeks
         """
-        print("\n" + "=" * 80)
-        print(f"TESTING TICKER DATA FOR: {instrument_name}")
-        print("=" * 80)
+        _print("\n" + "=" * 80)
+        _print(f"TESTING TICKER DATA FOR: {instrument_name}")
+        _print("=" * 80)
 
-        url = f"{self.base_url}/public/ticker"
         params = {"instrument_name": instrument_name}
 
         try:
-            response = requests.get(url, params=params)
-            data = response.json()
+            status, data = await self._get(self._URL_TICKER, params)
 
-            if response.status_code == 200 and data.get('result'):
+            if status == 200 and data.get('result'):
                 result = data['result']
 
-                print(f"✅ Ticker data available")
-                print(f"\n   Current snapshot:")
-                print(f"   Best Bid: {result.get('best_bid_price')}")
-                print(f"   Best Ask: {result.get('best_ask_price')}")
-                print(f"   Mark Price: {result.get('mark_price')}")
-                print(f"   Mark IV: {result.get('mark_iv')}%")
-                print(f"   Bid IV: {result.get('bid_iv')}%")
-                print(f"   Ask IV: {result.get('ask_iv')}%")
-                print(f"   Underlying Price: ${result.get('underlying_price')}")
+                _print(f"✅ Ticker data available")
+                _print(f"\n   Current snapshot:")
+                _print(f"   Best Bid: {result.get('best_bid_price')}")
+                _print(f"   Best Ask: {result.get('best_ask_price')}")
+                _print(f"   Mark Price: {result.get('mark_price')}")
+                _print(f"   Mark IV: {result.get('mark_iv')}%")
+                _print(f"   Bid IV: {result.get('bid_iv')}%")
+                _print(f"   Ask IV: {result.get('ask_iv')}%")
+                _print(f"   Underlying Price: ${result.get('underlying_price')}")
 
                 greeks = result.get('greeks', {})
                 if greeks:
-                    print(f"\n   Greeks:")
-                    print(f"   Delta: {greeks.get('delta')}")
-                    print(f"   Gamma: {greeks.get('gamma')}")
-                    print(f"   Vega: {greeks.get('vega')}")
-                    print(f"   Theta: {greeks.get('theta')}")
-                    print(f"   Rho: {greeks.get('rho')}")
+                    _print(f"\n   Greeks:")
+                    _print(f"   Delta: {greeks.get('delta')}")
+                    _print(f"   Gamma: {greeks.get('gamma')}")
+                    _print(f"   Vega: {greeks.get('vega')}")
+                    _print(f"   Theta: {greeks.get('theta')}")
+                    _print(f"   Rho: {greeks.get('rho')}")
 
                 return True
             else:
-                print(f"❌ FAILED")
+                _print(f"❌ FAILED")
                 return False
 
         except Exception as e:
-            print(f"❌ Error: {e}")
+            _print(f"❌ Error: {e}")
             return False
 
-    def test_expired_option(self):
+    async def test_expired_option(self):
         """
         Critical test: Can we get historical data for EXPIRED options?
         """
-        print("\n" + "=" * 80)
-        print("CRITICAL TEST: EXPIRED OPTIONS HISTORICAL DATA")
-        print("=" * 80)
+        _print("\n" + "=" * 80)
+        _print("CRITICAL TEST: EXPIRED OPTIONS HISTORICAL DATA")
+        _print("=" * 80)
 
         # Get expired BTC options
-        expired_options = self.get_instruments(currency="BTC", kind="option", expired=True)
+        expired_options = await self.get_instruments(currency="BTC", kind="option", expired=True)
 
         if not expired_options:
-            print("❌ No expired options found")
+            _print("❌ No expired options found")
             return False
 
         # Try to get chart data for an expired option
         test_option = expired_options[0]
         instrument_name = test_option['instrument_name']
 
-        print(f"\n📊 Testing with expired option: {instrument_name}")
-        print(f"   Expiration: {datetime.fromtimestamp(test_option['expiration_timestamp']/1000)}")
+        _print(f"\n📊 Testing with expired option: {instrument_name}")
+        _print(f"   Expiration: {datetime.fromtimestamp(test_option['expiration_timestamp']/1000)}")
 
-        success, candles = self.check_tradingview_chart_data(instrument_name, resolution=60)
+        success, candles = await self.check_tradingview_chart_data(instrument_name, resolution=60)
 
         if success:
-            print(f"\n✅ EXCELLENT! We CAN get historical data for expired options!")
-            print(f"   This means we can backfill old options data")
+            _print(f"\n✅ EXCELLENT! We CAN get historical data for expired options!")
+            _print(f"   This means we can backfill old options data")
             return True
         else:
-            print(f"\n❌ PROBLEM! Cannot get historical data for expired options")
-            print(f"   This means Deribit API may not support historical options backfill")
+            _print(f"\n❌ PROBLEM! Cannot get historical data for expired options")
+            _print(f"   This means Deribit API may not support historical options backfill")
             return False
 
-    def test_active_option(self):
+    async def test_active_option(self):
         """
         Test: Can we get historical data for ACTIVE (non-expired) options?
         """
-        print("\n" + "=" * 80)
-        print("TEST: ACTIVE OPTIONS HISTORICAL DATA")
-        print("=" * 80)
+        _print("\n" + "=" * 80)
+        _print("TEST: ACTIVE OPTIONS HISTORICAL DATA")
+        _print("=" * 80)
 
         # Get active BTC options
-        active_options = self.get_instruments(currency="BTC", kind="option", expired=False)
+        active_options = await self.get_instruments(currency="BTC", kind="option", expired=False)
 
         if not active_options:
-            print("❌ No active options found")
+            _print("❌ No active options found")
             return False
 
         # Find a relatively old active option (closest to expiry)
@@ -223,28 +320,28 @@ class DeribitHistoricalChecker:
         test_option = sorted_options[0]  # Get the soonest to expire
         instrument_name = test_option['instrument_name']
 
-        print(f"\n📊 Testing with active option: {instrument_name}")
-        print(f"   Expiration: {datetime.fromtimestamp(test_option['expiration_timestamp']/1000)}")
-        print(f"   Strike: ${test_option.get('strike')}")
+        _print(f"\n📊 Testing with active option: {instrument_name}")
+        _print(f"   Expiration: {datetime.fromtimestamp(test_option['expiration_timestamp']/1000)}")
+        _print(f"   Strike: ${test_option.get('strike')}")
 
         # Test TradingView chart data
-        success, candles = self.check_tradingview_chart_data(instrument_name, resolution=60)
+        success, candles = await self.check_tradingview_chart_data(instrument_name, resolution=60)
 
         if success and candles > 0:
-            print(f"\n✅ SUCCESS! We CAN get historical data for active options")
-            print(f"   Received {candles} candles")
+            _print(f"\n✅ SUCCESS! We CAN get historical data for active options")
+            _print(f"   Received {candles} candles")
             return True
         else:
-            print(f"\n⚠️  LIMITED! Only {candles} candles available")
+            _print(f"\n⚠️  LIMITED! Only {candles} candles available")
             return False
 
-    def test_different_resolutions(self, instrument_name):
+    async def test_different_resolutions(self, instrument_name):
         """
         Test what resolutions are available: 1min, 5min, 15min, 60min, 1D
         """
-        print("\n" + "=" * 80)
-        print(f"TESTING DIFFERENT RESOLUTIONS FOR: {instrument_name}")
-        print("=" * 80)
+        _print("\n" + "=" * 80)
+        _print(f"TESTING DIFFERENT RESOLUTIONS FOR: {instrument_name}")
+        _print("=" * 80)
 
         resolutions = {
             "1": "1 minute",
@@ -254,15 +351,13 @@ class DeribitHistoricalChecker:
             "D": "1 day"
         }
 
-        results = {}
-
-        for res_id, res_name in resolutions.items():
-            print(f"\nTesting {res_name}...")
-
-            url = f"{self.base_url}/public/get_tradingview_chart_data"
-            end_timestamp = int(datetime.now().timestamp() * 1000)
-            start_timestamp = int((datetime.now() - timedelta(days=7)).timestamp() * 1000)
+        # Same window for every resolution so the candle counts are comparable
+        now = datetime.now()
+        end_timestamp = int(now.timestamp() * 1000)
+        start_timestamp = int((now - timedelta(days=7)).timestamp() * 1000)
 
+        async def _fetch_resolution(res_id):
+            """Fetch one resolution; returns (candle count, error message or None)"""
             params = {
                 "instrument_name": instrument_name,
                 "start_timestamp": start_timestamp,
@@ -271,30 +366,41 @@ class DeribitHistoricalChecker:
             }
 
             try:
-                response = requests.get(url, params=params)
-                data = response.json()
+                status, data = await self._get(self._URL_CHART, params)
 
-                if response.status_code == 200 and data.get('result'):
-                    ticks = data['result'].get('ticks', [])
-                    results[res_name] = len(ticks)
-                    print(f"  ✅ {res_name}: {len(ticks)} candles")
-                else:
-                    results[res_name] = 0
-                    print(f"  ❌ {res_name}: Not available")
+                if status == 200 and data.get('result'):
+                    return len(data['result'].get('ticks', [])), None
+                return 0, None
 
             except Exception as e:
-                results[res_name] = 0
-                print(f"  ❌ {res_name}: Error - {e}")
+                return 0, str(e)
+
+        # The requests are independent: run them concurrently on the shared
+        # session (wall-clock = slowest request instead of the sum)
+        _print(f"\nTesting {', '.join(resolutions.values())}...")
+        fetched = await asyncio.gather(*(_fetch_resolution(res_id) for res_id in resolutions))
+
+        results = {}
+
+        for res_name, (count, error) in zip(resolutions.values(), fetched):
+            results[res_name] = count
+            if error:
+                _print(f"  ❌ {res_name}: Error - {error}")
+            elif count > 0:
+                _print(f"  ✅ {res_name}: {count} candles")
+            else:
+                _print(f"  ❌ {res_name}: Not available")
 
-        print(f"\n📊 RESOLUTION SUMMARY:")
-        for res_name, count in results.items():
-            status = "✅ Available" if count > 0 else "❌ Not available"
-            print(f"  {res_name}: {status} ({count} candles)")
+        summary = "\n".join(
+            f"  {res_name}: {'✅ Available' if count > 0 else '❌ Not available'} ({count} candles)"
+            for res_name, count in results.items()
+        )
+        _print(f"\n📊 RESOLUTION SUMMARY:\n{summary}")
 
         return results
 
 
-def main():
+async def main():
     """Main verification flow"""
     print("\n" + "=" * 80)
     print("DERIBIT HISTORICAL OPTIONS DATA VERIFICATION")
@@ -305,70 +411,95 @@ def main():
 
     checker = DeribitHistoricalChecker()
 
-    # Test 1: Get active BTC options
-    print("📋 TEST 1: GET ACTIVE BTC OPTIONS")
-    active_btc = checker.get_instruments(currency="BTC", kind="option", expired=False)
-
-    # Test 2: Get active ETH options
-    print("\n📋 TEST 2: GET ACTIVE ETH OPTIONS")
-    active_eth = checker.get_instruments(currency="ETH", kind="option", expired=False)
-
-    # Test 3: Get expired BTC options
-    print("\n📋 TEST 3: GET EXPIRED BTC OPTIONS")
-    expired_btc = checker.get_instruments(currency="BTC", kind="option", expired=True)
-
-    # Test 4: Test historical data for active option
-    print("\n📋 TEST 4: HISTORICAL DATA FOR ACTIVE OPTION")
-    active_success = checker.test_active_option()
-
-    # Test 5: CRITICAL - Test historical data for expired option
-    print("\n📋 TEST 5: HISTORICAL DATA FOR EXPIRED OPTION (CRITICAL!)")
-    expired_success = checker.test_expired_option()
-
-    # Test 6: Test different resolutions
-    if active_btc:
-        print("\n📋 TEST 6: TEST DIFFERENT TIME RESOLUTIONS")
-        test_instrument = active_btc[0]['instrument_name']
-        resolution_results = checker.test_different_resolutions(test_instrument)
+    try:
+        # Tests 1-3 are independent: fetch the instrument lists concurrently,
+        # then print each report in test order
+        (active_btc, out_btc), (active_eth, out_eth), (expired_btc, out_expired) = await asyncio.gather(
+            _run_buffered(checker.get_instruments(currency="BTC", kind="option", expired=False)),
+            _run_buffered(checker.get_instruments(currency="ETH", kind="option", expired=False)),
+            _run_buffered(checker.get_instruments(currency="BTC", kind="option", expired=True))
+        )
+
+        # Test 1: Get active BTC options
+        print("📋 TEST 1: GET ACTIVE BTC OPTIONS")
+        print(out_btc, end="")
+
+        # Test 2: Get active ETH options
+        print("\n📋 TEST 2: GET ACTIVE ETH OPTIONS")
+        print(out_eth, end="")
+
+        # Test 3: Get expired BTC options
+        print("\n📋 TEST 3: GET EXPIRED BTC OPTIONS")
+        print(out_expired, end="")
+
+        # Tests 4-7 only read the (now cached) instrument lists; run them
+        # concurrently too
+        tests = [
+            checker.test_active_option(),
+            checker.test_expired_option()
+        ]
+        if active_btc:
+            test_instrument = active_btc[0]['instrument_name']
+            tests.append(checker.test_different_resolutions(test_instrument))
+            tests.append(checker.check_ticker_data(test_instrument))
+
+        results = await asyncio.gather(*(_run_buffered(test) for test in tests))
+
+        # Test 4: Test historical data for active option
+        print("\n📋 TEST 4: HISTORICAL DATA FOR ACTIVE OPTION")
+        active_success, output = results[0]
+        print(output, end="")
+
+        # Test 5: CRITICAL - Test historical data for expired option
+        print("\n📋 TEST 5: HISTORICAL DATA FOR EXPIRED OPTION (CRITICAL!)")
+        expired_success, output = results[1]
+        print(output, end="")
+
+        if active_btc:
+            # Test 6: Test different resolutions
+            print("\n📋 TEST 6: TEST DIFFERENT TIME RESOLUTIONS")
+            resolution_results, output = results[2]
+            print(output, end="")
+
+            # Test 7: Test ticker endpoint
+            print("\n📋 TEST 7: TEST TICKER ENDPOINT (CURRENT DATA)")
+            print(results[3][1], end="")
+
+        # Final Summary
+        print("\n" + "=" * 80)
+        print("VERIFICATION SUMMARY")
+        print("=" * 80)
 
-    # Test 7: Test ticker endpoint
-    if active_btc:
-        print("\n📋 TEST 7: TEST TICKER ENDPOINT (CURRENT DATA)")
-        test_instrument = active_btc[0]['instrument_name']
-        checker.check_ticker_data(test_instrument)
+        print(f"\n📊 Available Instruments:")
+        print(f"  Active BTC Options: {len(active_btc)}")
+        print(f"  Active ETH Options: {len(active_eth)}")
+        print(f"  Expired BTC Options: {len(expired_btc)}")
 
-    # Final Summary
-    print("\n" + "=" * 80)
-    print("VERIFICATION SUMMARY")
-    print("=" * 80)
+        print(f"\n📈 Historical Data Availability:")
+        print(f"  Active options: {'✅ YES' if active_success else '❌ NO'}")
+        print(f"  Expired options: {'✅ YES' if expired_success else '❌ NO'}")
 
-    print(f"\n📊 Available Instruments:")
-    print(f"  Active BTC Options: {len(active_btc)}")
-    print(f"  Active ETH Options: {len(active_eth)}")
-    print(f"  Expired BTC Options: {len(expired_btc)}")
-
-    print(f"\n📈 Historical Data Availability:")
-    print(f"  Active options: {'✅ YES' if active_success else '❌ NO'}")
-    print(f"  Expired options: {'✅ YES' if expired_success else '❌ NO'}")
+        print("\n" + "=" * 80)
+        print("CONCLUSION")
+        print("=" * 80)
 
-    print("\n" + "=" * 80)
-    print("CONCLUSION")
-    print("=" * 80)
+        if active_success and expired_success:
+            print("✅ EXCELLENT! Deribit provides historical options data!")
+            print("   You CAN backfill historical options using Deribit API (FREE)")
+            print("   Recommended approach: Backfill from Deribit API directly")
+        elif active_success and not expired_success:
+            print("⚠️  PARTIAL! Deribit provides historical data for ACTIVE options only")
+            print("   You can backfill recent options, but NOT old expired ones")
+            print("   Recommendation: Use Deribit for recent, consider paid provider for old data")
+        else:
+            print("❌ LIMITED! Deribit may not provide sufficient historical options data")
+            print("   Recommendation: Consider paid data providers (CryptoDataDownload, CoinAPI)")
 
-    if active_success and expired_success:
-        print("✅ EXCELLENT! Deribit provides historical options data!")
-        print("   You CAN backfill historical options using Deribit API (FREE)")
-        print("   Recommended approach: Backfill from Deribit API directly")
-    elif active_success and not expired_success:
-        print("⚠️  PARTIAL! Deribit provides historical data for ACTIVE options only")
-        print("   You can backfill recent options, but NOT old expired ones")
-        print("   Recommendation: Use Deribit for recent, consider paid provider for old data")
-    else:
-        print("❌ LIMITED! Deribit may not provide sufficient historical options data")
-        print("   Recommendation: Consider paid data providers (CryptoDataDownload, CoinAPI)")
+        print("=" * 80 + "\n")
 
-    print("=" * 80 + "\n")
+    finally:
+        await checker.close()
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -14,15 +14,20 @@ Usage:
 """
 
 import asyncio
-import json
 import logging
+import math
 import os
 import sys
-from typing import List, Dict, Optional
-from datetime import datetime
+import time
+import zlib
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timezone
 import aiohttp
 from dotenv import load_dotenv
 
+from scripts.event_loop import install_uvloop
+from scripts.json_codec import json_dumps, json_loads
+
 # Load environment variables
 load_dotenv()
 
@@ -41,51 +46,177 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# On-disk instrument cache (one file per currency per UTC day)
+INSTRUMENT_CACHE_DIR = os.path.expanduser(
+    os.getenv('INSTRUMENT_CACHE_DIR', '~/.cache/datadownloader')
+)
+INSTRUMENT_CACHE_MAX_AGE_SEC = 3600
+
+# Background stale-while-revalidate refreshes (referenced so they aren't GC'd)
+_refresh_tasks: set = set()
+
+def _instrument_cache_path(currency: str) -> str:
+    """Return today's (UTC) instrument cache file path for a currency."""
+    day = datetime.now(timezone.utc).strftime('%Y%m%d')
+    return os.path.join(INSTRUMENT_CACHE_DIR, f"instruments_{currency}_{day}.json")
 
-async def fetch_all_options(currency: str) -> List[Dict]:
+
+def _load_cached_instruments(currency: str) -> Tuple[Optional[List[Dict]], bool]:
     """
-    Fetch ALL active options for a currency from Deribit API.
+    Load today's cached instrument list for a currency.
 
     Args:
         currency: 'BTC' or 'ETH'
 
     Returns:
-        List of instrument dictionaries with 'instrument_name', 'expiration_timestamp', etc.
+        (instruments, fresh) - instruments is None on a cache miss; fresh is
+        False when the file is older than INSTRUMENT_CACHE_MAX_AGE_SEC
+    """
+    path = _instrument_cache_path(currency)
+
+    try:
+        age = time.time() - os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            instruments = json_loads(f.read())
+    except FileNotFoundError:
+        return None, False
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable instrument cache %s: %s", path, e)
+        return None, False
+
+    return instruments, age < INSTRUMENT_CACHE_MAX_AGE_SEC
+
+
+def _store_cached_instruments(currency: str, instruments: List[Dict]):
+    """
+    Atomically write the instrument list to today's cache file.
+
+    Written to a temp file and os.replace()d into place, so concurrent
+    CONNECTION_ID processes never read a partially written file.
+
+    Args:
+        currency: 'BTC' or 'ETH'
+        instruments: Instrument dicts as returned by fetch_all_options()
+    """
+    path = _instrument_cache_path(currency)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        os.makedirs(INSTRUMENT_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(json_dumps(instruments))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Failed to write instrument cache %s: %s", path, e)
+
+
+async def _refresh_cached_instruments(currency: str, connector: Optional[aiohttp.TCPConnector]):
+    """Re-fetch instruments in the background to refresh a stale cache."""
+    try:
+        await _fetch_options_from_api(currency, connector)
+    except Exception as e:
+        logger.warning("Background refresh of %s instruments failed: %s", currency, e)
+
+
+async def fetch_all_options(
+    currency: str,
+    connector: Optional[aiohttp.TCPConnector] = None
+) -> List[Dict]:
+    """
+    Fetch ALL active options for a currency, using the on-disk cache.
+
+    A cache file younger than INSTRUMENT_CACHE_MAX_AGE_SEC is returned
+    without touching the network. An older file from the same day is still
+    returned immediately (stale-while-revalidate) while a background task
+    re-fetches it for the next caller. Otherwise the API is queried.
+
+    Args:
+        currency: 'BTC' or 'ETH'
+        connector: Shared TCP connector (keep-alive pool + DNS cache); a
+            private one is used for the call if None
+
+    Returns:
+        List of instrument dictionaries with only 'instrument_name' and
+        'expiration_timestamp' (the fields the orchestrator uses)
+    """
+    cached, fresh = _load_cached_instruments(currency)
+
+    if cached is not None:
+        if not fresh:
+            task = asyncio.create_task(_refresh_cached_instruments(currency, connector))
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+
+        logger.info(
+            "Using %s cached %s options (%d instruments)",
+            'fresh' if fresh else 'stale', currency, len(cached)
+        )
+        return cached
+
+    return await _fetch_options_from_api(currency, connector)
+
+
+async def _fetch_options_from_api(
+    currency: str,
+    connector: Optional[aiohttp.TCPConnector] = None
+) -> List[Dict]:
+    """
+    Fetch ALL active options for a currency from Deribit API and cache them.
+
+    Args:
+        currency: 'BTC' or 'ETH'
+        connector: Shared TCP connector; a private one is used if None
+
+    Returns:
+        List of instrument dictionaries with only 'instrument_name' and
+        'expiration_timestamp' (the fields the orchestrator uses)
     """
     url = "https://www.deribit.com/api/v2/public/get_instruments"
     params = {
         'currency': currency,
-        'kind': 'option'
+        'kind': 'option',
+        'expired': 'false'  # Deribit drops expired series server-side
     }
 
-    logger.info(f"Fetching ALL {currency} options from Deribit API...")
+    logger.info("Fetching ALL %s options from Deribit API...", currency)
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params) as response:
+    # The session is a thin wrapper; pooled connections live in the connector
+    async with aiohttp.ClientSession(connector=connector, connector_owner=connector is None) as session:
+        async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
             if response.status != 200:
                 raise Exception(f"Deribit API error: {response.status}")
 
-            data = await response.json()
+            data = json_loads(await response.read())
 
             if 'result' not in data:
                 raise Exception(f"Invalid Deribit API response: {data}")
 
-            instruments = data['result']
-
-            # Filter only active instruments
+            # Keep only active instruments, projected to the two fields used
+            # downstream so the full API dicts (~20 keys each) can be freed early
             active_instruments = [
-                inst for inst in instruments
+                {
+                    'instrument_name': inst['instrument_name'],
+                    'expiration_timestamp': inst.get('expiration_timestamp')
+                }
+                for inst in data['result']
                 if inst.get('is_active', True)
             ]
+            del data
+
+            logger.info("Retrieved %d active %s options from API", len(active_instruments), currency)
 
-            logger.info(f"Retrieved {len(active_instruments)} active {currency} options from API")
+            _store_cached_instruments(currency, active_instruments)
 
             return active_instruments
 
 
-async def filter_expired_instruments(instruments: List[Dict]) -> List[Dict]:
+def filter_expired_instruments(instruments: List[Dict]) -> List[Dict]:
     """
-    Filter out expired or about-to-expire instruments.
+    Filter out instruments about to expire.
+
+    fetch_all_options() already requests expired=false, so this only drops
+    the tail of instruments expiring within the next 5 minutes (and any
+    without an expiration timestamp).
 
     Args:
         instruments: List of instrument dicts
@@ -93,58 +224,73 @@ async def filter_expired_instruments(instruments: List[Dict]) -> List[Dict]:
     Returns:
         List of active (non-expired) instruments
     """
+    if not instruments:
+        return []
+
     from datetime import datetime, timezone, timedelta
 
     now = datetime.now(timezone.utc)
     buffer = timedelta(minutes=5)  # Filter instruments expiring within 5 minutes
 
-    active = []
-    for inst in instruments:
-        expiry_ts = inst.get('expiration_timestamp')
-        if expiry_ts:
-            expiry_time = datetime.fromtimestamp(expiry_ts / 1000, tz=timezone.utc)
-            if expiry_time > now + buffer:
-                active.append(inst)
+    # Compare in Deribit's native epoch-ms ints; no datetime per instrument
+    cutoff_ms = int((now + buffer).timestamp() * 1000)
+
+    active = [
+        inst for inst in instruments
+        if (expiry_ts := inst.get('expiration_timestamp')) and expiry_ts > cutoff_ms
+    ]
 
-    logger.info(f"Filtered {len(instruments) - len(active)} expired instruments")
+    logger.info("Filtered %d expired instruments", len(instruments) - len(active))
     return active
 
 
 def partition_instruments(instruments: List[Dict], max_per_partition: int = 250) -> List[List[str]]:
     """
-    Partition instruments into groups of max_per_partition.
+    Partition instruments into groups of at most max_per_partition.
+
+    The partition count is fixed at ceil(n / max_per_partition), matching
+    the CONNECTION_IDs deployed. Each instrument goes to the partition
+    picked by a stable hash of its name, or, if that one is full, the next
+    partition with room. Names are placed in sorted order, so the split
+    doesn't depend on the order the API returns instruments in, and
+    CONNECTION_ID processes started minutes apart agree on it. crc32 is
+    used rather than hash(), which is salted per process.
 
     Args:
         instruments: List of instrument dicts
         max_per_partition: Maximum instruments per partition (default 250 = 500 channels)
 
     Returns:
-        List of partitions, each containing list of instrument names
+        List of partitions, each containing a sorted list of instrument names
     """
-    # Extract instrument names
-    instrument_names = [inst['instrument_name'] for inst in instruments]
+    instrument_names = sorted(inst['instrument_name'] for inst in instruments)
 
-    # Partition using simple slicing (round-robin)
-    partitions = []
-    for i in range(0, len(instrument_names), max_per_partition):
-        partition = instrument_names[i:i + max_per_partition]
-        partitions.append(partition)
+    num_partitions = max(1, math.ceil(len(instrument_names) / max_per_partition))
+    partitions: List[List[str]] = [[] for _ in range(num_partitions)]
 
+    for name in instrument_names:
+        index = zlib.crc32(name.encode()) % num_partitions
+        # Hashing isn't perfectly even: overflow into the next partition with
+        # room (total capacity covers every name, so this always terminates)
+        while len(partitions[index]) >= max_per_partition:
+            index = (index + 1) % num_partitions
+        partitions[index].append(name)
+
+    # One log record for the whole summary instead of one per partition
+    summary = "\n".join(f"  Partition {i}: {len(p)} instruments" for i, p in enumerate(partitions))
     logger.info(
-        f"Partitioned {len(instrument_names)} instruments into "
-        f"{len(partitions)} partitions (max {max_per_partition} per partition)"
+        "Partitioned %d instruments into %d partitions (max %d per partition):\n%s",
+        len(instrument_names), len(partitions), max_per_partition, summary
     )
 
-    for i, p in enumerate(partitions):
-        logger.info(f"  Partition {i}: {len(p)} instruments")
-
     return partitions
 
 
 async def get_partition_for_connection(
     currency: str,
     connection_id: int,
-    max_per_partition: int = 250
+    max_per_partition: int = 250,
+    connector: Optional[aiohttp.TCPConnector] = None
 ) -> List[str]:
     """
     Get the instrument partition assigned to this connection.
@@ -153,15 +299,16 @@ async def get_partition_for_connection(
         currency: 'BTC' or 'ETH'
         connection_id: Connection ID (0-indexed)
         max_per_partition: Max instruments per partition
+        connector: Shared TCP connector passed through to fetch_all_options()
 
     Returns:
         List of instrument names assigned to this connection
     """
     # Fetch all options
-    all_instruments = await fetch_all_options(currency)
+    all_instruments = await fetch_all_options(currency, connector)
 
-    # Filter expired
-    active_instruments = await filter_expired_instruments(all_instruments)
+    # Drop instruments expiring within the safety buffer
+    active_instruments = filter_expired_instruments(all_instruments)
 
     # Partition
     partitions = partition_instruments(active_instruments, max_per_partition)
@@ -177,8 +324,8 @@ async def get_partition_for_connection(
     assigned_partition = partitions[connection_id]
 
     logger.info(
-        f"Connection {connection_id} assigned {len(assigned_partition)} instruments "
-        f"(partition {connection_id+1}/{len(partitions)})"
+        "Connection %d assigned %d instruments (partition %d/%d)",
+        connection_id, len(assigned_partition), connection_id + 1, len(partitions)
     )
 
     return assigned_partition
@@ -189,14 +336,24 @@ async def main():
     Main entry point for multi-connection orchestrator.
     This fetches the partition for this CONNECTION_ID and runs the WebSocket collector.
     """
-    logger.info(f"Starting multi-connection orchestrator for {CURRENCY}, Connection ID: {CONNECTION_ID}")
+    logger.info("Starting multi-connection orchestrator for %s, Connection ID: %d", CURRENCY, CONNECTION_ID)
+
+    # One connection pool and DNS cache for every HTTP call in this process
+    # (instrument fetch here, orderbook snapshots in the collector)
+    connector = aiohttp.TCPConnector(
+        limit=100,
+        keepalive_timeout=75,
+        ttl_dns_cache=600,
+        use_dns_cache=True,
+        force_close=False
+    )
 
     try:
         # Get assigned partition
-        instruments = await get_partition_for_connection(CURRENCY, CONNECTION_ID)
+        instruments = await get_partition_for_connection(CURRENCY, CONNECTION_ID, connector=connector)
 
-        logger.info(f"Starting WebSocket collector for {len(instruments)} instruments...")
-        logger.info(f"First 5 instruments: {instruments[:5]}")
+        logger.info("Starting WebSocket collector for %d instruments...", len(instruments))
+        logger.info("First 5 instruments: %s", instruments[:5])
 
         # Import and run the WebSocket collector
         from scripts.ws_tick_collector_multi import WebSocketTickCollector
@@ -219,7 +376,8 @@ async def main():
             top_n_instruments=0,  # Not used - we provide instruments directly
             buffer_size_quotes=BUFFER_SIZE_QUOTES,
             buffer_size_trades=BUFFER_SIZE_TRADES,
-            flush_interval_sec=FLUSH_INTERVAL_SEC
+            flush_interval_sec=FLUSH_INTERVAL_SEC,
+            http_connector=connector
         )
 
         # Override instruments list with our partition
@@ -232,11 +390,11 @@ async def main():
             port=CONTROL_API_PORT
         )
 
-        logger.info(f"Starting HTTP control API on port {CONTROL_API_PORT}...")
+        logger.info("Starting HTTP control API on port %d...", CONTROL_API_PORT)
         await control_api.start()
 
         # Start collector (skips instrument fetching since we already set instruments)
-        logger.info(f"Starting collector for {CURRENCY} connection {CONNECTION_ID}...")
+        logger.info("Starting collector for %s connection %d...", CURRENCY, CONNECTION_ID)
 
         # Run collector and API concurrently
         try:
@@ -247,13 +405,16 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received")
     except Exception as e:
-        logger.error(f"Fatal error: {e}", exc_info=True)
+        logger.error("Fatal error: %s", e, exc_info=True)
         sys.exit(1)
+    finally:
+        await connector.close()
 
 
 if __name__ == "__main__":
     # Ensure logs directory exists
     os.makedirs('logs', exist_ok=True)
 
-    # Run orchestrator
+    # Run orchestrator (on uvloop when available)
+    install_uvloop()
     asyncio.run(main())
@@ -25,12 +25,15 @@ import logging
 import os
 import signal
 import sys
-from datetime import datetime, timedelta
+import time
+from dataclasses import dataclass
 from typing import List, Dict, Optional, Set
 import websockets
 from dotenv import load_dotenv
 
 # Import our custom modules
+from scripts.event_loop import install_uvloop
+from scripts.json_codec import json_dumps, json_loads
 from scripts.tick_buffer import TickBuffer
 from scripts.tick_writer_perp import PerpetualTickWriter
 
@@ -50,6 +53,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Adaptive flush: the interval halves after a flush that found any buffer
+# above FLUSH_SPEEDUP_PCT full and grows 1.5x when all stayed below
+# FLUSH_BACKOFF_PCT, within [MIN_FLUSH_INTERVAL_SEC, MAX_FLUSH_INTERVAL_SEC].
+# A buffer crossing its flush threshold (80%) wakes the loop immediately.
+MIN_FLUSH_INTERVAL_SEC = 0.05
+MAX_FLUSH_INTERVAL_SEC = 5.0
+FLUSH_SPEEDUP_PCT = 60.0
+FLUSH_BACKOFF_PCT = 10.0
+
+# Stored depth sizes (pg_column_size over recent rows) are sampled every
+# this many 60s stats cycles; the query is too heavy to run every minute
+DEPTH_SIZE_SAMPLE_CYCLES = 60
+
+
+@dataclass(slots=True)
+class CollectorStats:
+    """Cumulative collector counters (slotted: bumped on every message)."""
+    connection_attempts: int = 0
+    reconnections: int = 0
+    ticks_processed: int = 0
+    quotes_received: int = 0
+    trades_received: int = 0
+    depth_received: int = 0
+    flush_overruns: int = 0
+    errors: int = 0
+
 
 class PerpetualOrderbookSnapshotFetcher:
     """
@@ -59,7 +88,10 @@ class PerpetualOrderbookSnapshotFetcher:
     def __init__(self, database_url: str, rest_api_url: str = "https://www.deribit.com/api/v2"):
         self.database_url = database_url
         self.rest_api_url = rest_api_url
-        self.writer = PerpetualTickWriter(database_url)
+        self.writer = PerpetualTickWriter(
+            database_url,
+            local_socket_dir=os.getenv('POSTGRES_SOCKET_DIR')
+        )
         logger.info("PerpetualOrderbookSnapshotFetcher initialized")
 
     async def fetch_and_populate(self, instruments: List[str], save_full_depth: bool = False) -> Dict[str, int]:
@@ -161,8 +193,11 @@ class PerpetualOrderbookSnapshotFetcher:
                 if not bids and not asks and mark_price is None:
                     return None
 
+                # Raw epoch ms; the writer converts to datetime per batch
+                timestamp_ms = result['timestamp']
+
                 quote = {
-                    'timestamp': datetime.fromtimestamp(result['timestamp'] / 1000),
+                    'timestamp': timestamp_ms,
                     'instrument': result['instrument_name'],
                     'best_bid_price': best_bid_price,
                     'best_bid_amount': best_bid_amount,
@@ -176,14 +211,13 @@ class PerpetualOrderbookSnapshotFetcher:
 
                 depth = None
                 if save_full_depth:
-                    bids_json = [{"price": float(b[0]), "amount": float(b[1])} for b in bids] if bids else []
-                    asks_json = [{"price": float(a[0]), "amount": float(a[1])} for a in asks] if asks else []
-
+                    # Deribit's [[price, amount], ...] ladders (the layout schema/004
+                    # documents) serialised once here; the writer passes the text through
                     depth = {
-                        'timestamp': datetime.fromtimestamp(result['timestamp'] / 1000),
+                        'timestamp': timestamp_ms,
                         'instrument': result['instrument_name'],
-                        'bids': bids_json,
-                        'asks': asks_json,
+                        'bids': json_dumps(bids).decode(),
+                        'asks': json_dumps(asks).decode(),
                         'mark_price': mark_price,
                         'index_price': index_price,
                         'funding_rate': result.get('funding_8h'),
@@ -219,35 +253,35 @@ class WebSocketPerpetualCollector:
         # Perpetual instruments (hardcoded)
         self.instruments = ['BTC-PERPETUAL', 'ETH-PERPETUAL']
 
+        # Set by the buffer at its flush threshold to wake the flush loop early
+        self._flush_event = asyncio.Event()
+
         # Components
         self.buffer = TickBuffer(
             max_quotes=buffer_size_quotes,
             max_trades=buffer_size_trades,
-            max_depth=50000
+            max_depth=50000,
+            flush_event=self._flush_event
+        )
+        self.writer = PerpetualTickWriter(
+            database_url,
+            local_socket_dir=os.getenv('POSTGRES_SOCKET_DIR')
         )
-        self.writer = PerpetualTickWriter(database_url)
 
         # State
         self.subscribed_channels: Set[str] = set()
+        self._subscription_payload: Optional[str] = None  # built on first subscribe, reused on reconnect
         self.ws = None
         self.running = False
         self.reconnect_delay = 1
         self.max_reconnect_delay = 60
 
         # Heartbeat monitoring
-        self.last_tick_time: Optional[datetime] = None
+        self.last_tick_time: Optional[float] = None  # time.monotonic() of the last tick
         self.heartbeat_timeout_sec = 10
 
         # Statistics
-        self.stats = {
-            'connection_attempts': 0,
-            'reconnections': 0,
-            'ticks_processed': 0,
-            'quotes_received': 0,
-            'trades_received': 0,
-            'depth_received': 0,
-            'errors': 0
-        }
+        self.stats = CollectorStats()
 
         logger.info(
             f"WebSocketPerpetualCollector initialized: "
@@ -319,7 +353,7 @@ class WebSocketPerpetualCollector:
         """Main WebSocket connection loop with auto-reconnect."""
         while self.running:
             try:
-                self.stats['connection_attempts'] += 1
+                self.stats.connection_attempts += 1
 
                 logger.info(f"Connecting to WebSocket: {self.ws_url}")
                 async with websockets.connect(
@@ -337,16 +371,16 @@ class WebSocketPerpetualCollector:
 
             except websockets.exceptions.WebSocketException as e:
                 logger.error(f"WebSocket error: {e}")
-                self.stats['errors'] += 1
+                self.stats.errors += 1
                 await self._handle_reconnect()
 
             except Exception as e:
                 logger.error(f"Unexpected error in WebSocket loop: {e}", exc_info=True)
-                self.stats['errors'] += 1
+                self.stats.errors += 1
                 await self._handle_reconnect()
 
-    async def _subscribe_to_instruments(self):
-        """Subscribe to ticker and trade channels for all instruments."""
+    def _prepare_subscription(self):
+        """Build the subscribe frame once; the instrument set is fixed for the collector's lifetime."""
         channels = []
 
         for instrument in self.instruments:
@@ -362,11 +396,22 @@ class WebSocketPerpetualCollector:
             "id": 1
         }
 
-        logger.info(f"Subscribing to {len(channels)} channels ({len(self.instruments)} perpetuals)...")
-        await self.ws.send(json.dumps(subscription_msg))
+        # Kept as str: Deribit expects JSON-RPC over text frames
+        self._subscription_payload = json_dumps(subscription_msg).decode()
+
+    async def _subscribe_to_instruments(self):
+        """Subscribe to ticker and trade channels for all instruments."""
+        if self._subscription_payload is None:
+            self._prepare_subscription()
+
+        logger.info(
+            f"Subscribing to {2 * len(self.instruments)} channels "
+            f"({len(self.instruments)} perpetuals)..."
+        )
+        await self.ws.send(self._subscription_payload)
 
         response = await self.ws.recv()
-        response_data = json.loads(response)
+        response_data = json_loads(response)
 
         if 'result' in response_data:
             self.subscribed_channels = set(response_data['result'])
@@ -379,29 +424,31 @@ class WebSocketPerpetualCollector:
         """Process incoming WebSocket messages."""
         async for message in self.ws:
             try:
-                data = json.loads(message)
+                data = json_loads(message)
 
                 if 'params' in data:
                     channel = data['params'].get('channel', '')
                     tick_data = data['params'].get('data', {})
 
-                    self.last_tick_time = datetime.now()
+                    self.last_tick_time = time.monotonic()
 
+                    # Plain calls: the handlers only append to the buffer,
+                    # so no coroutine per message
                     if channel.startswith('ticker.'):
-                        await self._handle_quote_tick(tick_data)
+                        self._handle_quote_tick(tick_data)
                     elif channel.startswith('trades.'):
-                        await self._handle_trade_tick(tick_data)
+                        self._handle_trade_tick(tick_data)
 
-                    self.stats['ticks_processed'] += 1
+                    self.stats.ticks_processed += 1
 
-            except json.JSONDecodeError as e:
+            except json.JSONDecodeError as e:  # orjson's error subclasses this
                 logger.error(f"Failed to decode message: {e}")
-                self.stats['errors'] += 1
+                self.stats.errors += 1
             except Exception as e:
                 logger.error(f"Error processing message: {e}", exc_info=True)
-                self.stats['errors'] += 1
+                self.stats.errors += 1
 
-    async def _handle_quote_tick(self, data: Dict):
+    def _handle_quote_tick(self, data: Dict):
         """Handle quote tick from ticker.{instrument}.100ms channel.
 
         Ticker provides complete pricing data (bid/ask/mark/index/funding) in simple format.
@@ -423,8 +470,10 @@ class WebSocketPerpetualCollector:
         """
         try:
             quote = {
-                'timestamp': datetime.fromtimestamp(data['timestamp'] / 1000),
-                'instrument': data['instrument_name'],
+                'timestamp': data['timestamp'],  # epoch ms; converted at write time
+                # Interned: every buffered tick of an instrument shares one
+                # string instead of holding the copy each frame decodes
+                'instrument': sys.intern(data['instrument_name']),
                 'best_bid_price': data.get('best_bid_price'),
                 'best_bid_amount': data.get('best_bid_amount'),
                 'best_ask_price': data.get('best_ask_price'),
@@ -436,21 +485,21 @@ class WebSocketPerpetualCollector:
             }
 
             self.buffer.add_quote(quote)
-            self.stats['quotes_received'] += 1
+            self.stats.quotes_received += 1
 
         except Exception as e:
             logger.error(f"Failed to process quote tick: {e}")
-            self.stats['errors'] += 1
+            self.stats.errors += 1
 
-    async def _handle_trade_tick(self, data: Dict):
+    def _handle_trade_tick(self, data: Dict):
         """Handle trade tick from trades.{instrument}.100ms channel."""
         try:
             trades = data if isinstance(data, list) else [data]
 
             for trade_data in trades:
                 trade = {
-                    'timestamp': datetime.fromtimestamp(trade_data['timestamp'] / 1000),
-                    'instrument': trade_data['instrument_name'],
+                    'timestamp': trade_data['timestamp'],  # epoch ms
+                    'instrument': sys.intern(trade_data['instrument_name']),
                     'trade_id': trade_data['trade_id'],
                     'price': trade_data['price'],
                     'amount': trade_data['amount'],
@@ -460,41 +509,91 @@ class WebSocketPerpetualCollector:
                 }
 
                 self.buffer.add_trade(trade)
-                self.stats['trades_received'] += 1
+                self.stats.trades_received += 1
 
         except Exception as e:
             logger.error(f"Failed to process trade tick: {e}")
-            self.stats['errors'] += 1
+            self.stats.errors += 1
 
     async def _flush_loop(self):
-        """Periodic buffer flush loop."""
+        """
+        Periodic buffer flush loop on an adaptive, fixed-deadline schedule.
+
+        Sleeps until the next deadline rather than a full interval after
+        each flush, so flush time does not accumulate as drift. The interval
+        adapts to how full the buffers were at each flush (see
+        MIN_FLUSH_INTERVAL_SEC), and the buffer's flush event cuts a wait
+        short when one crosses its threshold. If a flush overruns by more
+        than an interval, the missed cycles are skipped (counted in
+        stats.flush_overruns) instead of flushing back to back.
+        """
+        loop = asyncio.get_running_loop()
+        interval = min(max(self.flush_interval_sec, MIN_FLUSH_INTERVAL_SEC), MAX_FLUSH_INTERVAL_SEC)
+        next_deadline = loop.time() + interval
         while self.running:
+            woken = False
             try:
-                await asyncio.sleep(self.flush_interval_sec)
+                try:
+                    await asyncio.wait_for(self._flush_event.wait(), timeout=max(0, next_deadline - loop.time()))
+                    woken = True
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_event.clear()
+
+                # Fill level this cycle reached, read before the flush empties it
+                buffer = self.buffer
+                utilization = max(
+                    buffer.get_quote_utilization(),
+                    buffer.get_trade_utilization(),
+                    buffer.get_depth_utilization()
+                )
 
-                if self.buffer.should_flush() or self.buffer.get_quote_count() > 0 or self.buffer.get_trade_count() > 0:
+                if buffer.get_quote_count() > 0 or buffer.get_trade_count() > 0 or buffer.get_depth_count() > 0:
                     await self._flush_buffers()
 
+                if utilization > FLUSH_SPEEDUP_PCT:
+                    interval = max(MIN_FLUSH_INTERVAL_SEC, interval * 0.5)
+                elif utilization < FLUSH_BACKOFF_PCT:
+                    interval = min(MAX_FLUSH_INTERVAL_SEC, interval * 1.5)
+
             except Exception as e:
                 logger.error(f"Error in flush loop: {e}", exc_info=True)
 
+            now = loop.time()
+            prev_deadline = next_deadline
+            # An early (threshold) flush restarts the cycle from now
+            next_deadline = now + interval if woken else prev_deadline + interval
+            # More than one interval past the deadline this cycle was due at
+            if now > prev_deadline + interval:
+                self.stats.flush_overruns += 1
+                logger.warning(f"[PERP] Flush overran schedule by {now - prev_deadline:.1f}s, skipping ahead")
+                next_deadline = now
+
     async def _flush_buffers(self):
         """Flush buffers to database."""
         try:
             quotes, trades, depth = self.buffer.get_and_clear()
 
+            # Each table goes out on its own pooled connection concurrently,
+            # so a flush costs one round of commit latency instead of three
+            writes = []
             if quotes:
-                await self.writer.write_quotes(quotes)
-
+                writes.append(self.writer.write_quotes(quotes))
             if trades:
-                await self.writer.write_trades(trades)
-
+                writes.append(self.writer.write_trades(trades))
             if depth:
-                await self.writer.write_depth_snapshots(depth)
+                writes.append(self.writer.write_depth_snapshots(depth))
+
+            # Let the other tables land even if one write fails; each failed
+            # table is logged and counted on its own
+            for result in await asyncio.gather(*writes, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to flush buffers: {result}", exc_info=result)
+                    self.stats.errors += 1
 
         except Exception as e:
             logger.error(f"Failed to flush buffers: {e}", exc_info=True)
-            self.stats['errors'] += 1
+            self.stats.errors += 1
 
     async def _heartbeat_monitor(self):
         """Monitor heartbeat and warn if no ticks received."""
@@ -503,7 +602,7 @@ class WebSocketPerpetualCollector:
                 await asyncio.sleep(self.heartbeat_timeout_sec)
 
                 if self.last_tick_time:
-                    time_since_last_tick = (datetime.now() - self.last_tick_time).total_seconds()
+                    time_since_last_tick = time.monotonic() - self.last_tick_time
 
                     if time_since_last_tick > self.heartbeat_timeout_sec:
                         logger.warning(
@@ -514,24 +613,30 @@ class WebSocketPerpetualCollector:
                 logger.error(f"Error in heartbeat monitor: {e}", exc_info=True)
 
     async def _stats_logger(self):
-        """Log statistics every 60 seconds."""
+        """Log statistics every 60 seconds (and depth storage sizes hourly)."""
+        cycles = 0
         while self.running:
             try:
                 await asyncio.sleep(60)
+                cycles += 1
 
                 buffer_stats = self.buffer.get_stats_summary()
                 writer_stats = self.writer.get_stats()
 
                 logger.info(
-                    f"[PERP] STATS | Ticks: {self.stats['ticks_processed']} "
-                    f"| Quotes: {self.stats['quotes_received']} "
-                    f"| Trades: {self.stats['trades_received']} "
-                    f"| Errors: {self.stats['errors']} "
+                    f"[PERP] STATS | Ticks: {self.stats.ticks_processed} "
+                    f"| Quotes: {self.stats.quotes_received} "
+                    f"| Trades: {self.stats.trades_received} "
+                    f"| Errors: {self.stats.errors} "
                     f"| Buffer: Q={buffer_stats['quotes']['utilization_pct']:.1f}% "
                     f"T={buffer_stats['trades']['utilization_pct']:.1f}% "
                     f"| DB Writes: Q={writer_stats['quotes_written']} T={writer_stats['trades_written']}"
                 )
 
+                if cycles % DEPTH_SIZE_SAMPLE_CYCLES == 0:
+                    # Logs the sample; writer.get_stats() reports the latest one
+                    await self.writer.sample_depth_sizes()
+
             except Exception as e:
                 logger.error(f"Error in stats logger: {e}", exc_info=True)
 
@@ -540,9 +645,9 @@ class WebSocketPerpetualCollector:
         if not self.running:
             return
 
-        self.stats['reconnections'] += 1
+        self.stats.reconnections += 1
 
-        logger.warning(f"Reconnecting in {self.reconnect_delay}s... (attempt {self.stats['reconnections']})")
+        logger.warning(f"Reconnecting in {self.reconnect_delay}s... (attempt {self.stats.reconnections})")
         await asyncio.sleep(self.reconnect_delay)
 
         self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
@@ -625,5 +730,6 @@ if __name__ == "__main__":
     # Ensure logs directory exists
     os.makedirs('logs', exist_ok=True)
 
-    # Run collector
+    # Run collector (on uvloop when available)
+    install_uvloop()
     asyncio.run(main())
@@ -20,37 +20,73 @@ Usage:
 """
 
 import asyncio
+import atexit
 import json
 import logging
+import logging.handlers
 import os
+import queue
 import signal
 import sys
+import time
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Set
 import websockets
 from dotenv import load_dotenv
 
 # Import our custom modules
+from scripts.event_loop import install_uvloop
+from scripts.json_codec import json_dumps, json_loads
 from scripts.instrument_fetcher import InstrumentFetcher
-from scripts.tick_buffer import TickBuffer
-from scripts.tick_writer import TickWriter
+from scripts.tick_buffer import ColumnarTickBuffer
+from scripts.tick_writer import (
+    TickWriter,
+    depth_records_from_columns,
+    quote_records_from_columns,
+    trade_records_from_columns,
+)
 from scripts.orderbook_snapshot import OrderbookSnapshotFetcher
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
+# Records are formatted by the QueueHandler and written by a listener thread,
+# so an error burst on the tick path never blocks the loop on stdout/file I/O
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('logs/ws_tick_collector.log')
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
+)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler('logs/ws_tick_collector.log')
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)  # drains pending records on exit
 logger = logging.getLogger(__name__)
 
+# Frames the parse worker handles back to back before yielding to the loop:
+# amortises the scheduler round trip under bursts while still letting the
+# flush and heartbeat tasks run
+PARSE_BATCH_SIZE = 64
+
+
+@dataclass(slots=True)
+class CollectorStats:
+    """Cumulative collector counters (slotted: bumped on every message)."""
+    connection_attempts: int = 0
+    reconnections: int = 0
+    ticks_processed: int = 0
+    quotes_received: int = 0
+    trades_received: int = 0
+    depth_received: int = 0
+    errors: int = 0
+
 
 class WebSocketTickCollector:
     """
@@ -90,37 +126,58 @@ class WebSocketTickCollector:
         self.top_n_instruments = top_n_instruments
         self.flush_interval_sec = flush_interval_sec
 
+        # Set by the buffer at 80% fill so a burst flushes before the timer
+        self._flush_event = asyncio.Event()
+
         # Components
         self.instrument_fetcher = InstrumentFetcher()
-        self.buffer = TickBuffer(
+        self.buffer = ColumnarTickBuffer(
             max_quotes=buffer_size_quotes,
             max_trades=buffer_size_trades,
-            max_depth=50000  # Buffer for full depth snapshots
+            max_depth=50000,  # Buffer for full depth snapshots
+            flush_event=self._flush_event
         )
         self.writer = TickWriter(database_url)
 
+        # Flushed batches wait here for the DB writer task, so a slow COPY
+        # never stalls the flush loop; the bound applies backpressure
+        self._write_q: asyncio.Queue = asyncio.Queue(maxsize=4)
+        self._writer_task: Optional[asyncio.Task] = None
+
+        # Raw frames between the recv loop and the parse worker; bounded so
+        # a slow parser back-pressures the socket instead of growing memory
+        self._msg_q: asyncio.Queue = asyncio.Queue(maxsize=8192)
+
+        # One snapshot fetcher for the initial and periodic REST snapshots:
+        # keeps its HTTP keep-alive pool and shares our database pool
+        self.snapshot_fetcher = OrderbookSnapshotFetcher(
+            database_url=database_url,
+            rest_api_url="https://www.deribit.com/api/v2",
+            writer=self.writer
+        )
+        # Book timestamp (epoch ms) of the last snapshot written per instrument,
+        # so periodic snapshots only write books that changed
+        self._last_snapshot_ts: Dict[str, int] = {}
+
         # State
         self.instruments: List[str] = []
         self.subscribed_channels: Set[str] = set()
+        self._dispatch: Dict[str, tuple] = {}  # channel -> (handler, instrument id)
+        self._subscription_payload: Optional[str] = None  # built once in start()
+        self._expected_channels: frozenset = frozenset()
         self.ws = None
         self.running = False
         self.reconnect_delay = 1  # Start with 1 second
         self.max_reconnect_delay = 60  # Cap at 60 seconds
 
         # Heartbeat monitoring
-        self.last_tick_time: Optional[datetime] = None
+        # Monotonic ms of the last tick (an int store per message instead of
+        # a datetime allocation; see last_tick_time for a wall-clock view)
+        self.last_tick_ms: Optional[int] = None
         self.heartbeat_timeout_sec = 10
 
         # Statistics
-        self.stats = {
-            'connection_attempts': 0,
-            'reconnections': 0,
-            'ticks_processed': 0,
-            'quotes_received': 0,
-            'trades_received': 0,
-            'depth_received': 0,
-            'errors': 0
-        }
+        self.stats = CollectorStats()
 
         logger.info(
             f"WebSocketTickCollector initialized: "
@@ -128,9 +185,24 @@ class WebSocketTickCollector:
             f"flush_interval={flush_interval_sec}s"
         )
 
-    async def start(self):
-        """Start the collector (main entry point)."""
+    @property
+    def last_tick_time(self) -> Optional[datetime]:
+        """Wall-clock time of the last tick (derived on demand from last_tick_ms)."""
+        if self.last_tick_ms is None:
+            return None
+        age_ms = time.monotonic_ns() // 1_000_000 - self.last_tick_ms
+        return datetime.now() - timedelta(milliseconds=age_ms)
+
+    async def start(self, stop_event: Optional[asyncio.Event] = None):
+        """
+        Start the collector (main entry point).
+
+        Args:
+            stop_event: Optional event that triggers a graceful shutdown when set
+                        (e.g. from a loop signal handler)
+        """
         logger.info("Starting WebSocket tick collector...")
+        shutdown_task = None
 
         try:
             # Connect to database
@@ -144,14 +216,16 @@ class WebSocketTickCollector:
             logger.info(f"Subscribed instruments: {len(self.instruments)}")
             logger.debug(f"Top 5: {self.instruments[:5]}")
 
+            # Channel list, dispatch table and subscribe message are fixed
+            # for the run; build them once instead of on every reconnect
+            self._prepare_subscription()
+
             # Fetch initial orderbook snapshot via REST API
             # This ensures we have baseline data, since WebSocket may only send updates
             logger.info("Fetching initial orderbook snapshot via REST API...")
-            snapshot_fetcher = OrderbookSnapshotFetcher(
-                database_url=self.database_url,
-                rest_api_url="https://www.deribit.com/api/v2"
+            snapshot_stats = await self.snapshot_fetcher.fetch_and_populate(
+                self.instruments, save_full_depth=True, since_ts=self._last_snapshot_ts
             )
-            snapshot_stats = await snapshot_fetcher.fetch_and_populate(self.instruments, save_full_depth=True)
             logger.info(
                 f"Initial snapshot complete: {snapshot_stats['quotes_populated']} quotes, "
                 f"{snapshot_stats['depth_snapshots']} depth snapshots, "
@@ -161,38 +235,75 @@ class WebSocketTickCollector:
             # Set running flag
             self.running = True
 
+            # DB writer runs until stop() drains it, outliving the loops below
+            self._writer_task = asyncio.create_task(self._db_writer_loop())
+
             # Start tasks
             tasks = [
                 asyncio.create_task(self._websocket_loop()),
+                asyncio.create_task(self._parse_worker()),
                 asyncio.create_task(self._flush_loop()),
                 asyncio.create_task(self._heartbeat_monitor()),
                 asyncio.create_task(self._stats_logger()),
                 asyncio.create_task(self._periodic_snapshot_loop())  # NEW: Periodic REST snapshots
             ]
 
+            if stop_event is not None:
+                shutdown_task = asyncio.create_task(self._shutdown_on(stop_event, tasks))
+
             # Wait for all tasks
-            await asyncio.gather(*tasks)
+            try:
+                await asyncio.gather(*tasks)
+            except asyncio.CancelledError:
+                # Cancelled by _shutdown_on: fall through to the single stop()
+                if shutdown_task is None or not shutdown_task.done():
+                    raise
 
         except Exception as e:
             logger.error(f"Fatal error in collector: {e}", exc_info=True)
             raise
         finally:
+            if shutdown_task is not None:
+                shutdown_task.cancel()
             await self.stop()
 
+    async def _shutdown_on(self, stop_event: asyncio.Event, tasks: List[asyncio.Task]):
+        """Wait for stop_event, then stop the collector loops."""
+        await stop_event.wait()
+        logger.info("Shutdown requested, stopping collector tasks...")
+        self.running = False
+        for task in tasks:
+            task.cancel()
+
     async def stop(self):
         """Stop the collector gracefully."""
         logger.info("Stopping WebSocket tick collector...")
         self.running = False
 
-        # Flush remaining buffers
+        # Without a live DB writer (stop() during startup, or the task died)
+        # nothing consumes _write_q, so queued batches are written here
+        writer_running = self._writer_task is not None and not self._writer_task.done()
+        if not writer_running:
+            await self._write_queued_batches()
+
+        # Flush remaining buffers (including frames not yet parsed)
         logger.info("Flushing remaining buffers...")
+        self._drain_messages()
         await self._flush_buffers()
 
+        # Let the DB writer drain queued batches, then exit
+        if writer_running:
+            await self._write_q.put(None)
+            await self._writer_task
+        else:
+            await self._write_queued_batches()
+
         # Close WebSocket
         if self.ws:
             await self.ws.close()
 
-        # Close database connection
+        # Close snapshot HTTP session, then the database connection
+        await self.snapshot_fetcher.close()
         await self.writer.close()
 
         logger.info("WebSocket tick collector stopped")
@@ -201,13 +312,21 @@ class WebSocketTickCollector:
         """Main WebSocket connection loop with auto-reconnect."""
         while self.running:
             try:
-                self.stats['connection_attempts'] += 1
+                self.stats.connection_attempts += 1
 
                 logger.info(f"Connecting to WebSocket: {self.ws_url}")
+                # Read-only socket: trade memory for burst headroom so the
+                # reader never stalls while frames queue up (TickBuffer
+                # thresholds bound memory downstream)
                 async with websockets.connect(
                     self.ws_url,
                     ping_interval=20,
-                    ping_timeout=10
+                    ping_timeout=10,
+                    max_size=2 ** 23,      # 8 MiB per frame (default 1 MiB)
+                    max_queue=2 ** 14,     # Queued frames (default 32)
+                    read_limit=2 ** 20,    # 1 MiB read buffer (default 64 KiB)
+                    write_limit=2 ** 20,   # 1 MiB write buffer (default 64 KiB)
+                    compression=None       # Skip permessage-deflate
                 ) as ws:
                     self.ws = ws
                     logger.info("WebSocket connected successfully")
@@ -218,30 +337,40 @@ class WebSocketTickCollector:
                     # Subscribe to instruments
                     await self._subscribe_to_instruments()
 
-                    # Process messages
-                    await self._process_messages()
+                    # Read frames; _parse_worker parses and dispatches them
+                    await self._recv_loop()
 
             except websockets.exceptions.WebSocketException as e:
                 logger.error(f"WebSocket error: {e}")
-                self.stats['errors'] += 1
+                self.stats.errors += 1
                 await self._handle_reconnect()
 
             except Exception as e:
                 logger.error(f"Unexpected error in WebSocket loop: {e}", exc_info=True)
-                self.stats['errors'] += 1
+                self.stats.errors += 1
                 await self._handle_reconnect()
 
-    async def _subscribe_to_instruments(self):
-        """Subscribe to quote and trade channels for all instruments."""
+    def _prepare_subscription(self):
+        """Build the dispatch table and the subscribe payload for self.instruments."""
         channels = []
 
-        for instrument in self.instruments:
+        # Intern instrument names so the tick handlers buffer small int ids,
+        # and map each channel straight to its handler + id: routing a
+        # message is then one dict lookup (no prefix tests, no name lookup)
+        instrument_ids = self.buffer.register_instruments(self.instruments)
+        self._dispatch = {}
+
+        for instrument, instrument_id in zip(self.instruments, instrument_ids):
             # Subscribe to order book (quote ticks)
-            channels.append(f"book.{instrument}.100ms")
+            book_channel = f"book.{instrument}.100ms"
+            channels.append(book_channel)
+            self._dispatch[book_channel] = (self._handle_quote_tick, instrument_id)
+
             # Subscribe to trades
-            channels.append(f"trades.{instrument}.100ms")
+            trades_channel = f"trades.{instrument}.100ms"
+            channels.append(trades_channel)
+            self._dispatch[trades_channel] = (self._handle_trade_tick, instrument_id)
 
-        # Send subscription message
         subscription_msg = {
             "jsonrpc": "2.0",
             "method": "public/subscribe",
@@ -251,72 +380,117 @@ class WebSocketTickCollector:
             "id": 1
         }
 
-        logger.info(f"Subscribing to {len(channels)} channels ({len(self.instruments)} instruments)...")
-        await self.ws.send(json.dumps(subscription_msg))
+        # Kept as str: Deribit expects JSON-RPC over text frames
+        self._subscription_payload = json_dumps(subscription_msg).decode()
+        self._expected_channels = frozenset(channels)
+
+    async def _subscribe_to_instruments(self):
+        """Subscribe to quote and trade channels for all instruments."""
+        if self._subscription_payload is None:
+            self._prepare_subscription()
+
+        logger.info(
+            f"Subscribing to {len(self._expected_channels)} channels "
+            f"({len(self.instruments)} instruments)..."
+        )
+        await self.ws.send(self._subscription_payload)
 
         # Wait for subscription confirmation
         response = await self.ws.recv()
-        response_data = json.loads(response)
+        response_data = json_loads(response)
 
         if 'result' in response_data:
             self.subscribed_channels = set(response_data['result'])
             logger.info(f"Successfully subscribed to {len(self.subscribed_channels)} channels")
+
+            missing = self._expected_channels.difference(self.subscribed_channels)
+            if missing:
+                logger.warning(f"{len(missing)} channels not confirmed by subscription: {sorted(missing)[:5]}")
         else:
             logger.error(f"Subscription failed: {response_data}")
             raise Exception("Failed to subscribe to channels")
 
-    async def _process_messages(self):
-        """Process incoming WebSocket messages."""
+    async def _recv_loop(self):
+        """Hand raw WebSocket frames to the parse worker."""
+        # A full queue stops reading here, which back-pressures the socket
+        put = self._msg_q.put
         async for message in self.ws:
-            try:
-                data = json.loads(message)
-
-                # Handle different message types
-                if 'params' in data:
-                    channel = data['params'].get('channel', '')
-                    tick_data = data['params'].get('data', {})
+            await put(message)
+
+    async def _parse_worker(self):
+        """Parse and dispatch queued WebSocket frames in micro-batches."""
+        msg_q = self._msg_q
+        get = msg_q.get
+        get_nowait = msg_q.get_nowait
+        handle = self._handle_message
+        while self.running:
+            handle(await get())
 
-                    # Update heartbeat
-                    self.last_tick_time = datetime.now()
+            # Take what is already queued without awaiting, then yield once
+            # (Queue.get on a non-empty queue never suspends, so without the
+            # sleep a burst would starve the other tasks)
+            for _ in range(PARSE_BATCH_SIZE - 1):
+                if msg_q.empty():
+                    break
+                handle(get_nowait())
+            await asyncio.sleep(0)
 
-                    # Route to appropriate handler
-                    if channel.startswith('book.'):
-                        await self._handle_quote_tick(tick_data)
-                    elif channel.startswith('trades.'):
-                        await self._handle_trade_tick(tick_data)
+    def _drain_messages(self):
+        """Dispatch frames still queued at shutdown so they reach the final flush."""
+        while not self._msg_q.empty():
+            self._handle_message(self._msg_q.get_nowait())
 
-                    self.stats['ticks_processed'] += 1
+    def _handle_message(self, message):
+        """
+        Parse one WebSocket frame and route it to its tick handler.
 
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to decode message: {e}")
-                self.stats['errors'] += 1
-            except Exception as e:
-                logger.error(f"Error processing message: {e}", exc_info=True)
-                self.stats['errors'] += 1
+        Args:
+            message: Raw JSON-RPC frame (str or bytes)
+        """
+        try:
+            data = json_loads(message)
+
+            # Handle different message types
+            params = data.get('params')
+            if params is not None:
+                # Update heartbeat
+                self.last_tick_ms = time.monotonic_ns() // 1_000_000
+
+                # Route to appropriate handler (plain calls: the handlers only
+                # append to the buffer, so no coroutine per message)
+                entry = self._dispatch.get(params.get('channel'))
+                if entry is not None:
+                    handler, instrument_id = entry
+                    handler(params.get('data', {}), instrument_id)
+
+                self.stats.ticks_processed += 1
+
+        except json.JSONDecodeError as e:  # orjson's error subclasses this
+            logger.error(f"Failed to decode message: {e}")
+            self.stats.errors += 1
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
+            self.stats.errors += 1
 
-    async def _handle_quote_tick(self, data: Dict):
+    def _handle_quote_tick(self, data: Dict, instrument_id: int):
         """
         Handle quote tick from book.{instrument}.100ms channel.
 
         Args:
             data: Quote data from WebSocket
+            instrument_id: Buffer id of the channel's instrument
         """
         try:
-            # Extract quote data (best bid/ask for Level 1)
-            quote = {
-                'timestamp': datetime.fromtimestamp(data['timestamp'] / 1000),
-                'instrument_name': data['instrument_name'],
-                'best_bid_price': data.get('best_bid_price'),
-                'best_bid_amount': data.get('best_bid_amount'),
-                'best_ask_price': data.get('best_ask_price'),
-                'best_ask_amount': data.get('best_ask_amount'),
-                'underlying_price': data.get('underlying_price'),
-                'mark_price': data.get('mark_price')
-            }
-
-            # Add to buffer
-            self.buffer.add_quote(quote)
-            self.stats['quotes_received'] += 1
+            # Level 1 fields go straight into the column buffer: no dict and
+            # no datetime per tick (timestamps are converted at flush)
+            get = data.get
+            self.buffer.add_quote(
+                data['timestamp'], instrument_id,
+                get('best_bid_price'), get('best_bid_amount'),
+                get('best_ask_price'), get('best_ask_amount'),
+                get('underlying_price'), get('mark_price')
+            )
+            self.stats.quotes_received += 1
 
             # NOTE: WebSocket orderbook sends delta updates in format:
             # [["action", price, amount], ...] where action is "new"/"change"/"delete"
@@ -328,72 +502,103 @@ class WebSocketTickCollector:
 
         except Exception as e:
             logger.error(f"Failed to process quote tick: {e}")
-            self.stats['errors'] += 1
+            self.stats.errors += 1
 
-    async def _handle_trade_tick(self, data: Dict):
+    def _handle_trade_tick(self, data: Dict, instrument_id: int):
         """
         Handle trade tick from trades.{instrument}.100ms channel.
 
         Args:
             data: Trade data from WebSocket (may contain multiple trades)
+            instrument_id: Buffer id of the channel's instrument
         """
         try:
             # Deribit sends trades as a list
             trades = data if isinstance(data, list) else [data]
 
+            add_trade = self.buffer.add_trade
             for trade_data in trades:
-                trade = {
-                    'timestamp': datetime.fromtimestamp(trade_data['timestamp'] / 1000),
-                    'instrument_name': trade_data['instrument_name'],
-                    'trade_id': trade_data['trade_id'],
-                    'price': trade_data['price'],
-                    'amount': trade_data['amount'],
-                    'direction': trade_data['direction'],
-                    'iv': trade_data.get('iv'),
-                    'index_price': trade_data.get('index_price')
-                }
-
-                # Add to buffer
-                self.buffer.add_trade(trade)
-                self.stats['trades_received'] += 1
+                add_trade(
+                    trade_data['timestamp'], instrument_id,
+                    trade_data['trade_id'], trade_data['price'],
+                    trade_data['amount'], trade_data['direction'],
+                    trade_data.get('iv'), trade_data.get('index_price')
+                )
+
+            self.stats.trades_received += len(trades)
 
         except Exception as e:
             logger.error(f"Failed to process trade tick: {e}")
-            self.stats['errors'] += 1
+            self.stats.errors += 1
 
     async def _flush_loop(self):
-        """Periodic buffer flush loop."""
+        """Buffer flush loop: every flush_interval_sec, or early at 80% fill."""
         while self.running:
             try:
                 # Wait for flush interval or buffer threshold
-                await asyncio.sleep(self.flush_interval_sec)
-
-                # Check if buffer should be flushed
-                if self.buffer.should_flush() or self.buffer.get_quote_count() > 0 or self.buffer.get_trade_count() > 0:
+                try:
+                    await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval_sec)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_event.clear()
+
+                # Flush whenever anything is buffered (plain int reads)
+                buffer = self.buffer
+                if buffer.n_quotes or buffer.n_trades or buffer.n_depth:
                     await self._flush_buffers()
 
             except Exception as e:
                 logger.error(f"Error in flush loop: {e}", exc_info=True)
 
     async def _flush_buffers(self):
-        """Flush buffers to database."""
+        """Hand buffered ticks to the DB writer task."""
         try:
             # Get and clear buffers (atomic operation)
             quotes, trades, depth = self.buffer.get_and_clear()
 
-            # Write to database
-            if quotes:
-                await self.writer.write_quotes(quotes)
-
-            if trades:
-                await self.writer.write_trades(trades)
+            # The column views are only valid until the next get_and_clear(),
+            # so build the records now rather than in the writer task
+            quote_records = quote_records_from_columns(quotes) if quotes['timestamp_ms'] else []
+            trade_records = trade_records_from_columns(trades) if trades['timestamp_ms'] else []
+            depth_records = depth_records_from_columns(depth) if depth['timestamp_ms'] else []
 
-            if depth:
-                await self.writer.write_depth_snapshots(depth)
+            if quote_records or trade_records or depth_records:
+                await self._write_q.put((quote_records, trade_records, depth_records))
 
         except Exception as e:
             logger.error(f"Failed to flush buffers: {e}", exc_info=True)
-            self.stats['errors'] += 1
+            self.stats.errors += 1
+
+    async def _db_writer_loop(self):
+        """Write queued batches to the database until a None sentinel arrives."""
+        while True:
+            batch = await self._write_q.get()
+            try:
+                if batch is None:
+                    return
+                await self.writer.write_all(*batch)
+            except Exception as e:
+                logger.error(f"Failed to write batch: {e}", exc_info=True)
+                self.stats.errors += 1
+            finally:
+                self._write_q.task_done()
+
+    async def _write_queued_batches(self):
+        """Write batches left in _write_q directly (used when no DB writer task is running)."""
+        if self._write_q.empty():
+            return
+
+        logger.info(f"Writing {self._write_q.qsize()} queued batches without the DB writer task...")
+        while not self._write_q.empty():
+            batch = self._write_q.get_nowait()
+            try:
+                if batch is not None:
+                    await self.writer.write_all(*batch)
+            except Exception as e:
+                logger.error(f"Failed to write batch: {e}", exc_info=True)
+                self.stats.errors += 1
+            finally:
+                self._write_q.task_done()
 
     async def _heartbeat_monitor(self):
         """Monitor heartbeat and warn if no ticks received."""
@@ -401,8 +606,8 @@ class WebSocketTickCollector:
             try:
                 await asyncio.sleep(self.heartbeat_timeout_sec)
 
-                if self.last_tick_time:
-                    time_since_last_tick = (datetime.now() - self.last_tick_time).total_seconds()
+                if self.last_tick_ms is not None:
+                    time_since_last_tick = (time.monotonic_ns() // 1_000_000 - self.last_tick_ms) / 1000
 
                     if time_since_last_tick > self.heartbeat_timeout_sec:
                         logger.warning(
@@ -415,10 +620,23 @@ class WebSocketTickCollector:
 
     async def _stats_logger(self):
         """Log statistics every 60 seconds."""
+        prev = replace(self.stats)
+        prev_time = time.monotonic()
+
         while self.running:
             try:
                 await asyncio.sleep(60)
 
+                # Rates over the interval since the previous report
+                stats = self.stats
+                now = time.monotonic()
+                elapsed = (now - prev_time) or 1.0
+                tick_rate = (stats.ticks_processed - prev.ticks_processed) / elapsed
+                quote_rate = (stats.quotes_received - prev.quotes_received) / elapsed
+                trade_rate = (stats.trades_received - prev.trades_received) / elapsed
+                prev = replace(stats)
+                prev_time = now
+
                 # Get buffer stats
                 buffer_stats = self.buffer.get_stats_summary()
 
@@ -426,11 +644,11 @@ class WebSocketTickCollector:
                 writer_stats = self.writer.get_stats()
 
                 logger.info(
-                    f"STATS | Ticks: {self.stats['ticks_processed']} "
-                    f"| Quotes: {self.stats['quotes_received']} "
-                    f"| Trades: {self.stats['trades_received']} "
-                    f"| Depth: {self.stats.get('depth_received', 0)} "
-                    f"| Errors: {self.stats['errors']} "
+                    f"STATS | Ticks: {stats.ticks_processed} ({tick_rate:.1f}/s) "
+                    f"| Quotes: {stats.quotes_received} ({quote_rate:.1f}/s) "
+                    f"| Trades: {stats.trades_received} ({trade_rate:.1f}/s) "
+                    f"| Depth: {stats.depth_received} "
+                    f"| Errors: {stats.errors} "
                     f"| Buffer: Q={buffer_stats['quotes']['utilization_pct']:.1f}% "
                     f"T={buffer_stats['trades']['utilization_pct']:.1f}% "
                     f"D={buffer_stats['depth']['utilization_pct']:.1f}% "
@@ -446,9 +664,9 @@ class WebSocketTickCollector:
         if not self.running:
             return
 
-        self.stats['reconnections'] += 1
+        self.stats.reconnections += 1
 
-        logger.warning(f"Reconnecting in {self.reconnect_delay}s... (attempt {self.stats['reconnections']})")
+        logger.warning(f"Reconnecting in {self.reconnect_delay}s... (attempt {self.stats.reconnections})")
         await asyncio.sleep(self.reconnect_delay)
 
         # Exponential backoff (cap at max_reconnect_delay)
@@ -478,19 +696,16 @@ class WebSocketTickCollector:
 
                 logger.info("Fetching periodic REST API snapshot...")
 
-                # Create snapshot fetcher
-                snapshot_fetcher = OrderbookSnapshotFetcher(
-                    database_url=self.database_url,
-                    rest_api_url="https://www.deribit.com/api/v2"
-                )
-
                 # Fetch and populate (with full depth enabled)
-                snapshot_stats = await snapshot_fetcher.fetch_and_populate(self.instruments, save_full_depth=True)
+                snapshot_stats = await self.snapshot_fetcher.fetch_and_populate(
+                    self.instruments, save_full_depth=True, since_ts=self._last_snapshot_ts
+                )
 
                 logger.info(
                     f"Periodic snapshot complete: {snapshot_stats['quotes_populated']} quotes, "
                     f"{snapshot_stats['instruments_with_data']} instruments with data, "
-                    f"{snapshot_stats['instruments_without_data']} inactive"
+                    f"{snapshot_stats['instruments_without_data']} inactive, "
+                    f"{snapshot_stats['instruments_unchanged']} unchanged"
                 )
 
             except Exception as e:
@@ -518,23 +733,23 @@ async def main():
         flush_interval_sec=FLUSH_INTERVAL_SEC
     )
 
-    # Setup signal handlers for graceful shutdown
-    def signal_handler(sig, frame):
-        logger.info(f"Received signal {sig}, initiating graceful shutdown...")
-        asyncio.create_task(collector.stop())
+    # Setup signal handlers for graceful shutdown: the loop runs them as
+    # plain callbacks, and start() stops (and flushes) exactly once
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+
+    def signal_handler(sig):
+        logger.info(f"Received signal {sig.name}, initiating graceful shutdown...")
+        stop_event.set()
 
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, signal_handler, sig)
 
-    # Start collector
+    # Start collector (start() calls stop() on the way out)
     try:
-        await collector.start()
-    except KeyboardInterrupt:
-        logger.info("Keyboard interrupt received")
-        await collector.stop()
+        await collector.start(stop_event)
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
-        await collector.stop()
         sys.exit(1)
 
 
@@ -542,5 +757,6 @@ if __name__ == "__main__":
     # Ensure logs directory exists
     os.makedirs('logs', exist_ok=True)
 
-    # Run collector
+    # Run collector (on uvloop when available)
+    install_uvloop()
     asyncio.run(main())
@@ -20,21 +20,35 @@ Usage:
 """
 
 import asyncio
+import heapq
 import json
 import logging
 import os
+import re
 import signal
 import sys
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Set
+from operator import itemgetter
+from typing import List, Dict, Optional, Set, Tuple
+import aiohttp
 import websockets
 from dotenv import load_dotenv
 
 # Import our custom modules
+from scripts.event_loop import install_uvloop
+from scripts.json_codec import json_dumps, json_loads
 from scripts.instrument_fetcher_multi import MultiCurrencyInstrumentFetcher
-from scripts.tick_buffer import TickBuffer
-from scripts.tick_writer_multi import MultiCurrencyTickWriter
+from scripts.tick_buffer import GreeksColumnarTickBuffer
+from scripts.tick_writer_multi import (
+    MultiCurrencyTickWriter,
+    depth_records_from_columns,
+    quote_records_from_columns,
+    trade_records_from_columns,
+)
 from scripts.instrument_expiry_checker import filter_expired_instruments, get_next_expiry_time
+from scripts.orderbook_snapshot import drop_unchanged_depth
 
 # Load environment variables
 load_dotenv()
@@ -53,26 +67,131 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Most frames handled per wakeup of the receive loop (see _process_messages)
+MAX_FRAMES_PER_BATCH = 128
+
+# Concurrent get_order_book requests per snapshot (replaces fixed batches of
+# 10 with a 0.5s pause in between)
+MAX_CONCURRENT_SNAPSHOT_FETCHES = 32
+
+# Channels per public/subscribe request; large subscriptions are split so
+# the server can ack each chunk instead of one oversized message
+SUBSCRIBE_CHUNK_SIZE = 20
+
+# Adaptive flush: a batch is written once it reaches the target row count or
+# flush_interval_sec has passed. The target doubles after consecutive flushes
+# that fill it and halves when the interval expires well short of it.
+FLUSH_POLL_SEC = 0.1
+MIN_TARGET_BATCH = 1000          # Below this the writer uses executemany anyway
+FULL_FLUSHES_BEFORE_GROW = 3
+
+# Ticker payload fields in GreeksQuoteColumns order, as compiled getters: a
+# full option ticker carries every key (null when unset), so one C-level call
+# per group replaces sixteen dict.get() lookups
+_TICKER_PRICE_FIELDS = (
+    'best_bid_price', 'best_bid_amount', 'best_ask_price', 'best_ask_amount',
+    'underlying_price', 'mark_price'
+)
+_TICKER_GREEK_FIELDS = ('delta', 'gamma', 'theta', 'vega', 'rho')
+# mark_iv doubles as implied_volatility at write time
+_TICKER_EXTRA_FIELDS = ('bid_iv', 'ask_iv', 'mark_iv', 'open_interest', 'last_price')
+
+# Channel prefix of a subscription notification, peeked from the raw frame
+# ('"channel":"ticker.BTC-...' -> 'ticker') so routing needs no parsed dict
+_CHANNEL_PREFIX_RE = re.compile(r'"channel"\s*:\s*"([a-z_]+)\.')
+
+_get_ticker_prices = itemgetter(*_TICKER_PRICE_FIELDS)
+_get_ticker_greeks = itemgetter(*_TICKER_GREEK_FIELDS)
+_get_ticker_extras = itemgetter(*_TICKER_EXTRA_FIELDS)
+
+
+def _ticker_values(data: Dict) -> Tuple:
+    """
+    Extract the quote column values from a ticker payload.
+
+    Args:
+        data: Decoded ticker.{instrument}.100ms notification data
+
+    Returns:
+        Values in GreeksQuoteColumns.VALUE_COLUMNS order (None where missing)
+    """
+    try:
+        return _get_ticker_prices(data) + _get_ticker_greeks(data['greeks']) + _get_ticker_extras(data)
+    except (KeyError, TypeError):
+        # Partial payload (e.g. no greeks): fall back to per-field lookups
+        get = data.get
+        greek = (get('greeks') or {}).get
+        return (
+            tuple(get(field) for field in _TICKER_PRICE_FIELDS)
+            + tuple(greek(field) for field in _TICKER_GREEK_FIELDS)
+            + tuple(get(field) for field in _TICKER_EXTRA_FIELDS)
+        )
+
+
+@dataclass(slots=True)
+class CollectorStats:
+    """Cumulative collector counters (slotted: bumped on every message)."""
+    connection_attempts: int = 0
+    reconnections: int = 0
+    ticks_processed: int = 0
+    quotes_received: int = 0
+    trades_received: int = 0
+    depth_received: int = 0
+    errors: int = 0
+
 
 class MultiCurrencyOrderbookSnapshotFetcher:
     """
     Fetch orderbook snapshots via REST API and populate database (multi-currency).
+
+    Meant to be created once and reused: the HTTP session and database pool
+    live across fetch_and_populate() calls until close().
     """
 
-    def __init__(self, database_url: str, currency: str, rest_api_url: str = "https://www.deribit.com/api/v2"):
+    def __init__(
+        self,
+        database_url: str,
+        currency: str,
+        rest_api_url: str = "https://www.deribit.com/api/v2",
+        http_connector: Optional[aiohttp.TCPConnector] = None,
+        writer: Optional[MultiCurrencyTickWriter] = None
+    ):
         self.database_url = database_url
         self.currency = currency.upper()
         self.rest_api_url = rest_api_url
-        self.writer = MultiCurrencyTickWriter(database_url, currency=currency)
+        self.http_connector = http_connector  # Shared pool; not closed here
+        # Share the collector's writer (and its pool) when given one
+        self.writer = writer or MultiCurrencyTickWriter(database_url, currency=currency)
+        self._owns_writer = writer is None
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Instrument -> depth_ladder_hash() of the last depth row written
+        self._ladder_hashes: Dict[str, int] = {}
         logger.info(f"MultiCurrencyOrderbookSnapshotFetcher initialized for {self.currency}")
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the keep-alive HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=self.http_connector,
+                connector_owner=self.http_connector is None
+            )
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session and, if owned, the database pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        if self._owns_writer and self.writer.pool is not None:
+            await self.writer.close()
+
     async def fetch_and_populate(self, instruments: List[str], save_full_depth: bool = False) -> Dict[str, int]:
         """Fetch orderbook snapshots for all instruments and populate database."""
-        import aiohttp
-
         logger.info(f"Fetching {self.currency} orderbook snapshots for {len(instruments)} instruments...")
 
-        await self.writer.connect()
+        if self.writer.pool is None:
+            await self.writer.connect()
 
         stats = {
             'instruments_fetched': 0,
@@ -80,63 +199,70 @@ class MultiCurrencyOrderbookSnapshotFetcher:
             'depth_snapshots': 0,
             'errors': 0,
             'instruments_with_data': 0,
-            'instruments_without_data': 0
+            'instruments_without_data': 0,
+            'depth_unchanged': 0
         }
 
-        async with aiohttp.ClientSession() as session:
-            batch_size = 10
-            for i in range(0, len(instruments), batch_size):
-                batch = instruments[i:i + batch_size]
-
-                tasks = [
-                    self._fetch_orderbook(session, instrument, save_full_depth)
-                    for instrument in batch
-                ]
-
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                quotes = []
-                depth_snapshots = []
-                for instrument, result in zip(batch, results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Error fetching {instrument}: {result}")
-                        stats['errors'] += 1
-                    elif result is not None:
-                        quote_dict, depth_dict = result
-                        if quote_dict:
-                            quotes.append(quote_dict)
-                        if depth_dict:
-                            depth_snapshots.append(depth_dict)
-                        stats['instruments_fetched'] += 1
-                        stats['instruments_with_data'] += 1
-                    else:
-                        stats['instruments_fetched'] += 1
-                        stats['instruments_without_data'] += 1
-
-                if quotes:
-                    await self.writer.write_quotes(quotes)
-                    stats['quotes_populated'] += len(quotes)
-
-                if depth_snapshots:
-                    await self.writer.write_depth_snapshots(depth_snapshots)
-                    stats['depth_snapshots'] += len(depth_snapshots)
-
-                if i + batch_size < len(instruments):
-                    await asyncio.sleep(0.5)
+        # Rows for all instruments are written together after the fetch:
+        # one quote write and one depth write per snapshot, not one per batch
+        quotes = []
+        depth_snapshots = []
+
+        session = self._get_session()
+
+        # Every request starts right away; the semaphore caps how many
+        # are in flight on the keep-alive pool
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SNAPSHOT_FETCHES)
+
+        async def fetch(instrument: str):
+            async with semaphore:
+                return await self._fetch_orderbook(session, instrument, save_full_depth)
+
+        results = await asyncio.gather(
+            *[fetch(instrument) for instrument in instruments],
+            return_exceptions=True
+        )
+
+        for instrument, result in zip(instruments, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching {instrument}: {result}")
+                stats['errors'] += 1
+            elif result is not None:
+                quote_dict, depth_dict = result
+                if quote_dict:
+                    quotes.append(quote_dict)
+                if depth_dict:
+                    depth_snapshots.append(depth_dict)
+                stats['instruments_fetched'] += 1
+                stats['instruments_with_data'] += 1
+            else:
+                stats['instruments_fetched'] += 1
+                stats['instruments_without_data'] += 1
+
+        if quotes:
+            await self.writer.write_quotes(quotes)
+            stats['quotes_populated'] = len(quotes)
+
+        if depth_snapshots:
+            # Books whose ladder matches the last row written are skipped
+            depth_snapshots, ladder_hashes, stats['depth_unchanged'] = drop_unchanged_depth(
+                depth_snapshots, self._ladder_hashes
+            )
+            if depth_snapshots:
+                await self.writer.write_depth_snapshots(depth_snapshots)
+                stats['depth_snapshots'] = len(depth_snapshots)
+            self._ladder_hashes.update(ladder_hashes)
 
         logger.info(
             f"✅ {self.currency} snapshot complete: {stats['instruments_fetched']} instruments fetched, "
-            f"{stats['quotes_populated']} quotes"
+            f"{stats['quotes_populated']} quotes, {stats['depth_unchanged']} unchanged depth skipped"
         )
 
-        await self.writer.close()
         return stats
 
     async def _fetch_orderbook(self, session, instrument: str, save_full_depth: bool):
         """Fetch orderbook for a single instrument via REST API."""
         try:
-            import aiohttp
-
             url = f"{self.rest_api_url}/public/get_order_book"
             params = {
                 'instrument_name': instrument,
@@ -165,8 +291,9 @@ class MultiCurrencyOrderbookSnapshotFetcher:
                 if not bids and not asks and mark_price is None:
                     return None
 
+                timestamp = datetime.fromtimestamp(result['timestamp'] / 1000)
                 quote = {
-                    'timestamp': datetime.fromtimestamp(result['timestamp'] / 1000),
+                    'timestamp': timestamp,
                     'instrument_name': result['instrument_name'],
                     'best_bid_price': best_bid_price,
                     'best_bid_amount': best_bid_amount,
@@ -178,14 +305,13 @@ class MultiCurrencyOrderbookSnapshotFetcher:
 
                 depth = None
                 if save_full_depth:
-                    bids_json = [{"price": float(b[0]), "amount": float(b[1])} for b in bids] if bids else []
-                    asks_json = [{"price": float(a[0]), "amount": float(a[1])} for a in asks] if asks else []
-
                     depth = {
-                        'timestamp': datetime.fromtimestamp(result['timestamp'] / 1000),
+                        'timestamp': timestamp,
                         'instrument': result['instrument_name'],
-                        'bids': bids_json,
-                        'asks': asks_json,
+                        'bid_prices': [float(b[0]) for b in bids],
+                        'bid_sizes': [float(b[1]) for b in bids],
+                        'ask_prices': [float(a[0]) for a in asks],
+                        'ask_sizes': [float(a[1]) for a in asks],
                         'mark_price': mark_price,
                         'underlying_price': underlying_price,
                         'open_interest': result.get('open_interest'),
@@ -212,27 +338,79 @@ class WebSocketTickCollector:
         top_n_instruments: int = 50,
         buffer_size_quotes: int = 200000,
         buffer_size_trades: int = 100000,
-        flush_interval_sec: int = 3
+        flush_interval_sec: int = 3,
+        http_connector: Optional[aiohttp.TCPConnector] = None
     ):
-        """Initialize WebSocket tick collector with currency support."""
+        """
+        Initialize WebSocket tick collector with currency support.
+
+        http_connector is an optional aiohttp connector shared with the caller
+        (e.g. the orchestrator) so REST calls reuse its keep-alive connections
+        and DNS cache; the caller owns it and closes it. Without one the
+        collector creates its own, shared by the instrument and snapshot
+        fetchers, and closes it in stop(). Must be called from a running
+        event loop.
+        """
         self.ws_url = ws_url
         self.database_url = database_url
         self.currency = currency.upper()
         self.top_n_instruments = top_n_instruments
         self.flush_interval_sec = flush_interval_sec
+        self._owns_http_connector = http_connector is None
+        if http_connector is None:
+            http_connector = aiohttp.TCPConnector(
+                limit=64,
+                keepalive_timeout=300,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+        self.http_connector = http_connector
 
         # Components (currency-specific)
-        self.instrument_fetcher = MultiCurrencyInstrumentFetcher(currency=self.currency)
-        self.buffer = TickBuffer(
+        self.instrument_fetcher = MultiCurrencyInstrumentFetcher(
+            currency=self.currency,
+            http_connector=http_connector
+        )
+        # Set by the buffer at 80% fill so the flush loop wakes immediately
+        self._flush_event = asyncio.Event()
+        self.buffer = GreeksColumnarTickBuffer(
             max_quotes=buffer_size_quotes,
             max_trades=buffer_size_trades,
-            max_depth=50000
+            max_depth=50000,
+            flush_event=self._flush_event
         )
+        # Rows (quotes + trades) that trigger an early flush; tuned at runtime
+        self._target_batch = MIN_TARGET_BATCH
+        self._full_flushes = 0
         self.writer = MultiCurrencyTickWriter(database_url, currency=self.currency)
 
+        # Flushed batches wait here for the DB writer task, so a slow write
+        # never stalls the flush loop; the bound applies backpressure
+        self._write_q: asyncio.Queue = asyncio.Queue(maxsize=4)
+        self._writer_task: Optional[asyncio.Task] = None
+
+        # One snapshot fetcher for the initial and periodic REST snapshots:
+        # keeps its HTTP session and shares our database pool
+        self.snapshot_fetcher = MultiCurrencyOrderbookSnapshotFetcher(
+            database_url=database_url,
+            currency=self.currency,
+            rest_api_url="https://www.deribit.com/api/v2",
+            http_connector=http_connector,
+            writer=self.writer
+        )
+
         # State
         self.instruments: List[str] = []
         self.subscribed_channels: Set[str] = set()
+        # Set once the current connection's subscriptions are confirmed
+        # (cleared while reconnecting); lets in-process callers await readiness
+        self.subscribed = asyncio.Event()
+        self._instrument_ids: Dict[str, int] = {}  # instrument name -> buffer id
+        # Channel prefix ('ticker.{instrument}.100ms' -> 'ticker') -> handler
+        self._dispatch = {
+            'ticker': self._handle_quote_tick,
+            'trades': self._handle_trade_tick,
+        }
         self.ws = None
         self.running = False
         self.reconnect_delay = 1
@@ -244,15 +422,7 @@ class WebSocketTickCollector:
         self.no_ticks_refresh_threshold_sec = 300  # Refresh instruments if no ticks for 5 minutes
 
         # Statistics
-        self.stats = {
-            'connection_attempts': 0,
-            'reconnections': 0,
-            'ticks_processed': 0,
-            'quotes_received': 0,
-            'trades_received': 0,
-            'depth_received': 0,
-            'errors': 0
-        }
+        self.stats = CollectorStats()
 
         logger.info(
             f"WebSocketTickCollector initialized for {self.currency}: "
@@ -281,12 +451,7 @@ class WebSocketTickCollector:
 
             # Fetch initial orderbook snapshot via REST API
             logger.info(f"Fetching initial {self.currency} orderbook snapshot via REST API...")
-            snapshot_fetcher = MultiCurrencyOrderbookSnapshotFetcher(
-                database_url=self.database_url,
-                currency=self.currency,
-                rest_api_url="https://www.deribit.com/api/v2"
-            )
-            snapshot_stats = await snapshot_fetcher.fetch_and_populate(
+            snapshot_stats = await self.snapshot_fetcher.fetch_and_populate(
                 self.instruments,
                 save_full_depth=True
             )
@@ -298,14 +463,14 @@ class WebSocketTickCollector:
             # Set running flag
             self.running = True
 
+            # DB writer runs until stop() drains it, outliving the loops below
+            self._writer_task = asyncio.create_task(self._db_writer_loop())
+
             # Start tasks
             tasks = [
                 asyncio.create_task(self._websocket_loop()),
                 asyncio.create_task(self._flush_loop()),
-                asyncio.create_task(self._heartbeat_monitor()),
-                asyncio.create_task(self._stats_logger()),
-                asyncio.create_task(self._periodic_snapshot_loop()),
-                asyncio.create_task(self._instrument_refresh_loop())
+                asyncio.create_task(self._timer_loop())
             ]
 
             # Wait for all tasks
@@ -325,9 +490,17 @@ class WebSocketTickCollector:
         logger.info("Flushing remaining buffers...")
         await self._flush_buffers()
 
+        # Let the DB writer drain queued batches, then exit
+        if self._writer_task is not None and not self._writer_task.done():
+            await self._write_q.put(None)
+            await self._writer_task
+
         if self.ws:
             await self.ws.close()
 
+        await self.snapshot_fetcher.close()
+        if self._owns_http_connector:
+            await self.http_connector.close()
         await self.writer.close()
 
         logger.info(f"{self.currency} WebSocket tick collector stopped")
@@ -336,13 +509,20 @@ class WebSocketTickCollector:
         """Main WebSocket connection loop with auto-reconnect."""
         while self.running:
             try:
-                self.stats['connection_attempts'] += 1
+                self.stats.connection_attempts += 1
 
                 logger.info(f"Connecting to WebSocket: {self.ws_url}")
+                # Larger read buffer: fewer, bigger socket reads (and bytes
+                # chunks) per burst; a deeper frame queue absorbs bursts
                 async with websockets.connect(
                     self.ws_url,
                     ping_interval=20,
-                    ping_timeout=10
+                    ping_timeout=10,
+                    max_size=2 ** 23,      # 8 MiB per frame (default 1 MiB)
+                    max_queue=2 ** 14,     # Queued frames (default 32)
+                    read_limit=2 ** 20,    # 1 MiB read buffer (default 64 KiB)
+                    write_limit=2 ** 20,   # 1 MiB write buffer (default 64 KiB)
+                    compression=None       # Skip permessage-deflate
                 ) as ws:
                     self.ws = ws
                     logger.info(f"{self.currency} WebSocket connected successfully")
@@ -354,304 +534,424 @@ class WebSocketTickCollector:
 
             except websockets.exceptions.WebSocketException as e:
                 logger.error(f"WebSocket error: {e}")
-                self.stats['errors'] += 1
+                self.stats.errors += 1
                 await self._handle_reconnect()
 
             except Exception as e:
                 logger.error(f"Unexpected error in WebSocket loop: {e}", exc_info=True)
-                self.stats['errors'] += 1
+                self.stats.errors += 1
                 await self._handle_reconnect()
 
     async def _subscribe_to_instruments(self):
         """Subscribe to ticker and trade channels for all instruments."""
+        self.subscribed.clear()
         channels = []
 
+        # Intern instrument names so the tick handlers buffer small int ids
+        self._instrument_ids = dict(zip(
+            self.instruments, self.buffer.register_instruments(self.instruments)
+        ))
+
         for instrument in self.instruments:
             # Use ticker channel instead of book to get Greeks and complete data
             channels.append(f"ticker.{instrument}.100ms")
             channels.append(f"trades.{instrument}.100ms")
 
-        subscription_msg = {
-            "jsonrpc": "2.0",
-            "method": "public/subscribe",
-            "params": {
-                "channels": channels
-            },
-            "id": 1
-        }
-
-        logger.info(f"Subscribing to {len(channels)} channels ({len(self.instruments)} instruments)...")
-        await self.ws.send(json.dumps(subscription_msg))
+        # Pre-serialise one subscribe request per chunk of channels
+        payloads = {}
+        for request_id, i in enumerate(range(0, len(channels), SUBSCRIBE_CHUNK_SIZE), start=1):
+            payloads[request_id] = json_dumps({
+                "jsonrpc": "2.0",
+                "method": "public/subscribe",
+                "params": {
+                    "channels": channels[i:i + SUBSCRIBE_CHUNK_SIZE]
+                },
+                "id": request_id
+            }).decode()
 
-        response = await self.ws.recv()
-        response_data = json.loads(response)
+        logger.info(
+            f"Subscribing to {len(channels)} channels ({len(self.instruments)} instruments) "
+            f"in {len(payloads)} requests..."
+        )
+        for payload in payloads.values():
+            await self.ws.send(payload)
+
+        # Collect the acks by id; ticks for already-acked chunks can arrive
+        # in between and are dispatched as usual
+        subscribed: Set[str] = set()
+        pending_ids = set(payloads)
+        while pending_ids:
+            response_data = json_loads(await self.ws.recv())
+
+            if 'params' in response_data:
+                params = response_data['params']
+                handler = self._dispatch.get(params.get('channel', '').partition('.')[0])
+                if handler is not None:
+                    handler(params.get('data', {}))
+                    self.stats.ticks_processed += 1
+                continue
+
+            request_id = response_data.get('id')
+            if request_id not in pending_ids:
+                continue
+            pending_ids.discard(request_id)
+
+            if 'result' in response_data:
+                subscribed.update(response_data['result'])
+            else:
+                logger.error(f"Subscription failed: {response_data}")
+                raise Exception("Failed to subscribe to channels")
 
-        if 'result' in response_data:
-            self.subscribed_channels = set(response_data['result'])
-            logger.info(f"Successfully subscribed to {len(self.subscribed_channels)} channels")
-        else:
-            logger.error(f"Subscription failed: {response_data}")
-            raise Exception("Failed to subscribe to channels")
+        self.subscribed_channels = subscribed
+        logger.info(f"Successfully subscribed to {len(self.subscribed_channels)} channels")
+        self.subscribed.set()
 
     async def _process_messages(self):
-        """Process incoming WebSocket messages."""
-        async for message in self.ws:
-            try:
-                data = json.loads(message)
-
-                if 'params' in data:
-                    channel = data['params'].get('channel', '')
-                    tick_data = data['params'].get('data', {})
-
-                    self.last_tick_time = datetime.now()
-
-                    if channel.startswith('ticker.'):
-                        await self._handle_quote_tick(tick_data)
-                    elif channel.startswith('trades.'):
-                        await self._handle_trade_tick(tick_data)
+        """
+        Process incoming WebSocket messages.
 
-                    self.stats['ticks_processed'] += 1
+        Frames that have already arrived are drained in one pass (up to
+        MAX_FRAMES_PER_BATCH) after each wakeup, so a burst is handled
+        without a scheduler round trip per frame.
 
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to decode message: {e}")
-                self.stats['errors'] += 1
-            except Exception as e:
-                logger.error(f"Error processing message: {e}", exc_info=True)
-                self.stats['errors'] += 1
+        Notifications are routed on the channel prefix peeked from the raw
+        frame: frames for channels without a handler are never decoded, and
+        the rest go straight to their handler. Anything the peek doesn't
+        match (RPC responses, odd formatting) falls back to a full parse.
+        """
+        ws = self.ws
+        recv = ws.recv
+        # Frames received but not yet consumed (legacy websockets protocol);
+        # recv() returns without suspending while this is non-empty
+        pending = ws.messages
+        dispatch = self._dispatch
+        peek_channel = _CHANNEL_PREFIX_RE.search
+
+        while True:
+            try:
+                batch = [await recv()]
+                while pending and len(batch) < MAX_FRAMES_PER_BATCH:
+                    batch.append(await recv())
+            except websockets.exceptions.ConnectionClosedOK:
+                return
 
-    async def _handle_quote_tick(self, data: Dict):
+            got_ticks = False
+            for message in batch:
+                try:
+                    match = peek_channel(message)
+                    if match is not None:
+                        got_ticks = True
+                        handler = dispatch.get(match.group(1))
+                        if handler is not None:
+                            handler(json_loads(message)['params'].get('data', {}))
+                        self.stats.ticks_processed += 1
+                        continue
+
+                    data = json_loads(message)
+
+                    if 'params' in data:
+                        params = data['params']
+                        channel = params.get('channel', '')
+                        got_ticks = True
+
+                        handler = dispatch.get(channel.partition('.')[0])
+                        if handler is not None:
+                            handler(params.get('data', {}))
+
+                        self.stats.ticks_processed += 1
+
+                except json.JSONDecodeError as e:  # orjson's error subclasses this
+                    logger.error(f"Failed to decode message: {e}")
+                    self.stats.errors += 1
+                except Exception as e:
+                    logger.error(f"Error processing message: {e}", exc_info=True)
+                    self.stats.errors += 1
+
+            if got_ticks:
+                self.last_tick_time = datetime.now()
+
+    def _instrument_id(self, instrument: str) -> int:
+        """Buffer id for an instrument, registering it if it was subscribed later (control API)."""
+        instrument_id = self._instrument_ids.get(instrument)
+        if instrument_id is None:
+            [instrument_id] = self.buffer.register_instruments([instrument])
+            self._instrument_ids[instrument] = instrument_id
+        return instrument_id
+
+    def _handle_quote_tick(self, data: Dict):
         """Handle quote tick from ticker.{instrument}.100ms channel with Greeks."""
         try:
-            # Extract Greeks from nested dictionary
-            greeks = data.get('greeks', {})
-
-            quote = {
-                'timestamp': datetime.fromtimestamp(data['timestamp'] / 1000),
-                'instrument_name': data['instrument_name'],
-                'best_bid_price': data.get('best_bid_price'),
-                'best_bid_amount': data.get('best_bid_amount'),
-                'best_ask_price': data.get('best_ask_price'),
-                'best_ask_amount': data.get('best_ask_amount'),
-                'underlying_price': data.get('underlying_price'),
-                'mark_price': data.get('mark_price'),
-                # Greek values from data['greeks']
-                'delta': greeks.get('delta'),
-                'gamma': greeks.get('gamma'),
-                'theta': greeks.get('theta'),
-                'vega': greeks.get('vega'),
-                'rho': greeks.get('rho'),
-                # IV fields
-                'implied_volatility': data.get('mark_iv'),  # Use mark_iv as primary IV
-                'bid_iv': data.get('bid_iv'),
-                'ask_iv': data.get('ask_iv'),
-                'mark_iv': data.get('mark_iv'),
-                # Additional fields
-                'open_interest': data.get('open_interest'),
-                'last_price': data.get('last_price')
-            }
-
-            self.buffer.add_quote(quote)
-            self.stats['quotes_received'] += 1
+            # Fields go straight into the column buffer (GreeksQuoteColumns
+            # order): no dict and no datetime per tick
+            self.buffer.add_quote(
+                data['timestamp'],
+                self._instrument_id(data['instrument_name']),
+                _ticker_values(data)
+            )
+            self.stats.quotes_received += 1
 
         except Exception as e:
             logger.error(f"Failed to process quote tick: {e}")
-            self.stats['errors'] += 1
+            self.stats.errors += 1
 
-    async def _handle_trade_tick(self, data: Dict):
-        """Handle trade tick from trades.{instrument}.100ms channel."""
+    def _handle_trade_tick(self, data: List[Dict]):
+        """Handle trade ticks from trades.{instrument}.100ms channel (always a list)."""
+        added = 0
         try:
-            trades = data if isinstance(data, list) else [data]
-
-            for trade_data in trades:
-                trade = {
-                    'timestamp': datetime.fromtimestamp(trade_data['timestamp'] / 1000),
-                    'instrument_name': trade_data['instrument_name'],
-                    'trade_id': trade_data['trade_id'],
-                    'price': trade_data['price'],
-                    'amount': trade_data['amount'],
-                    'direction': trade_data['direction'],
-                    'iv': trade_data.get('iv'),
-                    'index_price': trade_data.get('index_price')
-                }
-
-                self.buffer.add_trade(trade)
-                self.stats['trades_received'] += 1
+            add_trade = self.buffer.add_trade
+            instrument_id = self._instrument_id
+            for trade_data in data:
+                add_trade(
+                    trade_data['timestamp'], instrument_id(trade_data['instrument_name']),
+                    trade_data['trade_id'], trade_data['price'],
+                    trade_data['amount'], trade_data['direction'],
+                    trade_data.get('iv'), trade_data.get('index_price')
+                )
+                added += 1
 
         except Exception as e:
             logger.error(f"Failed to process trade tick: {e}")
-            self.stats['errors'] += 1
+            self.stats.errors += 1
+        finally:
+            self.stats.trades_received += added
 
     async def _flush_loop(self):
-        """Periodic buffer flush loop."""
+        """
+        Adaptive buffer flush loop.
+
+        Flushes once the buffered rows reach the target batch size (or the
+        buffer hits 80% fill), and otherwise every flush_interval_sec.
+        """
+        last_flush = time.monotonic()
+
         while self.running:
             try:
-                await asyncio.sleep(self.flush_interval_sec)
+                remaining = last_flush + self.flush_interval_sec - time.monotonic()
+                try:
+                    await asyncio.wait_for(
+                        self._flush_event.wait(),
+                        timeout=min(FLUSH_POLL_SEC, max(remaining, 0))
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_event.clear()
+
+                # Plain int reads against the buffer's 80% high-water marks
+                # (should_flush() takes the lock three times per poll)
+                buffer = self.buffer
+                pending = buffer.n_quotes + buffer.n_trades
+                full = (
+                    pending >= self._target_batch
+                    or buffer.n_quotes >= buffer.hi_quotes
+                    or buffer.n_trades >= buffer.hi_trades
+                    or buffer.n_depth >= buffer.hi_depth
+                )
+                now = time.monotonic()
+
+                if not full and now - last_flush < self.flush_interval_sec:
+                    continue
 
-                if self.buffer.should_flush() or self.buffer.get_quote_count() > 0 or self.buffer.get_trade_count() > 0:
+                if pending or buffer.n_depth:
                     await self._flush_buffers()
+                last_flush = now
+                self._tune_target_batch(full, pending)
 
             except Exception as e:
                 logger.error(f"Error in flush loop: {e}", exc_info=True)
 
+    def _tune_target_batch(self, full: bool, pending: int):
+        """
+        Grow or shrink the early-flush target after a flush.
+
+        Args:
+            full: Whether the flush was triggered by size rather than age
+            pending: Rows (quotes + trades) that were flushed
+        """
+        if full:
+            self._full_flushes += 1
+            if self._full_flushes >= FULL_FLUSHES_BEFORE_GROW:
+                self._full_flushes = 0
+                # Stay under the buffer's own 80% threshold
+                ceiling = max(MIN_TARGET_BATCH, self.buffer.hi_quotes)
+                self._target_batch = min(self._target_batch * 2, ceiling)
+        else:
+            self._full_flushes = 0
+            if pending < self._target_batch // 2:
+                self._target_batch = max(self._target_batch // 2, MIN_TARGET_BATCH)
+
     async def _flush_buffers(self):
-        """Flush buffers to database."""
+        """Hand buffered ticks to the DB writer task."""
         try:
             quotes, trades, depth = self.buffer.get_and_clear()
 
-            if quotes:
-                await self.writer.write_quotes(quotes)
-
-            if trades:
-                await self.writer.write_trades(trades)
+            # The column views are only valid until the next get_and_clear(),
+            # so build the records now rather than in the writer task
+            quote_records = quote_records_from_columns(quotes) if quotes['timestamp_ms'] else []
+            trade_records = trade_records_from_columns(trades) if trades['timestamp_ms'] else []
+            depth_records = depth_records_from_columns(depth) if depth['timestamp_ms'] else []
 
-            if depth:
-                await self.writer.write_depth_snapshots(depth)
+            if quote_records or trade_records or depth_records:
+                await self._write_q.put((quote_records, trade_records, depth_records))
 
         except Exception as e:
             logger.error(f"Failed to flush buffers: {e}", exc_info=True)
-            self.stats['errors'] += 1
+            self.stats.errors += 1
 
-    async def _heartbeat_monitor(self):
-        """Monitor heartbeat and warn if no ticks received."""
-        while self.running:
+    async def _db_writer_loop(self):
+        """Write queued batches to the database until a None sentinel arrives."""
+        while True:
+            batch = await self._write_q.get()
             try:
-                await asyncio.sleep(self.heartbeat_timeout_sec)
+                if batch is None:
+                    return
+                await self.writer.write_all(*batch)
+            except Exception as e:
+                logger.error(f"Failed to write batch: {e}", exc_info=True)
+                self.stats.errors += 1
+            finally:
+                self._write_q.task_done()
 
-                if self.last_tick_time:
-                    time_since_last_tick = (datetime.now() - self.last_tick_time).total_seconds()
+    async def _timer_loop(self):
+        """
+        Run the periodic housekeeping jobs from a single task.
 
-                    if time_since_last_tick > self.heartbeat_timeout_sec:
-                        logger.warning(
-                            f"No {self.currency} ticks received for {time_since_last_tick:.0f}s"
-                        )
+        The heartbeat check, stats log, REST snapshot and instrument expiry
+        check sit in a min-heap keyed by due time: the loop sleeps until the
+        earliest is due, runs it, and pushes it back with its next due time.
+        Jobs run one at a time, so a slow snapshot delays the others rather
+        than overlapping them.
+        """
+        snapshot_interval_sec = int(os.getenv('SNAPSHOT_INTERVAL_SEC', 300))
+        refresh_interval_sec = int(os.getenv('INSTRUMENT_REFRESH_INTERVAL_SEC', 3600))  # Default 1 hour
 
-                    # Trigger instrument refresh if no ticks for too long (likely expired)
-                    if time_since_last_tick > self.no_ticks_refresh_threshold_sec:
-                        logger.error(
-                            f"No ticks for {time_since_last_tick:.0f}s - instruments may have expired! "
-                            f"Triggering instrument refresh..."
-                        )
-                        await self._refresh_instruments()
+        logger.info(f"Periodic snapshot loop started for {self.currency} (interval: {snapshot_interval_sec}s)")
+        logger.info(f"Instrument refresh loop started for {self.currency} (interval: {refresh_interval_sec}s)")
 
-            except Exception as e:
-                logger.error(f"Error in heartbeat monitor: {e}", exc_info=True)
+        # (name, job, callable giving the seconds until its next run)
+        jobs = [
+            ('heartbeat monitor', self._check_heartbeat, lambda: self.heartbeat_timeout_sec),
+            ('stats logger', self._log_stats, lambda: 60),
+            ('periodic snapshot', self._take_periodic_snapshot, lambda: snapshot_interval_sec),
+            ('instrument refresh', self._check_instrument_expiry,
+             lambda: self._next_refresh_delay(refresh_interval_sec)),
+        ]
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        timers = [(now + next_delay(), name, job, next_delay) for name, job, next_delay in jobs]
+        heapq.heapify(timers)
 
-    async def _stats_logger(self):
-        """Log statistics every 60 seconds."""
         while self.running:
+            due, name, job, next_delay = heapq.heappop(timers)
+            await asyncio.sleep(max(0, due - loop.time()))
+
+            if not self.running:
+                break
+
             try:
-                await asyncio.sleep(60)
-
-                buffer_stats = self.buffer.get_stats_summary()
-                writer_stats = self.writer.get_stats()
-
-                logger.info(
-                    f"[{self.currency}] STATS | Ticks: {self.stats['ticks_processed']} "
-                    f"| Quotes: {self.stats['quotes_received']} "
-                    f"| Trades: {self.stats['trades_received']} "
-                    f"| Errors: {self.stats['errors']} "
-                    f"| Buffer: Q={buffer_stats['quotes']['utilization_pct']:.1f}% "
-                    f"T={buffer_stats['trades']['utilization_pct']:.1f}% "
-                    f"| DB Writes: Q={writer_stats['quotes_written']} T={writer_stats['trades_written']}"
+                await job()
+            except Exception as e:
+                logger.error(f"Error in {name}: {e}", exc_info=True)
+
+            heapq.heappush(timers, (loop.time() + next_delay(), name, job, next_delay))
+
+    async def _check_heartbeat(self):
+        """Warn if no ticks were received recently; refresh instruments after a long gap."""
+        if self.last_tick_time:
+            time_since_last_tick = (datetime.now() - self.last_tick_time).total_seconds()
+
+            if time_since_last_tick > self.heartbeat_timeout_sec:
+                logger.warning(
+                    f"No {self.currency} ticks received for {time_since_last_tick:.0f}s"
                 )
 
-            except Exception as e:
-                logger.error(f"Error in stats logger: {e}", exc_info=True)
+            # Trigger instrument refresh if no ticks for too long (likely expired)
+            if time_since_last_tick > self.no_ticks_refresh_threshold_sec:
+                logger.error(
+                    f"No ticks for {time_since_last_tick:.0f}s - instruments may have expired! "
+                    f"Triggering instrument refresh..."
+                )
+                await self._refresh_instruments()
+
+    async def _log_stats(self):
+        """Log collector, buffer and writer statistics."""
+        buffer_stats = self.buffer.get_stats_summary()
+        writer_stats = self.writer.get_stats()
+
+        logger.info(
+            f"[{self.currency}] STATS | Ticks: {self.stats.ticks_processed} "
+            f"| Quotes: {self.stats.quotes_received} "
+            f"| Trades: {self.stats.trades_received} "
+            f"| Errors: {self.stats.errors} "
+            f"| Buffer: Q={buffer_stats['quotes']['utilization_pct']:.1f}% "
+            f"T={buffer_stats['trades']['utilization_pct']:.1f}% "
+            f"| DB Writes: Q={writer_stats['quotes_written']} T={writer_stats['trades_written']}"
+        )
 
     async def _handle_reconnect(self):
         """Handle reconnection with exponential backoff."""
         if not self.running:
             return
 
-        self.stats['reconnections'] += 1
+        self.stats.reconnections += 1
 
-        logger.warning(f"Reconnecting in {self.reconnect_delay}s... (attempt {self.stats['reconnections']})")
+        logger.warning(f"Reconnecting in {self.reconnect_delay}s... (attempt {self.stats.reconnections})")
         await asyncio.sleep(self.reconnect_delay)
 
         self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
 
-    async def _periodic_snapshot_loop(self):
-        """Fetch periodic REST API snapshots to ensure complete pricing data."""
-        snapshot_interval_sec = int(os.getenv('SNAPSHOT_INTERVAL_SEC', 300))
+    async def _take_periodic_snapshot(self):
+        """Fetch a REST API snapshot to ensure complete pricing data."""
+        logger.info(f"Fetching periodic {self.currency} REST API snapshot...")
 
-        logger.info(f"Periodic snapshot loop started for {self.currency} (interval: {snapshot_interval_sec}s)")
-
-        while self.running:
-            try:
-                await asyncio.sleep(snapshot_interval_sec)
-
-                if not self.running:
-                    break
-
-                logger.info(f"Fetching periodic {self.currency} REST API snapshot...")
-
-                snapshot_fetcher = MultiCurrencyOrderbookSnapshotFetcher(
-                    database_url=self.database_url,
-                    currency=self.currency,
-                    rest_api_url="https://www.deribit.com/api/v2"
-                )
+        snapshot_stats = await self.snapshot_fetcher.fetch_and_populate(
+            self.instruments,
+            save_full_depth=True
+        )
 
-                snapshot_stats = await snapshot_fetcher.fetch_and_populate(
-                    self.instruments,
-                    save_full_depth=True
-                )
+        logger.info(
+            f"Periodic {self.currency} snapshot complete: {snapshot_stats['quotes_populated']} quotes, "
+            f"{snapshot_stats['instruments_with_data']} instruments with data"
+        )
 
-                logger.info(
-                    f"Periodic {self.currency} snapshot complete: {snapshot_stats['quotes_populated']} quotes, "
-                    f"{snapshot_stats['instruments_with_data']} instruments with data"
-                )
+    def _next_refresh_delay(self, refresh_interval_sec: int) -> float:
+        """
+        Seconds until the next instrument expiry check.
 
-            except Exception as e:
-                logger.error(f"Error in periodic snapshot loop: {e}", exc_info=True)
+        Args:
+            refresh_interval_sec: Upper bound between checks
 
-    async def _instrument_refresh_loop(self):
+        Returns:
+            refresh_interval_sec, or sooner (1 minute after the next expiry)
         """
-        Periodic instrument refresh loop.
-        Checks for expired instruments and refreshes the subscription list.
-        Runs every hour or at next expiry time (whichever is sooner).
-        """
-        refresh_interval_sec = int(os.getenv('INSTRUMENT_REFRESH_INTERVAL_SEC', 3600))  # Default 1 hour
+        # Check sooner if we know instruments are expiring soon
+        next_expiry = get_next_expiry_time(self.instruments)
+        if next_expiry:
+            from datetime import timezone
+            now = datetime.now(timezone.utc)
+            seconds_until_expiry = (next_expiry - now).total_seconds()
+
+            # Check 1 minute after expiry to give exchange time to update
+            sleep_time = min(refresh_interval_sec, max(60, seconds_until_expiry + 60))
+        else:
+            sleep_time = refresh_interval_sec
 
-        logger.info(f"Instrument refresh loop started for {self.currency} (interval: {refresh_interval_sec}s)")
+        logger.info(f"Next instrument refresh in {sleep_time/60:.1f} minutes")
+        return sleep_time
 
-        while self.running:
-            try:
-                # Calculate sleep time until next check
-                # Check sooner if we know instruments are expiring soon
-                next_expiry = get_next_expiry_time(self.instruments)
-                if next_expiry:
-                    from datetime import timezone
-                    now = datetime.now(timezone.utc)
-                    seconds_until_expiry = (next_expiry - now).total_seconds()
-
-                    # Check 1 minute after expiry to give exchange time to update
-                    sleep_time = min(refresh_interval_sec, max(60, seconds_until_expiry + 60))
-                else:
-                    sleep_time = refresh_interval_sec
-
-                logger.info(f"Next instrument refresh in {sleep_time/60:.1f} minutes")
-
-                await asyncio.sleep(sleep_time)
-
-                if not self.running:
-                    break
-
-                # Check if current instruments have expired
-                active_instruments = filter_expired_instruments(self.instruments, buffer_minutes=5)
-
-                if len(active_instruments) < len(self.instruments):
-                    expired_count = len(self.instruments) - len(active_instruments)
-                    logger.warning(
-                        f"{expired_count} instruments expired! "
-                        f"Active: {len(active_instruments)}, Expired: {expired_count}"
-                    )
-                    logger.info("Triggering instrument refresh due to expiry...")
-                    await self._refresh_instruments()
-                else:
-                    logger.info(f"All {len(self.instruments)} instruments still active")
+    async def _check_instrument_expiry(self):
+        """Refresh the subscription list if any current instrument has expired."""
+        active_instruments = filter_expired_instruments(self.instruments, buffer_minutes=5)
 
-            except Exception as e:
-                logger.error(f"Error in instrument refresh loop: {e}", exc_info=True)
+        if len(active_instruments) < len(self.instruments):
+            expired_count = len(self.instruments) - len(active_instruments)
+            logger.warning(
+                f"{expired_count} instruments expired! "
+                f"Active: {len(active_instruments)}, Expired: {expired_count}"
+            )
+            logger.info("Triggering instrument refresh due to expiry...")
+            await self._refresh_instruments()
+        else:
+            logger.info(f"All {len(self.instruments)} instruments still active")
 
     async def _refresh_instruments(self):
         """
@@ -706,7 +1006,7 @@ class WebSocketTickCollector:
 
         except Exception as e:
             logger.error(f"Failed to refresh instruments: {e}", exc_info=True)
-            self.stats['errors'] += 1
+            self.stats.errors += 1
 
 
 async def main():
@@ -722,7 +1022,7 @@ async def main():
 
     logger.info(f"Starting multi-currency collector for {CURRENCY}")
 
-    # Create collector
+    # Create collector (it owns the keep-alive pool for its REST calls)
     collector = WebSocketTickCollector(
         ws_url=WS_URL,
         database_url=DATABASE_URL,
@@ -757,5 +1057,6 @@ if __name__ == "__main__":
     # Ensure logs directory exists
     os.makedirs('logs', exist_ok=True)
 
-    # Run collector
+    # Run collector (on uvloop when available)
+    install_uvloop()
     asyncio.run(main())
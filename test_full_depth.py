@@ -6,8 +6,11 @@ This script tests the full orderbook depth saving functionality and measures sto
 
 import asyncio
 import os
+import sys
 import logging
+import asyncpg
 from dotenv import load_dotenv
+from scripts.json_codec import json_loads
 from scripts.instrument_fetcher import InstrumentFetcher
 from scripts.orderbook_snapshot import OrderbookSnapshotFetcher
 
@@ -38,7 +41,10 @@ async def main():
     print("TEST 1: Fetching orderbook WITH full depth (20 levels)")
     print("=" * 80)
     snapshot_fetcher = OrderbookSnapshotFetcher(DATABASE_URL)
-    stats = await snapshot_fetcher.fetch_and_populate(instruments, save_full_depth=True)
+    try:
+        stats = await snapshot_fetcher.fetch_and_populate(instruments, save_full_depth=True)
+    finally:
+        await snapshot_fetcher.close()
 
     print()
     print(f"✅ Fetch complete:")
@@ -56,82 +62,147 @@ async def main():
     print("=" * 80)
     print()
 
-    # Import psycopg2 for direct query
-    import psycopg2
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
+    # Same async driver as the writers, so the event loop is never blocked;
+    # one connection per aggregate query so they run concurrently
+    pool = await asyncpg.create_pool(DATABASE_URL, min_size=2, max_size=2)
+
+    # Projection assumptions: periodic snapshots every 5 minutes (12 per hour)
+    snapshots_per_hour = 12
+    snapshots_per_day = snapshots_per_hour * 24
+    instruments_tracked = stats['instruments_with_data']
+
+    # Catalog sizes, depth stats and projections: CTEs folded into a single
+    # JSON document, with sizes formatted by pg_size_pretty
+    analysis_sql = """
+        WITH sizes AS (
+            SELECT
+                tablename AS table_name,
+                pg_size_pretty(pg_total_relation_size(schemaname||'.'||tablename)) AS total_size,
+                pg_total_relation_size(schemaname||'.'||tablename) AS size_bytes
+            FROM pg_tables
+            WHERE tablename IN ('eth_option_quotes', 'eth_option_orderbook_depth')
+        ),
+        depth_bytes AS (
+            SELECT
+                (SELECT COUNT(*) FROM eth_option_orderbook_depth) AS rows,
+                pg_total_relation_size('eth_option_orderbook_depth') AS total_bytes,
+                pg_relation_size('eth_option_orderbook_depth') AS heap_bytes,
+                pg_table_size('eth_option_orderbook_depth')
+                    - pg_relation_size('eth_option_orderbook_depth') AS toast_bytes,
+                pg_indexes_size('eth_option_orderbook_depth') AS index_bytes,
+                pg_total_relation_size('eth_option_quotes') AS quotes_bytes
+        ),
+        depth_stats AS (
+            SELECT
+                *,
+                CASE WHEN rows > 0 THEN total_bytes / rows ELSE 0 END AS avg_row_bytes,
+                CASE WHEN rows > 0 THEN heap_bytes / rows ELSE 0 END AS heap_row_bytes,
+                pg_size_pretty(total_bytes) AS total_size,
+                pg_size_pretty(heap_bytes) AS heap_size,
+                pg_size_pretty(toast_bytes) AS toast_size,
+                pg_size_pretty(index_bytes) AS index_size,
+                pg_size_pretty(quotes_bytes) AS quotes_size
+            FROM depth_bytes
+        ),
+        projections AS (
+            SELECT
+                pg_size_pretty(bytes_per_day) AS day,
+                pg_size_pretty(bytes_per_day * 30) AS month,
+                pg_size_pretty(bytes_per_day * 365) AS year,
+                pg_size_pretty(bytes_per_day * 365 * 5) AS five_year
+            FROM (SELECT avg_row_bytes * $1::bigint * $2::bigint AS bytes_per_day FROM depth_stats) per_day
+        )
+        SELECT json_build_object(
+            'sizes', (SELECT COALESCE(json_agg(json_build_array(table_name, total_size)
+                                               ORDER BY size_bytes DESC), '[]') FROM sizes),
+            'sizes_total', (SELECT pg_size_pretty(COALESCE(sum(size_bytes), 0)) FROM sizes),
+            'depth', (SELECT row_to_json(depth_stats) FROM depth_stats),
+            'projections', (SELECT row_to_json(projections) FROM projections)
+        );
+    """
+
+    # Stored (post-compression) bytes of the level arrays vs the scalar columns
+    level_bytes_sql = """
+        SELECT
+            COALESCE(avg(pg_column_size(bid_prices) + pg_column_size(bid_sizes)
+                         + pg_column_size(ask_prices) + pg_column_size(ask_sizes)), 0)::bigint AS levels,
+            COALESCE(avg(pg_column_size(mark_price) + pg_column_size(underlying_price)
+                         + pg_column_size(open_interest) + pg_column_size(volume_24h)), 0)::bigint AS scalars
+        FROM eth_option_orderbook_depth
+        WHERE timestamp > NOW() - INTERVAL '1 hour'
+    """
 
-    # Get table sizes
-    cur.execute("""
+    sample_sql = """
         SELECT
-            schemaname,
-            tablename AS table_name,
-            pg_size_pretty(pg_total_relation_size(schemaname||'.'||tablename)) AS total_size,
-            pg_total_relation_size(schemaname||'.'||tablename) AS size_bytes
-        FROM pg_tables
-        WHERE tablename IN ('eth_option_quotes', 'eth_option_orderbook_depth')
-        ORDER BY pg_total_relation_size(schemaname||'.'||tablename) DESC;
-    """)
+            instrument,
+            timestamp,
+            COALESCE(array_length(bid_prices, 1), 0) as num_bids,
+            COALESCE(array_length(ask_prices, 1), 0) as num_asks,
+            mark_price,
+            underlying_price
+        FROM eth_option_orderbook_depth
+        WHERE timestamp > NOW() - INTERVAL '1 hour'  -- bounded so the BRIN index (schema/015) applies
+        ORDER BY timestamp DESC
+        LIMIT 5
+    """
+
+    # The aggregates are independent, so wall time is the slower query, not the sum
+    analysis_json, level_bytes = await asyncio.gather(
+        pool.fetchval(analysis_sql, instruments_tracked, snapshots_per_day),
+        pool.fetchrow(level_bytes_sql)
+    )
+    analysis = json_loads(analysis_json)
 
     print("📊 Table Sizes:")
     print("-" * 80)
     print(f"{'Table Name':<35} {'Total Size':<15}")
     print("-" * 80)
 
-    total_bytes = 0
-    for row in cur.fetchall():
-        schema, table_name, total_size, size_bytes = row
+    for table_name, total_size in analysis['sizes']:
         print(f"{table_name:<35} {total_size:<15}")
-        total_bytes += size_bytes
 
     print("-" * 80)
-    print(f"{'TOTAL':<35} {pg_size_pretty(total_bytes):<15}")
+    print(f"{'TOTAL':<35} {analysis['sizes_total']:<15}")
     print()
 
-    # Get average row size for depth table
-    cur.execute("""
-        SELECT
-            COUNT(*) as rows,
-            pg_total_relation_size('eth_option_orderbook_depth') as total_bytes,
-            CASE
-                WHEN COUNT(*) > 0
-                THEN pg_total_relation_size('eth_option_orderbook_depth') / COUNT(*)
-                ELSE 0
-            END as avg_row_bytes
-        FROM eth_option_orderbook_depth;
-    """)
-
-    row_count, total_bytes, avg_row_bytes = cur.fetchone()
+    depth = analysis['depth']
+    row_count = depth['rows']
+    avg_row_bytes = depth['avg_row_bytes']
 
     print("📈 Depth Table Statistics:")
     print("-" * 80)
     print(f"   Total rows: {row_count}")
-    print(f"   Total size: {pg_size_pretty(total_bytes)}")
+    print(f"   Total size: {depth['total_size']}")
     print(f"   Avg row size: {avg_row_bytes} bytes ({avg_row_bytes / 1024:.2f} KB)")
     print()
 
-    # Sample depth data
-    cur.execute("""
-        SELECT
-            instrument,
-            timestamp,
-            jsonb_array_length(bids) as num_bids,
-            jsonb_array_length(asks) as num_asks,
-            mark_price,
-            underlying_price
-        FROM eth_option_orderbook_depth
-        ORDER BY timestamp DESC
-        LIMIT 5;
-    """)
+    # Heap vs TOAST (+ FSM/VM) vs indexes, so the effect of LZ4 /
+    # toast_tuple_target (schema/012) and the level array type (013/014) is visible
+    print("🗄️  Depth Table Storage Breakdown:")
+    print("-" * 80)
+    print(f"   Heap (pg_relation_size): {depth['heap_size']}")
+    print(f"   TOAST (pg_table_size - heap): {depth['toast_size']}")
+    print(f"   Indexes (pg_indexes_size): {depth['index_size']}")
+    if row_count > 0:
+        print(f"   Heap bytes/row: {depth['heap_row_bytes']}")
+        print(f"   Level arrays bytes/row (last hour, pg_column_size): {level_bytes['levels']}")
+        print(f"   Scalar columns bytes/row (last hour, pg_column_size): {level_bytes['scalars']}")
+    print()
 
     print("📋 Sample Depth Data:")
     print("-" * 80)
     print(f"{'Instrument':<20} {'Bids':<6} {'Asks':<6} {'Mark':<12} {'Underlying':<12}")
     print("-" * 80)
-    for row in cur.fetchall():
-        instrument, timestamp, num_bids, num_asks, mark_price, underlying_price = row
-        print(f"{instrument:<20} {num_bids:<6} {num_asks:<6} {mark_price:<12.4f} {underlying_price:<12.2f}")
-    print()
+    # Row-returning query: stream through a server-side cursor so client
+    # memory stays bounded if the window or LIMIT grows
+    lines = []
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            async for row in conn.cursor(sample_sql, prefetch=1000):
+                instrument, timestamp, num_bids, num_asks, mark_price, underlying_price = row
+                lines.append(f"{instrument:<20} {num_bids:<6} {num_asks:<6} {mark_price:<12.4f} {underlying_price:<12.2f}")
+    lines.append("")
+    sys.stdout.write("\n".join(lines) + "\n")  # one write for the whole table
 
     # Storage projections
     print("=" * 80)
@@ -140,37 +211,30 @@ async def main():
     print()
 
     if row_count > 0:
-        # Assume periodic snapshots every 5 minutes (12 per hour)
-        snapshots_per_hour = 12
-        snapshots_per_day = snapshots_per_hour * 24
-        bytes_per_day = avg_row_bytes * stats['instruments_with_data'] * snapshots_per_day
+        projections = analysis['projections']
 
         print(f"Assumptions:")
-        print(f"   - Instruments tracked: {stats['instruments_with_data']}")
+        print(f"   - Instruments tracked: {instruments_tracked}")
         print(f"   - Snapshot interval: 5 minutes (12/hour)")
         print(f"   - Average row size: {avg_row_bytes} bytes")
         print()
         print(f"Daily Storage (Full Depth):")
-        print(f"   - Depth snapshots/day: {stats['instruments_with_data'] * snapshots_per_day:,}")
-        print(f"   - Storage/day: {pg_size_pretty(bytes_per_day)}")
+        print(f"   - Depth snapshots/day: {instruments_tracked * snapshots_per_day:,}")
+        print(f"   - Storage/day: {projections['day']}")
         print()
         print(f"Long-term Projections:")
-        print(f"   - 1 month: {pg_size_pretty(bytes_per_day * 30)}")
-        print(f"   - 1 year: {pg_size_pretty(bytes_per_day * 365)}")
-        print(f"   - 5 years: {pg_size_pretty(bytes_per_day * 365 * 5)}")
+        print(f"   - 1 month: {projections['month']}")
+        print(f"   - 1 year: {projections['year']}")
+        print(f"   - 5 years: {projections['five_year']}")
         print()
 
         # Compare with quotes table
-        cur.execute("SELECT pg_total_relation_size('eth_option_quotes');")
-        quotes_size = cur.fetchone()[0]
-
         print(f"Comparison:")
-        print(f"   - Quote snapshots (Level 1): {pg_size_pretty(quotes_size)}")
-        print(f"   - Depth snapshots (Level 20): {pg_size_pretty(total_bytes)}")
-        print(f"   - Size increase: {(total_bytes / quotes_size * 100):.1f}% larger")
+        print(f"   - Quote snapshots (Level 1): {depth['quotes_size']}")
+        print(f"   - Depth snapshots (Level 20): {depth['total_size']}")
+        print(f"   - Size increase: {(depth['total_bytes'] / depth['quotes_bytes'] * 100):.1f}% larger")
 
-    cur.close()
-    conn.close()
+    await pool.close()
 
     print()
     print("=" * 80)
@@ -178,17 +242,5 @@ async def main():
     print("=" * 80)
 
 
-def pg_size_pretty(bytes):
-    """Convert bytes to human-readable format."""
-    if bytes < 1024:
-        return f"{bytes} bytes"
-    elif bytes < 1024 * 1024:
-        return f"{bytes / 1024:.2f} KB"
-    elif bytes < 1024 * 1024 * 1024:
-        return f"{bytes / (1024 * 1024):.2f} MB"
-    else:
-        return f"{bytes / (1024 * 1024 * 1024):.2f} GB"
-
-
 if __name__ == "__main__":
     asyncio.run(main())
@@ -2,32 +2,39 @@
 Test Greeks Collection - Run ETH collector for 60 seconds and verify Greeks in database
 """
 import asyncio
-import subprocess
-import time
-import psycopg2
+import os
+import sys
+import asyncpg
 from datetime import datetime
 
-def run_sql_query(query):
+# Collector configuration is read from the environment at import time
+os.environ['CURRENCY'] = 'ETH'
+os.environ['DATABASE_URL'] = 'postgresql://postgres@localhost:5432/crypto_data'
+os.environ['LOG_LEVEL'] = 'INFO'
+
+# One connection reused by every verification query (opened on first use)
+_conn = None
+
+async def run_sql_query(query):
     """Run a SQL query and return results"""
+    global _conn
     try:
-        conn = psycopg2.connect(
-            host='localhost',
-            port=5432,
-            database='crypto_data',
-            user='postgres'
-        )
-        cursor = conn.cursor()
-        cursor.execute(query)
-        results = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        cursor.close()
-        conn.close()
+        if _conn is None or _conn.is_closed():
+            _conn = await asyncpg.connect(os.environ['DATABASE_URL'])
+        stmt = await _conn.prepare(query)
+        results = await stmt.fetch()
+        columns = [attr.name for attr in stmt.get_attributes()]
         return columns, results
     except Exception as e:
         print(f"Error running query: {e}")
         return None, None
 
-def main():
+async def close_db():
+    """Close the shared verification connection"""
+    if _conn is not None:
+        await _conn.close()
+
+async def run_test():
     print("=" * 80)
     print("GREEKS COLLECTION TEST")
     print("=" * 80)
@@ -36,7 +43,7 @@ def main():
 
     # Check initial row count
     print("1. Checking initial database state...")
-    columns, results = run_sql_query("""
+    columns, results = await run_sql_query("""
         SELECT COUNT(*) FROM eth_option_quotes
         WHERE timestamp > NOW() - INTERVAL '5 minutes'
     """)
@@ -45,51 +52,45 @@ def main():
         print(f"   Quotes in last 5 minutes: {initial_count}")
     print()
 
-    # Start collector
+    # Start collector (in-process, like test_perp_collector.py)
     print("2. Starting ETH option collector for 60 seconds...")
     print("   (Watch for 'Successfully subscribed' and Greek values in logs)")
     print()
 
-    import os
-    env = os.environ.copy()
-    env['CURRENCY'] = 'ETH'
-    env['TOP_N_INSTRUMENTS'] = '10'
-    env['DATABASE_URL'] = 'postgresql://postgres@localhost:5432/crypto_data'
-    env['LOG_LEVEL'] = 'INFO'
-
-    proc = subprocess.Popen(
-        ['python3', '-m', 'scripts.ws_tick_collector_multi'],
-        env=env,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1
+    os.makedirs('logs', exist_ok=True)
+    from scripts.ws_tick_collector_multi import WebSocketTickCollector
+
+    collector = WebSocketTickCollector(
+        ws_url='wss://www.deribit.com/ws/api/v2',
+        database_url=os.environ['DATABASE_URL'],
+        currency='ETH',
+        top_n_instruments=10
     )
+    task = asyncio.create_task(collector.start())
 
-    # Monitor output for 60 seconds
-    start = time.time()
     subscription_ok = False
-
     try:
-        while time.time() - start < 60:
-            if proc.poll() is not None:
-                print("   ⚠️ Collector stopped unexpectedly")
-                break
-
-            line = proc.stdout.readline()
-            if line:
-                print(f"   {line.strip()}")
-                if 'Successfully subscribed' in line:
-                    subscription_ok = True
-                    print("   ✅ Subscription successful!")
-                if 'ERROR' in line or 'Failed' in line:
-                    print(f"   ❌ Error detected: {line.strip()}")
-
-            time.sleep(0.1)
+        # Readiness comes from the collector itself, not from its log output
+        ready = asyncio.create_task(collector.subscribed.wait())
+        done, _ = await asyncio.wait({ready, task}, timeout=60, return_when=asyncio.FIRST_COMPLETED)
+        ready.cancel()
+
+        if ready in done:
+            subscription_ok = True
+            print("   ✅ Subscription successful!")
+            await asyncio.sleep(60)
+        elif task in done:
+            print("   ⚠️ Collector stopped unexpectedly")
     finally:
         # Stop collector
-        proc.terminate()
-        proc.wait(timeout=5)
+        await collector.stop()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"   ❌ Collector failed: {e}")
 
     print()
     print(f"End time: {datetime.now()}")
@@ -107,7 +108,7 @@ def main():
 
     # Count quotes with Greeks
     print("A. Quote counts:")
-    columns, results = run_sql_query("""
+    columns, results = await run_sql_query("""
         SELECT
             COUNT(*) as total_quotes,
             COUNT(delta) as quotes_with_delta,
@@ -138,7 +139,7 @@ def main():
     # Show sample data with Greeks
     print("B. Sample quotes with Greeks:")
     print("-" * 80)
-    columns, results = run_sql_query("""
+    columns, results = await run_sql_query("""
         SELECT
             timestamp,
             instrument,
@@ -163,7 +164,8 @@ def main():
         print(header)
         print("-" * len(header))
 
-        # Print rows
+        # Print rows (built up front, written in one go)
+        lines = []
         for row in results:
             formatted_row = []
             for val in row:
@@ -171,7 +173,9 @@ def main():
                     formatted_row.append(f"{val:20.8f}")
                 else:
                     formatted_row.append(f"{str(val):20}")
-            print(" | ".join(formatted_row))
+            lines.append(" | ".join(formatted_row))
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
 
     print()
     print("=" * 80)
@@ -193,5 +197,11 @@ def main():
 
     print()
 
+async def main():
+    try:
+        await run_test()
+    finally:
+        await close_db()
+
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -2,10 +2,22 @@
 Test if Deribit ticker channel provides Greeks for options
 """
 import asyncio
-import json
-import websockets
+from websockets.asyncio.client import connect
 from datetime import datetime
 
+from scripts.json_codec import json_dumps, json_loads
+
+# Encoded once at import; kept as str because Deribit expects JSON-RPC over
+# text frames (bytes would go out as a binary frame)
+SUBSCRIBE_OPTION_TICKER = json_dumps({
+    "jsonrpc": "2.0",
+    "method": "public/subscribe",
+    "params": {
+        "channels": ["ticker.ETH-10NOV25-3200-C.100ms"]
+    },
+    "id": 1
+}).decode()
+
 async def test_option_ticker():
     """Check what fields are in option ticker data"""
     print("=" * 80)
@@ -15,28 +27,21 @@ async def test_option_ticker():
 
     url = 'wss://www.deribit.com/ws/api/v2'
 
-    async with websockets.connect(url) as ws:
+    # permessage-deflate shrinks the repetitive ticker JSON on the wire; frames
+    # are read as bytes (recv(decode=False)) since orjson parses them directly
+    async with connect(url, compression='deflate', max_size=4 * 1024 * 1024) as ws:
         # Subscribe to an ETH option ticker
-        subscription = {
-            "jsonrpc": "2.0",
-            "method": "public/subscribe",
-            "params": {
-                "channels": ["ticker.ETH-10NOV25-3200-C.100ms"]
-            },
-            "id": 1
-        }
-
-        await ws.send(json.dumps(subscription))
-        response = await ws.recv()
-        print(f"Subscription response: {json.loads(response)}")
+        await ws.send(SUBSCRIBE_OPTION_TICKER)
+        response = await ws.recv(decode=False)
+        print(f"Subscription response: {json_loads(response)}")
         print()
 
         print("Waiting for ticker data...")
         print()
 
         # Get first ticker message
-        message = await ws.recv()
-        data = json.loads(message)
+        message = await ws.recv(decode=False)
+        data = json_loads(message)
 
         if 'params' in data:
             tick_data = data['params'].get('data', {})
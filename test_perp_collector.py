@@ -63,6 +63,13 @@ async def test_collector():
     print("Now checking database for results...")
     print()
 
+# One format string for the sample rows, filled straight from the asyncpg Record
+SAMPLE_QUOTE_FORMAT = (
+    "{timestamp} | {instrument:15} | "
+    "Bid: {best_bid_price:8.2f} | Ask: {best_ask_price:8.2f} | "
+    "Mark: {mark_price:.2f} | Index: {index_price:.2f} | Funding: {funding_rate:.8f}"
+)
+
 async def check_database():
     """Check database for collected data"""
     import asyncpg
@@ -118,15 +125,16 @@ async def check_database():
         print(f"  Time range: {row['first']} to {row['last']}")
         print()
 
-    # Show sample quote data
+    # Show sample quote data (raw columns; rounding happens in the formatter
+    # instead of per-row ::numeric casts on the server)
     sample = await conn.fetch("""
         SELECT
             instrument,
-            ROUND(best_bid_price::numeric, 2) as bid,
-            ROUND(best_ask_price::numeric, 2) as ask,
-            ROUND(mark_price::numeric, 2) as mark,
-            ROUND(index_price::numeric, 2) as index,
-            ROUND(funding_rate::numeric, 8) as funding,
+            best_bid_price,
+            best_ask_price,
+            mark_price,
+            index_price,
+            funding_rate,
             timestamp
         FROM perpetuals_quotes
         WHERE timestamp > NOW() - INTERVAL '30 seconds'
@@ -137,9 +145,11 @@ async def check_database():
     print("SAMPLE RECENT QUOTES:")
     print("-" * 80)
     for row in sample:
-        print(f"{row['timestamp']} | {row['instrument']:15} | "
-              f"Bid: {row['bid']:8} | Ask: {row['ask']:8} | "
-              f"Mark: {row['mark']} | Index: {row['index']} | Funding: {row['funding']}")
+        if None in (row['best_bid_price'], row['best_ask_price'], row['mark_price'],
+                     row['index_price'], row['funding_rate']):
+            print(dict(row))
+            continue
+        print(SAMPLE_QUOTE_FORMAT.format_map(row))
 
     await conn.close()
 
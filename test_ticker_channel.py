@@ -2,9 +2,39 @@
 Quick test of ticker channel - verify it provides all fields
 """
 import asyncio
-import json
-import websockets
+import math
+from array import array
+from websockets.asyncio.client import connect
 from datetime import datetime
+from operator import itemgetter
+
+from scripts.json_codec import json_dumps, json_loads
+
+INSTRUMENTS = ('BTC-PERPETUAL', 'ETH-PERPETUAL')
+INSTRUMENT_IDS = {name: i for i, name in enumerate(INSTRUMENTS)}
+
+# Float columns kept per tick (struct-of-arrays, like scripts/tick_buffer.py);
+# missing values are stored as NaN
+VALUE_FIELDS = (
+    'best_bid_price', 'best_ask_price', 'mark_price', 'index_price',
+    'funding_8h', 'open_interest'
+)
+get_values = itemgetter(*VALUE_FIELDS)
+NAN = float('nan')
+
+# Encoded once at import; kept as str because Deribit expects JSON-RPC over
+# text frames (bytes would go out as a binary frame)
+SUBSCRIBE_TICKER_PERP = json_dumps({
+    "jsonrpc": "2.0",
+    "method": "public/subscribe",
+    "params": {
+        "channels": [
+            "ticker.BTC-PERPETUAL.100ms",
+            "ticker.ETH-PERPETUAL.100ms"
+        ]
+    },
+    "id": 1
+}).decode()
 
 async def test_ticker_channel():
     """Test ticker channel for 30 seconds"""
@@ -16,23 +46,13 @@ async def test_ticker_channel():
 
     url = 'wss://www.deribit.com/ws/api/v2'
 
-    async with websockets.connect(url) as ws:
+    # permessage-deflate shrinks the repetitive ticker JSON on the wire; frames
+    # are read as bytes (recv(decode=False)) since orjson parses them directly
+    async with connect(url, compression='deflate', max_size=4 * 1024 * 1024) as ws:
         # Subscribe to ticker channel
-        subscription = {
-            "jsonrpc": "2.0",
-            "method": "public/subscribe",
-            "params": {
-                "channels": [
-                    "ticker.BTC-PERPETUAL.100ms",
-                    "ticker.ETH-PERPETUAL.100ms"
-                ]
-            },
-            "id": 1
-        }
-
-        await ws.send(json.dumps(subscription))
-        response = await ws.recv()
-        response_data = json.loads(response)
+        await ws.send(SUBSCRIBE_TICKER_PERP)
+        response = await ws.recv(decode=False)
+        response_data = json_loads(response)
 
         print(f"Subscription response: {response_data}")
         print()
@@ -46,44 +66,40 @@ async def test_ticker_channel():
         print("Collecting data for 30 seconds...")
         print()
 
-        quote_count = {'BTC-PERPETUAL': 0, 'ETH-PERPETUAL': 0}
-        sample_quotes = []
+        # One growable typed array per field instead of a dict per tick, so
+        # longer diagnostic runs stay compact and per-column stats are cheap
+        timestamp_ms = array('q')
+        instrument_id = array('B')
+        values = tuple(array('d') for _ in VALUE_FIELDS)
 
-        start = datetime.now()
-
-        while (datetime.now() - start).total_seconds() < 30:
-            try:
-                message = await asyncio.wait_for(ws.recv(), timeout=5.0)
-                data = json.loads(message)
+        async def read_ticks():
+            # Plain recv loop: one timeout for the whole window (below)
+            # instead of a timer and a clock read per frame
+            while True:
+                data = json_loads(await ws.recv(decode=False))
 
                 if 'params' in data:
                     channel = data['params'].get('channel', '')
                     tick_data = data['params'].get('data', {})
 
                     if channel.startswith('ticker.'):
-                        instrument = tick_data.get('instrument_name', '')
-                        if instrument in quote_count:
-                            quote_count[instrument] += 1
-
-                            # Save first 3 samples
-                            if len(sample_quotes) < 3:
-                                sample_quotes.append({
-                                    'instrument': instrument,
-                                    'timestamp': datetime.fromtimestamp(tick_data['timestamp'] / 1000),
-                                    'best_bid_price': tick_data.get('best_bid_price'),
-                                    'best_ask_price': tick_data.get('best_ask_price'),
-                                    'mark_price': tick_data.get('mark_price'),
-                                    'index_price': tick_data.get('index_price'),
-                                    'funding_8h': tick_data.get('funding_8h'),
-                                    'open_interest': tick_data.get('open_interest')
-                                })
-
-            except asyncio.TimeoutError:
-                print("⚠️ No messages received for 5 seconds")
-                break
-            except Exception as e:
-                print(f"Error: {e}")
-                break
+                        try:
+                            row = get_values(tick_data)
+                        except KeyError:
+                            row = tuple(map(tick_data.get, VALUE_FIELDS))
+
+                        # Only the two perpetuals are subscribed
+                        instrument_id.append(INSTRUMENT_IDS[tick_data['instrument_name']])
+                        timestamp_ms.append(tick_data['timestamp'])
+                        for column, value in zip(values, row):
+                            column.append(NAN if value is None else value)
+
+        try:
+            await asyncio.wait_for(read_ticks(), timeout=30)
+        except asyncio.TimeoutError:
+            pass  # 30 second window elapsed
+        except Exception as e:
+            print(f"Error: {e}")
 
     # Print results
     print()
@@ -92,6 +108,7 @@ async def test_ticker_channel():
     print("=" * 80)
     print(f"End time: {datetime.now()}")
     print()
+    quote_count = {name: instrument_id.count(iid) for name, iid in INSTRUMENT_IDS.items()}
     print(f"BTC-PERPETUAL quotes received: {quote_count['BTC-PERPETUAL']}")
     print(f"ETH-PERPETUAL quotes received: {quote_count['ETH-PERPETUAL']}")
     print()
@@ -101,31 +118,43 @@ async def test_ticker_channel():
     else:
         print("❌ FAILED! No quotes received")
 
+    # Per-instrument tick interval and spread, straight off the columns
+    bids, asks = values[0], values[1]
+    for name, iid in INSTRUMENT_IDS.items():
+        rows = [i for i, x in enumerate(instrument_id) if x == iid]
+        if len(rows) < 2:
+            continue
+        interval_ms = (timestamp_ms[rows[-1]] - timestamp_ms[rows[0]]) / (len(rows) - 1)
+        spreads = [asks[i] - bids[i] for i in rows]
+        spreads = [x for x in spreads if not math.isnan(x)]
+        mean_spread = math.fsum(spreads) / len(spreads) if spreads else NAN
+        print(f"   {name}: mean tick interval {interval_ms:.1f} ms, mean spread {mean_spread:.2f}")
+
+    sample_rows = range(min(3, len(timestamp_ms)))
+
     print()
     print("SAMPLE QUOTES (first 3):")
     print("-" * 80)
-    for quote in sample_quotes:
-        print(f"Instrument: {quote['instrument']}")
-        print(f"  Timestamp: {quote['timestamp']}")
-        print(f"  Bid: {quote['best_bid_price']}")
-        print(f"  Ask: {quote['best_ask_price']}")
-        print(f"  Mark: {quote['mark_price']}")
-        print(f"  Index: {quote['index_price']}")
-        print(f"  Funding: {quote['funding_8h']}")
-        print(f"  Open Interest: {quote['open_interest']}")
+    for i in sample_rows:
+        bid, ask, mark, index, funding, open_interest = (column[i] for column in values)
+        print(f"Instrument: {INSTRUMENTS[instrument_id[i]]}")
+        print(f"  Timestamp: {datetime.fromtimestamp(timestamp_ms[i] / 1000)}")
+        print(f"  Bid: {bid}")
+        print(f"  Ask: {ask}")
+        print(f"  Mark: {mark}")
+        print(f"  Index: {index}")
+        print(f"  Funding: {funding}")
+        print(f"  Open Interest: {open_interest}")
         print()
 
     print("=" * 80)
     print("VERIFICATION:")
     print("=" * 80)
 
-    all_fields_present = True
-    for quote in sample_quotes:
-        if quote['mark_price'] is None or quote['index_price'] is None:
-            all_fields_present = False
-            break
+    marks, indexes = values[2], values[3]
+    all_fields_present = not any(math.isnan(marks[i]) or math.isnan(indexes[i]) for i in sample_rows)
 
-    if all_fields_present and len(sample_quotes) > 0:
+    if all_fields_present and len(sample_rows) > 0:
         print("✅ All fields populated (bid/ask/mark/index/funding)")
         print("✅ Ticker channel provides complete data")
         print("✅ Ready to deploy to NAS!")
@@ -0,0 +1,30 @@
+"""
+Unit tests for the columnar tick buffer
+
+Tests:
+1. clear_all() resets the fill counters the flush loops poll
+"""
+
+from scripts.tick_buffer import ColumnarTickBuffer
+
+
+def test_clear_all_resets_fill_counters():
+    """Test that clear_all() empties the columns and zeroes n_quotes/n_trades/n_depth."""
+    buffer = ColumnarTickBuffer(max_quotes=10, max_trades=10, max_depth=10)
+    (instrument_id,) = buffer.register_instruments(['ETH-27DEC24-3000-C'])
+
+    for i in range(3):
+        buffer.add_quote(1_700_000_000_000 + i, instrument_id, 1.0, 2.0, 1.1, 2.0, 3000.0, 1.05)
+    buffer.add_trade(1_700_000_000_000, instrument_id, 'trade-1', 1.05, 1.0, 'buy', None, 3000.0)
+    buffer.add_depth(1_700_000_000_000, instrument_id, [1.0], [2.0], [1.1], [2.0], 1.05, 3000.0, None, None)
+    assert (buffer.n_quotes, buffer.n_trades, buffer.n_depth) == (3, 1, 1)
+
+    buffer.clear_all()
+
+    assert (buffer.n_quotes, buffer.n_trades, buffer.n_depth) == (0, 0, 0)
+    quotes, trades, depth = buffer.get_and_clear()
+    assert len(quotes['timestamp_ms']) == 0
+    assert len(trades['timestamp_ms']) == 0
+    assert len(depth['timestamp_ms']) == 0
+
+    print("✅ clear_all() counter reset test passed")
@@ -20,33 +20,35 @@ content = re.sub(
 )
 
 # 2. Update _handle_quote_tick to extract and save full depth
-old_handle_quote = r'''    async def _handle_quote_tick\(self, data: Dict\):
+# (literal match: the method bodies need no whitespace tolerance, so a plain
+# replace avoids hand-escaping them for a DOTALL regex)
+old_handle_quote = '''    async def _handle_quote_tick(self, data: Dict):
         """
-        Handle quote tick from book\.\{instrument\}\.100ms channel\.
+        Handle quote tick from book.{instrument}.100ms channel.
 
         Args:
             data: Quote data from WebSocket
         """
         try:
             # Extract quote data
-            quote = \{
-                'timestamp': datetime\.fromtimestamp\(data\['timestamp'\] / 1000\),
-                'instrument_name': data\['instrument_name'\],
-                'best_bid_price': data\.get\('best_bid_price'\),
-                'best_bid_amount': data\.get\('best_bid_amount'\),
-                'best_ask_price': data\.get\('best_ask_price'\),
-                'best_ask_amount': data\.get\('best_ask_amount'\),
-                'underlying_price': data\.get\('underlying_price'\),
-                'mark_price': data\.get\('mark_price'\)
-            \}
+            quote = {
+                'timestamp': datetime.fromtimestamp(data['timestamp'] / 1000),
+                'instrument_name': data['instrument_name'],
+                'best_bid_price': data.get('best_bid_price'),
+                'best_bid_amount': data.get('best_bid_amount'),
+                'best_ask_price': data.get('best_ask_price'),
+                'best_ask_amount': data.get('best_ask_amount'),
+                'underlying_price': data.get('underlying_price'),
+                'mark_price': data.get('mark_price')
+            }
 
             # Add to buffer
-            self\.buffer\.add_quote\(quote\)
-            self\.stats\['quotes_received'\] \+= 1
+            self.buffer.add_quote(quote)
+            self.stats['quotes_received'] += 1
 
         except Exception as e:
-            logger\.error\(f"Failed to process quote tick: \{e\}"\)
-            self\.stats\['errors'\] \+= 1'''
+            logger.error(f"Failed to process quote tick: {e}")
+            self.stats['errors'] += 1'''
 
 new_handle_quote = '''    async def _handle_quote_tick(self, data: Dict):
         """
@@ -100,25 +102,25 @@ new_handle_quote = '''    async def _handle_quote_tick(self, data: Dict):
             logger.error(f"Failed to process quote tick: {e}")
             self.stats['errors'] += 1'''
 
-content = re.sub(old_handle_quote, new_handle_quote, content, flags=re.DOTALL)
+content = content.replace(old_handle_quote, new_handle_quote, 1)
 
 # 3. Update _flush_buffers to flush depth snapshots
-old_flush = r'''    async def _flush_buffers\(self\):
-        """Flush buffers to database\."""
+old_flush = '''    async def _flush_buffers(self):
+        """Flush buffers to database."""
         try:
-            # Get and clear buffers \(atomic operation\)
-            quotes, trades = self\.buffer\.get_and_clear\(\)
+            # Get and clear buffers (atomic operation)
+            quotes, trades = self.buffer.get_and_clear()
 
             # Write to database
             if quotes:
-                await self\.writer\.write_quotes\(quotes\)
+                await self.writer.write_quotes(quotes)
 
             if trades:
-                await self\.writer\.write_trades\(trades\)
+                await self.writer.write_trades(trades)
 
         except Exception as e:
-            logger\.error\(f"Failed to flush buffers: \{e\}", exc_info=True\)
-            self\.stats\['errors'\] \+= 1'''
+            logger.error(f"Failed to flush buffers: {e}", exc_info=True)
+            self.stats['errors'] += 1'''
 
 new_flush = '''    async def _flush_buffers(self):
         """Flush buffers to database."""
@@ -140,7 +142,7 @@ new_flush = '''    async def _flush_buffers(self):
             logger.error(f"Failed to flush buffers: {e}", exc_info=True)
             self.stats['errors'] += 1'''
 
-content = re.sub(old_flush, new_flush, content, flags=re.DOTALL)
+content = content.replace(old_flush, new_flush, 1)
 
 # 4. Update stats initialization to include depth_received
 content = re.sub(